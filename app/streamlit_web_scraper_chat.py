@@ -1,7 +1,8 @@
-import asyncio
+import queue
 import streamlit as st
 from src.web_extractor import WebExtractor
 from src.scrapers.playwright_scraper import ScraperConfig
+from src.utils.event_loop import BackgroundLoop
 import os
 
 class StreamlitWebScraperChat:
@@ -9,11 +10,17 @@ class StreamlitWebScraperChat:
         self.web_extractor = WebExtractor(model_name=model_name, scraper_config=scraper_config)
 
     def process_message(self, message: str) -> str:
-        async def process_with_progress():
-            progress_placeholder = st.empty()
-            progress_placeholder.text("Processing...")
-            result = await self.web_extractor.process_query(message, progress_callback=progress_placeholder.text)
-            progress_placeholder.empty()
-            return result
-
-        return asyncio.run(process_with_progress())
\ No newline at end of file
+        # Scrapes run on one long-lived loop so pooled browsers and connections survive between messages.
+        # Streamlit elements can only be updated from this script thread, so progress is passed back through a queue.
+        updates = queue.Queue()
+        progress_placeholder = st.empty()
+        progress_placeholder.text("Processing...")
+        future = BackgroundLoop.shared().submit(
+            self.web_extractor.process_query(message, progress_callback=updates.put))
+        while not future.done() or not updates.empty():
+            try:
+                progress_placeholder.text(updates.get(timeout=0.1))
+            except queue.Empty:
+                pass
+        progress_placeholder.empty()
+        return future.result()
@@ -0,0 +1,206 @@
+"""
+Offline end-to-end benchmark: fetch -> preprocess -> format over the recorded HAR fixtures.
+
+Every fixture in fixtures/har/manifest.json is replayed through PlaywrightScraper's
+HAR replay mode, so no request leaves the machine and timings are repeatable.
+The LLM is never called; the format step runs on the extraction stored in the manifest.
+
+    python benchmark.py                    # all fixtures, 5 runs each
+    python benchmark.py --only books -n 10
+    python benchmark.py --json results.json
+    python benchmark.py --preprocess --scale 1 20 200    # page cleaning only, fixture pages grown 20x/200x
+    python benchmark.py --preprocess --html saved/*.html # ...or on saved real pages
+
+To record a new fixture, scrape a site once with
+ScraperConfig(har_mode='record', har_path='fixtures/har/<name>.har') and add it to the manifest.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Dict, Any, List, Tuple
+
+from bs4 import BeautifulSoup, Comment
+
+from src.utils.html_text import html_to_text, etree
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 1),
+        'min_ms': round(min(samples) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1),
+    }
+
+
+async def run_fixture(fixture: Dict[str, Any], fixtures_dir: str, runs: int) -> Dict[str, Any]:
+    # The full pipeline pulls in pandas, langchain and playwright; --preprocess runs without them
+    from src.web_extractor import WebExtractor
+    from src.ollama_models import OllamaModel
+    from src.scrapers.playwright_scraper import ScraperConfig
+
+    config = ScraperConfig(
+        har_mode='replay',
+        har_path=os.path.join(fixtures_dir, fixture['har']),
+        # Politeness pacing would dominate offline timings
+        host_rate_limit=1000.0,
+        host_burst=1000,
+    )
+    # The model is only a placeholder: nothing in this benchmark queries it
+    extractor = WebExtractor(model_name=OllamaModel('benchmark'), scraper_config=config)
+    extracted = json.dumps(fixture['extracted'])
+
+    fetch_times, format_times = [], []
+    try:
+        # Browser launch and context setup are one-off costs, not part of a run
+        await extractor.playwright_scraper.warm_up()
+        for _ in range(runs):
+            start = time.perf_counter()
+            if 'crawl_depth' in fixture:
+                message = await extractor._crawl_url(fixture['url'], fixture['crawl_depth'])
+            else:
+                message = await extractor._fetch_url(fixture['url'], pages=fixture.get('pages'))
+            if message.startswith('Error'):
+                raise RuntimeError(message)
+            fetch_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            extractor._format_result(extracted, fixture['query'])
+            format_times.append(time.perf_counter() - start)
+    finally:
+        stats = extractor.playwright_scraper.get_stats()
+        await extractor.playwright_scraper.close()
+
+    return {
+        'name': fixture['name'],
+        'runs': runs,
+        'fetch_and_preprocess': summarize(fetch_times),
+        'format': summarize(format_times),
+        'preprocessed_chars': len(extractor.preprocessed_content or ''),
+        'preprocessed_tokens': extractor.preprocessed_tokens,
+        'archive': stats.get('traffic_archive'),
+    }
+
+
+def legacy_preprocess(content: str) -> str:
+    """The BeautifulSoup cleaning that html_to_text replaced, kept as the reference output"""
+    soup = BeautifulSoup(content, 'html.parser')
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+    for tag in soup(["header", "footer", "nav", "aside"]):
+        tag.decompose()
+    # get_text() over every subtree for every tag: quadratic in the size of the page
+    for tag in soup.find_all():
+        if len(tag.get_text(strip=True)) == 0:
+            tag.extract()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+def fixture_pages(fixtures: List[Dict[str, Any]], fixtures_dir: str) -> List[Tuple[str, str]]:
+    """HTML documents recorded in the fixtures' HAR files"""
+    pages = []
+    for fixture in fixtures:
+        with open(os.path.join(fixtures_dir, fixture['har']), 'r', encoding='utf-8') as f:
+            entries = json.load(f)['log']['entries']
+        for entry in entries:
+            content = entry['response']['content']
+            if 'html' in content.get('mimeType', '') and content.get('text'):
+                pages.append((entry['request']['url'], content['text']))
+    return pages
+
+
+def scale_page(html: str, factor: int) -> str:
+    """Repeat a page's body ``factor`` times, for a larger page with the same structure"""
+    start, end = html.find('<body'), html.rfind('</body>')
+    if factor <= 1 or start < 0 or end < 0:
+        return html
+    start = html.index('>', start) + 1
+    return html[:start] + html[start:end] * factor + html[end:]
+
+
+def time_call(function, runs: int) -> Tuple[List[float], str]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def benchmark_preprocessing(pages: List[Tuple[str, str]], scales: List[int], runs: int) -> List[Dict[str, Any]]:
+    """Time the legacy cleaning against html_to_text on each page, and check the outputs agree"""
+    parsers = ['html.parser'] + (['lxml'] if etree is not None else [])
+    results = []
+    for name, page in pages:
+        for factor in scales:
+            html = scale_page(page, factor)
+            legacy_samples, expected = time_call(lambda: legacy_preprocess(html), runs)
+            result = {'name': name, 'scale': factor, 'html_kb': len(html) // 1024,
+                      'legacy': summarize(legacy_samples)}
+            for parser in parsers:
+                samples, text = time_call(lambda: html_to_text(html, parser), runs)
+                result[parser] = summarize(samples)
+                result[parser]['speedup'] = round(statistics.median(legacy_samples) / statistics.median(samples), 1)
+                result[parser]['same_output'] = text == expected
+            results.append(result)
+            print(f"{name[:40]:<40} x{factor:<4} {result['html_kb']:>6} KB  "
+                  f"legacy {result['legacy']['median_ms']:>9} ms  " +
+                  "  ".join(f"{parser} {result[parser]['median_ms']:>8} ms "
+                            f"({result[parser]['speedup']}x{'' if result[parser]['same_output'] else ', differs'})"
+                            for parser in parsers))
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay recorded fixture sites and time each pipeline stage")
+    parser.add_argument('--fixtures', default=os.path.join('fixtures', 'har'), help="directory holding manifest.json")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="runs per fixture")
+    parser.add_argument('--only', nargs='*', help="fixture names to run")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--preprocess', action='store_true', help="benchmark page cleaning only, without a browser")
+    parser.add_argument('--scale', nargs='*', type=int, default=[1, 20, 200],
+                        help="with --preprocess: grow each fixture page's body by these factors")
+    parser.add_argument('--html', nargs='*', help="with --preprocess: saved HTML files to clean as well")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.fixtures, 'manifest.json'), 'r', encoding='utf-8') as f:
+        fixtures = json.load(f)
+    if args.only:
+        fixtures = [fixture for fixture in fixtures if fixture['name'] in args.only]
+
+    if args.preprocess:
+        results = benchmark_preprocessing(fixture_pages(fixtures, args.fixtures), args.scale, args.runs)
+        for path in args.html or []:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                results += benchmark_preprocessing([(os.path.basename(path), f.read())], [1], args.runs)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+        return
+
+    from src.scrapers.browser_pool import BrowserPool
+    results = []
+    try:
+        for fixture in fixtures:
+            result = await run_fixture(fixture, args.fixtures, args.runs)
+            results.append(result)
+            print(f"{result['name']:<10} fetch+preprocess {result['fetch_and_preprocess']['median_ms']:>8} ms  "
+                  f"format {result['format']['median_ms']:>7} ms  "
+                  f"{result['preprocessed_tokens']} tokens  (median of {result['runs']})")
+    finally:
+        await BrowserPool.close_shared()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -278,6 +278,19 @@ def display_message_with_sheets_upload(message, message_index):
     else:
         st.markdown(str(content))
 
+def render_tor_health():
+    web_scraper_chat = st.session_state.get('web_scraper_chat')
+    if not web_scraper_chat:
+        return
+    health = web_scraper_chat.web_extractor.tor_scraper.get_health()
+    if health['status'] == 'unknown':
+        return
+    checked = f"checked {health['checked_s_ago']}s ago" + (", re-checking now" if health['checking'] else "")
+    if health['status'] == 'healthy':
+        st.success(f"Tor connection OK ({checked})")
+    else:
+        st.error(f"Tor connection unavailable: {health['last_error']} ({checked})")
+
 def cleanup():
     if 'web_scraper_chat' in st.session_state and st.session_state.web_scraper_chat:
         del st.session_state.web_scraper_chat
@@ -342,6 +355,8 @@ def main():
 
         st.session_state.use_current_browser = st.checkbox("Use Current Browser (No Docker)", value=False, help="Works Natively, Doesn't Work with Docker. if a website is blocking your browser, you can use this option to use the current browser instead of opening a new one.")
 
+        render_tor_health()
+
         if st.button("Refresh Ollama Models"):
             with st.spinner("Fetching Ollama models..."):
                 st.session_state.ollama_models = asyncio.run(list_ollama_models())
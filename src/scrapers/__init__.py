@@ -1,3 +1,6 @@
 from .playwright_scraper import PlaywrightScraper
 from .html_scraper import HTMLScraper
-from .json_scraper import JSONScraper
\ No newline at end of file
+from .json_scraper import JSONScraper
+from .csv_scraper import CSVScraper
+from .xml_scraper import XMLScraper
+from .http_scraper import HTTPScraper
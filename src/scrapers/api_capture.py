@@ -0,0 +1,140 @@
+from playwright.async_api import BrowserContext, Response
+from dataclasses import dataclass
+from typing import Optional, List, Iterable, Set, Dict, Any
+import asyncio
+import json
+import logging
+import re
+
+DEFAULT_API_CONTENT_TYPES = ['application/json', '+json', 'text/json']
+
+API_RESOURCE_TYPES = {'xhr', 'fetch'}
+
+
+@dataclass
+class CapturedResponse:
+    url: str
+    status: int
+    content_type: str
+    text: str
+
+
+@dataclass
+class ApiPayload:
+    """Records found in captured API responses, keyed by the endpoint they came from"""
+    records: Dict[str, List[Dict[str, Any]]]
+    # True when api_url_patterns picked the endpoints; otherwise any JSON the page loaded was kept
+    targeted: bool
+
+    @classmethod
+    async def from_responses(cls, responses: List[CapturedResponse], json_scraper, min_records: int,
+                             targeted: bool) -> Optional['ApiPayload']:
+        records = {}
+        for response in responses:
+            found = json_scraper.find_records(await json_scraper.extract(response.text))
+            if len(found) >= min_records:
+                # The same endpoint polled twice only needs its latest answer
+                records[response.url] = found
+        return cls(records, targeted) if records else None
+
+    def to_text(self) -> str:
+        return "\n".join(f"JSON data from {api_url}:\n{json.dumps(records, separators=(',', ':'), ensure_ascii=False)}"
+                         for api_url, records in self.records.items())
+
+    def get_table(self) -> Optional[List[Dict[str, Any]]]:
+        # Records from one endpoint form a table that can be converted without the model
+        return next(iter(self.records.values())) if len(self.records) == 1 else None
+
+    def replaces_page(self) -> bool:
+        """Whether the payload can stand in for the page text.
+
+        Without url patterns the capture also picks up analytics, recommendation
+        and ad payloads, so the page text is kept and the payload goes next to it.
+        """
+        return self.targeted
+
+
+class ApiCaptureSession:
+    """Collects matching responses from one context until ``finish`` is called"""
+
+    def __init__(self, capture: 'ApiResponseCapture', context: BrowserContext, sink: List[CapturedResponse]):
+        self.capture = capture
+        self.context = context
+        self.sink = sink
+        self.pending: Set[asyncio.Task] = set()
+        context.on('response', self._on_response)
+
+    def _on_response(self, response: Response):
+        if len(self.sink) + len(self.pending) >= self.capture.max_responses:
+            return
+        if not self.capture.matches(response):
+            return
+        # Event handlers are synchronous, so the body is read in a task that finish() waits for
+        task = asyncio.create_task(self._read(response))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _read(self, response: Response):
+        try:
+            body = await response.body()
+        except Exception as e:
+            # Bodies of redirects and responses from closed pages are not available
+            self.capture.logger.debug(f"Could not read {response.url}: {str(e)}")
+            return
+        if len(body) > self.capture.max_bytes:
+            self.capture.logger.debug(f"Skipping {response.url}: {len(body)} bytes is over the capture limit")
+            return
+        self.sink.append(CapturedResponse(
+            url=response.url,
+            status=response.status,
+            content_type=response.headers.get('content-type', ''),
+            text=body.decode('utf-8', errors='replace'),
+        ))
+
+    async def finish(self):
+        self.context.remove_listener('response', self._on_response)
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        self.capture.logger.debug(f"Captured {len(self.sink)} API responses")
+
+
+class ApiResponseCapture:
+    """Keeps the JSON responses a page loads over XHR/fetch while it renders.
+
+    Storefronts and other client-rendered sites usually fetch their listings as
+    JSON; that payload is far smaller than the rendered page and already
+    structured. Responses are kept when their URL matches one of ``url_patterns``
+    (all URLs when none are given) and their content type matches ``content_types``.
+    """
+
+    def __init__(self, url_patterns: Optional[Iterable[str]] = None,
+                 content_types: Optional[Iterable[str]] = None,
+                 max_bytes: int = 2 * 1024 * 1024, max_responses: int = 50, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.url_patterns = [re.compile(p) for p in (url_patterns or [])]
+        self.content_types = [t.lower() for t in (content_types or DEFAULT_API_CONTENT_TYPES)]
+        self.max_bytes = max_bytes
+        self.max_responses = max_responses
+
+    @classmethod
+    def from_config(cls, config) -> 'ApiResponseCapture':
+        return cls(
+            url_patterns=config.api_url_patterns,
+            content_types=config.api_content_types,
+            max_bytes=config.api_max_bytes,
+            max_responses=config.api_max_responses,
+            debug=config.debug,
+        )
+
+    def matches(self, response: Response) -> bool:
+        if response.request.resource_type not in API_RESOURCE_TYPES or not response.ok:
+            return False
+        content_type = response.headers.get('content-type', '').lower()
+        if not any(t in content_type for t in self.content_types):
+            return False
+        return not self.url_patterns or any(p.search(response.url) for p in self.url_patterns)
+
+    def attach(self, context: BrowserContext, sink: List[CapturedResponse]) -> ApiCaptureSession:
+        """Start collecting matching responses from every page in ``context`` into ``sink``"""
+        return ApiCaptureSession(self, context, sink)
@@ -0,0 +1,375 @@
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+from .memory_governor import MemoryGovernor
+from ..utils.event_loop import run_on_loop
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, AsyncIterator
+import asyncio
+import logging
+import os
+import signal
+import time
+
+BROWSER_ARGS = ['--no-sandbox', '--disable-setuid-sandbox', '--disable-infobars',
+                '--window-position=0,0', '--ignore-certifcate-errors',
+                '--ignore-certifcate-errors-spki-list']
+
+ContextHook = Callable[[BrowserContext], Awaitable[None]]
+
+
+def stop_driver(playwright: Playwright) -> bool:
+    """Terminate the playwright driver of an event loop that is already closed.
+
+    Its browsers can no longer be closed through the driver once the loop is
+    gone, but they exit together with it. Returns False when the driver process
+    could not be found.
+    """
+    try:
+        # No public API reaches the driver without a running loop
+        pid = playwright._connection._transport._proc.pid
+    except AttributeError:
+        return False
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+class PooledBrowser:
+    """A warm browser process together with the contexts it keeps for reuse"""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.idle_contexts: Dict[Tuple, List[Tuple[BrowserContext, float]]] = {}
+        self.active_contexts = 0
+        self.last_used = time.monotonic()
+        # A retiring browser takes no new leases and is closed once its last one ends
+        self.retiring = False
+
+    def is_healthy(self) -> bool:
+        return self.browser.is_connected()
+
+    def idle_count(self) -> int:
+        return sum(len(contexts) for contexts in self.idle_contexts.values())
+
+
+class BrowserPool:
+    """Long-lived pool of Chromium processes that leases out reusable contexts.
+
+    Playwright objects are bound to the event loop that created them, so the pool
+    stays warm only while it is used from one loop; the app runs every scrape on
+    the shared ``BackgroundLoop`` for that reason. When the pool is used from a
+    new loop anyway, the previous generation is shut down (on its own loop when
+    that still runs, otherwise by stopping its driver) and browsers are
+    relaunched lazily.
+    """
+
+    _shared: Dict[Tuple, 'BrowserPool'] = {}
+
+    def __init__(self, size: int = 1, launch_options: Optional[Dict[str, Any]] = None,
+                 max_contexts_per_browser: int = 4, idle_timeout: float = 300.0,
+                 governor: Optional[MemoryGovernor] = None, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.size = max(1, size)
+        self.launch_options = launch_options or {'headless': True, 'args': BROWSER_ARGS}
+        self.max_contexts_per_browser = max(1, max_contexts_per_browser)
+        self.idle_timeout = idle_timeout
+        self.governor = governor
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[PooledBrowser] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._closing = False
+
+    @classmethod
+    def from_config(cls, config) -> 'BrowserPool':
+        return cls(
+            size=config.browser_pool_size,
+            launch_options={'headless': config.headless, 'args': BROWSER_ARGS},
+            max_contexts_per_browser=config.max_contexts_per_browser,
+            idle_timeout=config.browser_idle_timeout,
+            governor=MemoryGovernor.from_config(config),
+            debug=config.debug,
+        )
+
+    @classmethod
+    def shared(cls, config) -> 'BrowserPool':
+        """Return the process-wide pool for this configuration, creating it on first use"""
+        key = (config.headless, config.browser_pool_size,
+               config.max_contexts_per_browser, config.browser_idle_timeout,
+               config.max_pages_per_context, config.max_pages_per_browser,
+               config.max_context_heap_mb, config.max_browser_memory_mb, config.memory_sample_interval)
+        if key not in cls._shared:
+            cls._shared[key] = cls.from_config(config)
+        return cls._shared[key]
+
+    @property
+    def capacity(self) -> int:
+        return self.size * self.max_contexts_per_browser
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            self._discard_generation()
+        self._loop = loop
+        self._playwright = None
+        self._browsers = []
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.capacity)
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._reaper_task = None
+        self._in_flight = 0
+        self._closing = False
+
+    def _discard_generation(self):
+        """Shut down the browsers and driver that belong to the previous event loop"""
+        playwright, browsers, reaper = self._playwright, self._browsers, self._reaper_task
+        if playwright is None:
+            return
+
+        async def shutdown():
+            if reaper:
+                reaper.cancel()
+            for pooled in browsers:
+                await self._close_browser(pooled)
+            try:
+                await playwright.stop()
+            except Exception as e:
+                self.logger.debug(f"Error stopping playwright: {str(e)}")
+
+        if run_on_loop(self._loop, shutdown()):
+            self.logger.info(f"Event loop changed, closing {len(browsers)} browser(s) on the previous loop.")
+            return
+        if self.governor:
+            for pooled in browsers:
+                self.governor.forget_browser(pooled.browser)
+        if stop_driver(playwright):
+            self.logger.info("Event loop changed, stopped the browsers left by the previous loop.")
+        else:
+            self.logger.warning("Event loop changed and the previous browsers could not be stopped; "
+                                "run scrapes on one loop (see BackgroundLoop) to keep the pool warm.")
+
+    async def start(self):
+        """Launch the playwright driver and top the pool up with healthy browsers"""
+        self._bind_loop()
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            healthy = [b for b in self._browsers if b.is_healthy()]
+            if len(healthy) != len(self._browsers):
+                self.logger.warning(f"Dropping {len(self._browsers) - len(healthy)} disconnected browser(s) from pool.")
+            self._browsers = healthy
+
+            # Retiring browsers are still draining, so replacements are launched alongside them
+            while len([b for b in self._browsers if not b.retiring]) < self.size:
+                browser = await self._playwright.chromium.launch(**self.launch_options)
+                self._browsers.append(PooledBrowser(browser))
+                self.logger.info(f"Launched pooled browser ({len(self._browsers)}/{self.size}).")
+
+            if self._reaper_task is None and self.idle_timeout:
+                self._reaper_task = asyncio.create_task(self._reap_idle())
+
+    @staticmethod
+    def _context_key(context_options: Dict[str, Any]) -> Tuple:
+        return tuple(sorted((k, repr(v)) for k, v in context_options.items()))
+
+    async def _checkout(self, context_options: Dict[str, Any], on_create: Optional[ContextHook],
+                        setup_key: Any) -> Tuple[PooledBrowser, Tuple, BrowserContext]:
+        key = self._context_key(context_options) + (('setup', repr(setup_key)),)
+        pooled = None
+        while pooled is None:
+            await self.start()
+            async with self._lock:
+                # A browser can start retiring between start() and here; then start() replaces it
+                candidates = [b for b in self._browsers if not b.retiring]
+                if not candidates:
+                    continue
+                pooled = min(candidates, key=lambda b: b.active_contexts)
+                pooled.active_contexts += 1
+                pooled.last_used = time.monotonic()
+                idle = pooled.idle_contexts.get(key)
+                context = idle.pop()[0] if idle else None
+
+        if context is None:
+            try:
+                context = await pooled.browser.new_context(**context_options)
+                if on_create:
+                    await on_create(context)
+            except Exception:
+                pooled.active_contexts -= 1
+                if context is not None:
+                    await context.close()
+                raise
+            self.logger.debug("Created new pooled browser context.")
+        return pooled, key, context
+
+    async def _checkin(self, pooled: PooledBrowser, key: Tuple, context: BrowserContext, reusable: bool):
+        pooled.active_contexts -= 1
+        pooled.last_used = time.monotonic()
+
+        recycled = False
+        if reusable and self.governor:
+            reason = self.governor.context_recycle_reason(context)
+            if reason:
+                self.logger.info(f"Recycling browser context: {reason}.")
+                reusable = False
+                recycled = True
+
+        if reusable and pooled.is_healthy() and not self._closing and not pooled.retiring:
+            try:
+                for page in list(context.pages):
+                    await page.close()
+            except Exception as e:
+                self.logger.debug(f"Discarding context that failed to reset: {str(e)}")
+                reusable = False
+        else:
+            reusable = False
+
+        if reusable and pooled.idle_count() < self.max_contexts_per_browser:
+            pooled.idle_contexts.setdefault(key, []).append((context, time.monotonic()))
+        else:
+            await self._close_context(context, recycled)
+
+        if self.governor and not pooled.retiring:
+            reason = self.governor.browser_recycle_reason(pooled.browser)
+            if reason:
+                self.logger.info(f"Retiring pooled browser once its pages finish: {reason}.")
+                pooled.retiring = True
+        if pooled.retiring and pooled.active_contexts == 0:
+            await self._retire(pooled)
+
+    async def _close_context(self, context: BrowserContext, recycled: bool = False):
+        if self.governor:
+            self.governor.forget_context(context, recycled)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _retire(self, pooled: PooledBrowser):
+        """Close a drained browser that the governor marked for recycling"""
+        async with self._lock:
+            if pooled not in self._browsers:
+                return
+            self._browsers.remove(pooled)
+        await self._close_browser(pooled, recycled=True)
+        self.logger.info("Recycled pooled browser; a fresh one is launched on the next lease.")
+
+    @asynccontextmanager
+    async def lease(self, context_options: Optional[Dict[str, Any]] = None,
+                    on_create: Optional[ContextHook] = None,
+                    setup_key: Any = None) -> AsyncIterator[BrowserContext]:
+        """Borrow a browser context, returning it to the pool afterwards.
+
+        ``on_create`` runs once when a fresh context is created, so per-context setup
+        is paid only the first time a context is handed out. Contexts are only reused
+        for leases with the same ``context_options`` and ``setup_key``.
+        """
+        self._bind_loop()
+        if self._closing:
+            raise RuntimeError("Browser pool is shutting down")
+
+        async with self._slots:
+            self._in_flight += 1
+            self._drained.clear()
+            try:
+                pooled, key, context = await self._checkout(context_options or {}, on_create, setup_key)
+                reusable = True
+                try:
+                    yield context
+                except Exception:
+                    reusable = False
+                    raise
+                finally:
+                    await self._checkin(pooled, key, context, reusable)
+            finally:
+                self._in_flight -= 1
+                if self._in_flight == 0:
+                    self._drained.set()
+
+    async def warm(self, context_options: Optional[Dict[str, Any]] = None,
+                   on_create: Optional[ContextHook] = None, setup_key: Any = None, count: int = 1):
+        """Create up to ``count`` ready contexts now so later leases skip browser launch and context setup"""
+        count = max(1, min(count, self.capacity))
+        # Holding the leases together forces distinct contexts; releasing them parks them as idle
+        async with AsyncExitStack() as stack:
+            for _ in range(count):
+                await stack.enter_async_context(self.lease(context_options, on_create, setup_key))
+        self.logger.info(f"Warmed {count} browser context(s).")
+
+    async def _reap_idle(self):
+        interval = max(1.0, min(self.idle_timeout / 2, 30.0))
+        while not self._closing:
+            await asyncio.sleep(interval)
+            await self.close_idle()
+
+    async def close_idle(self):
+        """Close contexts and browsers that have been unused for longer than ``idle_timeout``"""
+        now = time.monotonic()
+        async with self._lock:
+            for pooled in list(self._browsers):
+                for key, contexts in list(pooled.idle_contexts.items()):
+                    keep = []
+                    for context, last_used in contexts:
+                        if now - last_used > self.idle_timeout:
+                            await self._close_context(context)
+                        else:
+                            keep.append((context, last_used))
+                    pooled.idle_contexts[key] = keep
+
+                if pooled.active_contexts == 0 and now - pooled.last_used > self.idle_timeout:
+                    self._browsers.remove(pooled)
+                    await self._close_browser(pooled)
+                    self.logger.info("Closed idle pooled browser.")
+
+    async def _close_browser(self, pooled: PooledBrowser, recycled: bool = False):
+        if self.governor:
+            for contexts in pooled.idle_contexts.values():
+                for context, _ in contexts:
+                    self.governor.forget_context(context)
+            self.governor.forget_browser(pooled.browser, recycled)
+        pooled.idle_contexts = {}
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing pooled browser: {str(e)}")
+
+    async def close(self, timeout: Optional[float] = 30.0):
+        """Gracefully shut the pool down, waiting for in-flight leases to finish first"""
+        if self._loop is not asyncio.get_running_loop():
+            self._bind_loop()
+            return
+
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning("Timed out waiting for in-flight scrapes, closing browsers anyway.")
+
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+
+        for pooled in self._browsers:
+            await self._close_browser(pooled)
+        self._browsers = []
+
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        self._closing = False
+        self.logger.info("Browser pool closed.")
+
+    @classmethod
+    async def close_shared(cls):
+        for pool in cls._shared.values():
+            await pool.close()
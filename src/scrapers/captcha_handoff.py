@@ -0,0 +1,224 @@
+from playwright.async_api import BrowserContext, Page
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from ..utils.storage_state_store import state_domain
+import asyncio
+import itertools
+import logging
+import sys
+import threading
+import time
+
+# Widgets and interstitials of the common CAPTCHA and bot-challenge providers
+CAPTCHA_PRESENT_SCRIPT = '''
+    () => {
+        const selectors = [
+            'iframe[src*="recaptcha"]', 'iframe[src*="hcaptcha"]', 'iframe[src*="challenges.cloudflare.com"]',
+            'iframe[src*="captcha-delivery"]', '.g-recaptcha', '.h-captcha', '.cf-turnstile',
+            '#challenge-form', '#challenge-running', '#cf-challenge-running', '#px-captcha'
+        ];
+        return document.title.includes('Just a moment') || selectors.some(s => document.querySelector(s));
+    }
+'''
+
+PENDING, SOLVED, CANCELLED, TIMED_OUT = 'pending', 'solved', 'cancelled', 'timed_out'
+
+
+class CaptchaChallenge:
+    """A scrape parked until someone solves the CAPTCHA shown in its browser window"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url: str):
+        self.id = str(next(self._ids))
+        self.url = url
+        self.domain = state_domain(url)
+        self.created_at = time.time()
+        self.status = PENDING
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def resolve(self, status: str = SOLVED):
+        """Finish the challenge; safe to call from any thread, e.g. a UI or API handler"""
+        def finish():
+            if self.status == PENDING:
+                self.status = status
+                self._event.set()
+        if self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            finish()
+            return
+        try:
+            self._loop.call_soon_threadsafe(finish)
+        except RuntimeError:
+            # The loop closed in the meantime, so nothing is waiting any more
+            pass
+
+    async def wait(self):
+        await self._event.wait()
+
+
+class ConsoleResolver:
+    """One stdin reader shared by every challenge waiting for Enter in the console.
+
+    A line resolves the oldest challenge still waiting for one. A line read while
+    nothing waits is dropped, so it can never solve a later challenge.
+    """
+
+    def __init__(self):
+        self._waiting: List[CaptchaChallenge] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, challenge: CaptchaChallenge):
+        with self._lock:
+            self._waiting.append(challenge)
+            if self._thread is None:
+                # A daemon thread, so the reader blocked on stdin never keeps the process alive
+                self._thread = threading.Thread(target=self._read_lines, name='captcha-console', daemon=True)
+                self._thread.start()
+
+    def remove(self, challenge: CaptchaChallenge):
+        with self._lock:
+            if challenge in self._waiting:
+                self._waiting.remove(challenge)
+
+    def _read_lines(self):
+        while True:
+            line = sys.stdin.readline()
+            with self._lock:
+                if not line:
+                    # stdin was closed; the next prompt starts a new reader
+                    self._thread = None
+                    return
+                self._waiting = [c for c in self._waiting if c.status == PENDING]
+                challenge = self._waiting.pop(0) if self._waiting else None
+            if challenge:
+                challenge.resolve(SOLVED)
+
+
+class CaptchaHandoff:
+    """Hands CAPTCHAs to a human without blocking the event loop.
+
+    The scrape that hit the CAPTCHA parks on an awaitable challenge while other
+    fetches keep running. The challenge is resolved by ``resolve`` (from an API
+    handler or any other thread), by pressing Enter in the console, or
+    automatically once the CAPTCHA widget has gone from the page. The Streamlit
+    app has no resolve control; there the console and auto-detection are the
+    only ways to resume.
+    """
+
+    _shared: Dict[Tuple, 'CaptchaHandoff'] = {}
+    _console = ConsoleResolver()
+
+    def __init__(self, timeout: float = 300.0, console_prompt: bool = True, auto_detect: bool = True,
+                 poll_interval: float = 1.0, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.timeout = timeout
+        self.console_prompt = console_prompt
+        self.auto_detect = auto_detect
+        self.poll_interval = poll_interval
+        self.challenges: Dict[str, CaptchaChallenge] = {}
+        self.listeners: List[Callable[[CaptchaChallenge], None]] = []
+        self.solved = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'CaptchaHandoff':
+        return cls(
+            timeout=config.captcha_timeout,
+            console_prompt=config.captcha_console_prompt,
+            auto_detect=config.captcha_auto_detect,
+            debug=config.debug,
+        )
+
+    @classmethod
+    def shared(cls, config=None) -> 'CaptchaHandoff':
+        """Return the process-wide handoff for this configuration, creating it on first use"""
+        key = (config.captcha_timeout, config.captcha_console_prompt,
+               config.captcha_auto_detect) if config is not None else ()
+        if key not in cls._shared:
+            cls._shared[key] = cls.from_config(config) if config is not None else cls()
+        return cls._shared[key]
+
+    def subscribe(self, listener: Callable[[CaptchaChallenge], None]) -> Callable[[], None]:
+        """Call ``listener`` whenever a scrape parks on a new challenge; returns an unsubscribe function"""
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener) if listener in self.listeners else None
+
+    def pending(self) -> List[CaptchaChallenge]:
+        return [c for c in self.challenges.values() if c.status == PENDING]
+
+    def resolve(self, challenge_id: Optional[str] = None, solved: bool = True) -> bool:
+        """Resolve a challenge by id, or the oldest pending one; False when there is nothing to resolve"""
+        pending = self.pending()
+        if challenge_id is not None:
+            pending = [c for c in pending if c.id == challenge_id]
+        if not pending:
+            return False
+        pending[0].resolve(SOLVED if solved else CANCELLED)
+        return True
+
+    async def solve(self, page: Page, url: str) -> str:
+        """Park until the CAPTCHA on ``page`` is solved, cancelled or times out; returns how it ended"""
+        challenge = CaptchaChallenge(url)
+        self.challenges[challenge.id] = challenge
+        watcher = None
+        try:
+            for listener in list(self.listeners):
+                try:
+                    listener(challenge)
+                except Exception as e:
+                    self.logger.debug(f"CAPTCHA listener failed: {str(e)}")
+            if self.console_prompt and sys.stdin and sys.stdin.isatty():
+                self.prompt_on_console(challenge)
+            if self.auto_detect:
+                watcher = asyncio.create_task(self.watch_page(page, challenge))
+
+            try:
+                await asyncio.wait_for(challenge.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                challenge.resolve(TIMED_OUT)
+                self.timed_out += 1
+                return challenge.status
+            if challenge.status == SOLVED:
+                self.solved += 1
+            return challenge.status
+        finally:
+            if watcher:
+                watcher.cancel()
+            self._console.remove(challenge)
+            self.challenges.pop(challenge.id, None)
+
+    def prompt_on_console(self, challenge: CaptchaChallenge):
+        print(f"Please solve the CAPTCHA for {challenge.domain} in the browser window.")
+        print("Once solved, press Enter in this console to continue...")
+        self._console.add(challenge)
+
+    async def watch_page(self, page: Page, challenge: CaptchaChallenge):
+        """Resolve the challenge once a CAPTCHA that was on the page has disappeared"""
+        seen = False
+        while challenge.status == PENDING:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                present = await page.evaluate(CAPTCHA_PRESENT_SCRIPT)
+            except Exception:
+                # Navigating away from the challenge, or the page was closed
+                continue
+            if present:
+                seen = True
+            elif seen:
+                self.logger.info(f"CAPTCHA on {challenge.domain} is gone, resuming.")
+                challenge.resolve(SOLVED)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self.pending()),
+            'solved': self.solved,
+            'timed_out': self.timed_out,
+        }
@@ -0,0 +1,468 @@
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from .memory_governor import MemoryGovernor
+from .browser_pool import stop_driver
+from ..utils.event_loop import run_on_loop
+from .exceptions import ScraperException
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, AsyncIterator
+import asyncio
+import atexit
+import logging
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+DEFAULT_CDP_PORT = 9222
+
+ContextHook = Callable[[BrowserContext], Awaitable[None]]
+
+
+def get_chrome_executable() -> str:
+    system = platform.system()
+    if system == "Darwin":  # macOS
+        return "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+    elif system == "Linux":
+        return "google-chrome"
+    elif system == "Windows":
+        return r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+    else:
+        raise NotImplementedError(f"Unsupported operating system: {system}")
+
+
+class CDPEndpoint:
+    """One Chrome instance reachable over the DevTools protocol, and the tabs leased from it"""
+
+    def __init__(self, port: int, host: str = 'localhost'):
+        self.port = port
+        self.host = host
+        self.browser: Optional[Browser] = None
+        # Only set when the manager launched this Chrome itself
+        self.process: Optional[subprocess.Popen] = None
+        self.user_data_dir: Optional[str] = None
+        self.contexts: Dict[Tuple, BrowserContext] = {}
+        self.idle_tabs: Dict[Tuple, List[Page]] = {}
+        self.default_context_key: Optional[Tuple] = None
+        # Contexts are shared by concurrent tabs, so a recycled one is closed once its last tab is released
+        self.context_tabs: Dict[int, int] = {}
+        self.retiring: Dict[int, Tuple[BrowserContext, Tuple]] = {}
+        self.active_tabs = 0
+        self.failures = 0
+        self.retry_at = 0.0
+        self.connects = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def is_connected(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    def idle_count(self) -> int:
+        return sum(len(tabs) for tabs in self.idle_tabs.values())
+
+    def reset(self):
+        self.browser = None
+        self.contexts = {}
+        self.idle_tabs = {}
+        self.default_context_key = None
+        self.context_tabs = {}
+        self.retiring = {}
+
+
+class CDPBrowserManager:
+    """Keeps connections to already running Chrome instances for current-browser mode.
+
+    Each debug port is connected once and the connection is reused across
+    requests, together with the contexts and tabs opened on it. Lost
+    connections are re-established on the next lease with exponential backoff,
+    and requests are spread over every configured port so several Chrome
+    instances can serve concurrent scrapes. When nothing answers on a port, a
+    Chrome with its own temporary profile is launched there.
+
+    Like ``BrowserPool``, the connections only survive while every lease comes
+    from one event loop (the app's ``BackgroundLoop``). On a new loop the old
+    connections are closed and Chrome is reconnected on the next lease.
+    """
+
+    _shared: Dict[Tuple, 'CDPBrowserManager'] = {}
+    _launched: List[CDPEndpoint] = []
+
+    def __init__(self, ports: Optional[List[int]] = None, launch_chrome: bool = True,
+                 use_default_context: bool = False, max_tabs_per_browser: int = 4,
+                 connect_timeout: float = 30.0, base_delay: float = 0.25, max_delay: float = 5.0,
+                 governor: Optional[MemoryGovernor] = None, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.endpoints = [CDPEndpoint(port) for port in (ports or [DEFAULT_CDP_PORT])]
+        self.launch_chrome = launch_chrome
+        self.use_default_context = use_default_context
+        self.max_tabs_per_browser = max(1, max_tabs_per_browser)
+        self.connect_timeout = connect_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.governor = governor
+        self.reconnects = 0
+        self.tabs_reused = 0
+        self.tabs_opened = 0
+        self._playwright: Optional[Playwright] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_config(cls, config) -> 'CDPBrowserManager':
+        return cls(
+            ports=config.cdp_ports,
+            launch_chrome=config.cdp_launch_chrome,
+            use_default_context=config.cdp_use_default_context,
+            max_tabs_per_browser=config.cdp_max_tabs,
+            connect_timeout=config.cdp_connect_timeout,
+            governor=MemoryGovernor.from_config(config),
+            debug=config.debug,
+        )
+
+    @classmethod
+    def shared(cls, config) -> 'CDPBrowserManager':
+        """Return the process-wide manager for these ports, creating it on first use"""
+        key = (tuple(config.cdp_ports or [DEFAULT_CDP_PORT]), config.cdp_launch_chrome,
+               config.cdp_use_default_context, config.cdp_max_tabs, config.cdp_connect_timeout)
+        if key not in cls._shared:
+            cls._shared[key] = cls.from_config(config)
+        return cls._shared[key]
+
+    @property
+    def capacity(self) -> int:
+        return len(self.endpoints) * self.max_tabs_per_browser
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            self._discard_generation()
+        self._loop = loop
+        self._playwright = None
+        self._locks = {endpoint.port: asyncio.Lock() for endpoint in self.endpoints}
+        self._slots = asyncio.Semaphore(self.capacity)
+        for endpoint in self.endpoints:
+            endpoint.reset()
+            endpoint.active_tabs = 0
+
+    def _discard_generation(self):
+        """Disconnect the tabs, contexts and connections that belong to the previous event loop.
+
+        Chrome itself keeps running; only what was opened over the old connections goes away.
+        """
+        playwright = self._playwright
+        if playwright is None:
+            return
+        stale = []
+        for endpoint in self.endpoints:
+            if endpoint.browser is None:
+                continue
+            tabs = [tab for tabs in endpoint.idle_tabs.values() for tab in tabs]
+            contexts = [context for key, context in endpoint.contexts.items() if key != endpoint.default_context_key]
+            contexts += [context for context, key in endpoint.retiring.values()]
+            if self.governor:
+                for context in endpoint.contexts.values():
+                    self.governor.forget_context(context)
+                self.governor.forget_browser(endpoint.browser)
+            stale.append((endpoint.browser, tabs, contexts))
+
+        async def shutdown():
+            for browser, tabs, contexts in stale:
+                for tab in tabs:
+                    await self._close_tab(tab)
+                for context in contexts:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        self.logger.debug(f"Error closing browser context: {str(e)}")
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+            try:
+                await playwright.stop()
+            except Exception as e:
+                self.logger.debug(f"Error stopping playwright: {str(e)}")
+
+        if run_on_loop(self._loop, shutdown()):
+            self.logger.info("Event loop changed, disconnecting from Chrome on the previous loop.")
+            return
+        # Chrome disposes of the contexts opened over a connection once that connection drops
+        if stop_driver(playwright):
+            self.logger.info("Event loop changed, dropped the Chrome connections left by the previous loop.")
+        else:
+            self.logger.warning("Event loop changed and the previous Chrome connections could not be closed; "
+                                "run scrapes on one loop (see BackgroundLoop) to keep tabs warm.")
+
+    def _launch(self, endpoint: CDPEndpoint):
+        endpoint.user_data_dir = tempfile.mkdtemp(prefix="chrome_debug_profile_")
+        command = [
+            get_chrome_executable(),
+            f"--user-data-dir={endpoint.user_data_dir}",
+            f"--remote-debugging-port={endpoint.port}",
+            "--no-first-run",
+            "--no-default-browser-check"
+        ]
+        endpoint.process = subprocess.Popen(command)
+        if not self._launched:
+            atexit.register(CDPBrowserManager.terminate_launched)
+        self._launched.append(endpoint)
+        self.logger.info(f"Launched Chrome with remote debugging on port {endpoint.port}.")
+
+    @classmethod
+    def terminate_launched(cls):
+        """Stop the Chrome processes launched by any manager and remove their profiles"""
+        for endpoint in cls._launched:
+            if endpoint.process and endpoint.process.poll() is None:
+                endpoint.process.terminate()
+                endpoint.process.wait()
+            if endpoint.user_data_dir:
+                shutil.rmtree(endpoint.user_data_dir, ignore_errors=True)
+            endpoint.process = None
+            endpoint.user_data_dir = None
+        cls._launched.clear()
+
+    def _on_disconnected(self, endpoint: CDPEndpoint, browser: Browser):
+        if endpoint.browser is not browser:
+            return
+        self.logger.warning(f"Lost connection to Chrome on port {endpoint.port}.")
+        if self.governor:
+            for context in endpoint.contexts.values():
+                self.governor.forget_context(context)
+            self.governor.forget_browser(browser)
+        endpoint.reset()
+
+    async def connect(self, endpoint: CDPEndpoint) -> Browser:
+        """Connect to the endpoint, launching Chrome there if allowed, retrying with exponential backoff"""
+        async with self._locks[endpoint.port]:
+            if endpoint.is_connected():
+                return endpoint.browser
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            deadline = time.monotonic() + self.connect_timeout
+            delay = self.base_delay
+            launched = False
+            while True:
+                try:
+                    browser = await self._playwright.chromium.connect_over_cdp(endpoint.url)
+                    break
+                except Exception as e:
+                    self.logger.debug(f"Connection attempt to port {endpoint.port} failed: {str(e)}")
+                    if (self.launch_chrome and not launched
+                            and (endpoint.process is None or endpoint.process.poll() is not None)):
+                        self._launch(endpoint)
+                        launched = True
+                    if time.monotonic() + delay > deadline:
+                        endpoint.failures += 1
+                        endpoint.retry_at = time.monotonic() + min(self.base_delay * 2 ** endpoint.failures, 60.0)
+                        raise ScraperException(
+                            f"Failed to connect to Chrome on port {endpoint.port} after "
+                            f"{self.connect_timeout:.0f} seconds") from e
+                    await asyncio.sleep(random.uniform(delay / 2, delay))
+                    delay = min(delay * 2, self.max_delay)
+
+            if endpoint.connects:
+                self.reconnects += 1
+            endpoint.connects += 1
+            endpoint.failures = 0
+            endpoint.browser = browser
+            browser.on('disconnected', lambda b: self._on_disconnected(endpoint, b))
+            self.logger.info(f"Connected to Chrome on port {endpoint.port}.")
+            return browser
+
+    async def warm(self):
+        """Connect to every endpoint ahead of the first lease"""
+        self._bind_loop()
+        for endpoint in self.endpoints:
+            try:
+                await self.connect(endpoint)
+            except ScraperException as e:
+                self.logger.warning(str(e))
+
+    async def _checkout(self) -> CDPEndpoint:
+        """Pick the least busy reachable endpoint, connecting to it when needed"""
+        now = time.monotonic()
+        # Connected endpoints first, then ones whose backoff has expired, busiest last
+        candidates = sorted(self.endpoints, key=lambda e: (not e.is_connected(), e.retry_at > now, e.active_tabs))
+        error = None
+        for endpoint in candidates:
+            endpoint.active_tabs += 1
+            try:
+                await self.connect(endpoint)
+                return endpoint
+            except ScraperException as e:
+                endpoint.active_tabs -= 1
+                error = e
+                self.logger.warning(str(e))
+        raise error
+
+    async def _get_context(self, endpoint: CDPEndpoint, key: Tuple, context_options: Dict[str, Any],
+                           on_create: Optional[ContextHook]) -> BrowserContext:
+        context = endpoint.contexts.get(key)
+        if context is not None:
+            return context
+
+        browser = endpoint.browser
+        # The browser's own context carries the user's logins but cannot take a proxy or other options
+        if (self.use_default_context and endpoint.default_context_key is None
+                and not context_options.get('proxy') and browser.contexts):
+            context = browser.contexts[0]
+            endpoint.default_context_key = key
+        else:
+            context = await browser.new_context(**context_options)
+        if on_create:
+            await on_create(context)
+        endpoint.contexts[key] = context
+        return context
+
+    def is_default_context(self, context: BrowserContext) -> bool:
+        """Whether ``context`` is a browser's own context, i.e. the user's profile"""
+        return any(endpoint.default_context_key is not None
+                   and endpoint.contexts.get(endpoint.default_context_key) is context
+                   for endpoint in self.endpoints)
+
+    @asynccontextmanager
+    async def lease(self, context_options: Optional[Dict[str, Any]] = None,
+                    on_create: Optional[ContextHook] = None,
+                    setup_key: Any = None) -> AsyncIterator[Page]:
+        """Borrow a tab, reusing an idle one in a matching context when there is one.
+
+        ``on_create`` runs once per context and Chrome instance. Contexts stay open
+        between leases, so it is not repeated on later requests.
+        """
+        self._bind_loop()
+        context_options = context_options or {}
+        key = tuple(sorted((k, repr(v)) for k, v in context_options.items())) + (('setup', repr(setup_key)),)
+
+        async with self._slots:
+            endpoint = await self._checkout()
+            reusable = False
+            context = page = None
+            try:
+                context = await self._get_context(endpoint, key, context_options, on_create)
+                endpoint.context_tabs[id(context)] = endpoint.context_tabs.get(id(context), 0) + 1
+                idle = endpoint.idle_tabs.get(key)
+                while idle and page is None:
+                    candidate = idle.pop()
+                    if not candidate.is_closed():
+                        page = candidate
+                        self.tabs_reused += 1
+                if page is None:
+                    page = await context.new_page()
+                    self.tabs_opened += 1
+                reusable = True
+                try:
+                    yield page
+                except Exception:
+                    reusable = False
+                    raise
+            finally:
+                endpoint.active_tabs -= 1
+                if context is not None:
+                    await self._release(endpoint, key, context, page, reusable)
+
+    async def _release(self, endpoint: CDPEndpoint, key: Tuple, context: BrowserContext,
+                       page: Optional[Page], reusable: bool):
+        endpoint.context_tabs[id(context)] = endpoint.context_tabs.get(id(context), 1) - 1
+        if self.governor and endpoint.contexts.get(key) is context:
+            reason = self.governor.context_recycle_reason(context)
+            if reason:
+                # Later leases get a fresh context while the tabs still using this one finish
+                self.logger.info(f"Recycling browser context: {reason}.")
+                endpoint.contexts.pop(key)
+                endpoint.retiring[id(context)] = (context, key)
+                for tab in endpoint.idle_tabs.pop(key, []):
+                    await self._close_tab(tab)
+
+        if page is not None:
+            if reusable and id(context) not in endpoint.retiring and endpoint.is_connected() \
+                    and endpoint.idle_count() < self.max_tabs_per_browser:
+                try:
+                    # Unloading the page stops its timers and scripts while the tab waits
+                    await page.goto('about:blank')
+                    endpoint.idle_tabs.setdefault(key, []).append(page)
+                    page = None
+                except Exception as e:
+                    self.logger.debug(f"Discarding tab that failed to reset: {str(e)}")
+            if page is not None:
+                await self._close_tab(page)
+
+        if id(context) in endpoint.retiring and endpoint.context_tabs[id(context)] <= 0:
+            del endpoint.retiring[id(context)]
+            await self._close_context(endpoint, context, key, recycled=True)
+
+    async def _close_tab(self, page: Page):
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def _close_context(self, endpoint: CDPEndpoint, context: BrowserContext, key: Tuple,
+                             recycled: bool = False):
+        endpoint.context_tabs.pop(id(context), None)
+        if self.governor:
+            self.governor.forget_context(context, recycled)
+        if key == endpoint.default_context_key:
+            # Never close the user's own context; its tabs opened here are already closed
+            endpoint.default_context_key = None
+            return
+        try:
+            await context.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing browser context: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'reconnects': self.reconnects,
+            'tabs_opened': self.tabs_opened,
+            'tabs_reused': self.tabs_reused,
+            'endpoints': [
+                {
+                    'port': endpoint.port,
+                    'connected': endpoint.is_connected(),
+                    'launched': endpoint.process is not None,
+                    'active_tabs': endpoint.active_tabs,
+                    'idle_tabs': endpoint.idle_count(),
+                    'contexts': len(endpoint.contexts),
+                    'failures': endpoint.failures,
+                }
+                for endpoint in self.endpoints
+            ],
+        }
+
+    async def close(self, terminate: bool = False):
+        """Close the contexts and tabs opened here and disconnect; Chrome keeps running unless ``terminate``"""
+        if self._loop is asyncio.get_running_loop():
+            for endpoint in self.endpoints:
+                for key, tabs in list(endpoint.idle_tabs.items()):
+                    for tab in tabs:
+                        await self._close_tab(tab)
+                for key, context in list(endpoint.contexts.items()):
+                    await self._close_context(endpoint, context, key)
+                browser = endpoint.browser
+                endpoint.reset()
+                if browser is not None:
+                    try:
+                        # For connect_over_cdp this only drops the connection
+                        await browser.close()
+                    except Exception:
+                        pass
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+        self._loop = None
+        if terminate:
+            self.terminate_launched()
+        self.logger.info("CDP connections closed.")
+
+    @classmethod
+    async def close_shared(cls, terminate: bool = False):
+        for manager in cls._shared.values():
+            await manager.close(terminate)
@@ -0,0 +1,72 @@
+import csv
+import json
+import re
+
+HTML, JSON, CSV, XML, TEXT, BINARY = 'html', 'json', 'csv', 'xml', 'text', 'binary'
+
+# Document kinds that are parsed directly instead of being rendered and flattened
+DATA_KINDS = (JSON, CSV, XML, TEXT)
+
+# URLs that usually serve data even on sites whose pages need a browser
+DATA_URL_PATTERN = re.compile(r'(\.(json|csv|tsv|xml|rss|atom|txt)$|/api/|/feeds?(/|$)|\.json\?)', re.I)
+
+BINARY_TYPE_PREFIXES = ('image/', 'audio/', 'video/', 'font/', 'application/pdf', 'application/zip',
+                        'application/gzip', 'application/x-')
+
+HTML_PREFIXES = ('<!doctype html', '<html', '<head', '<body')
+XML_PREFIXES = ('<?xml', '<rss', '<feed', '<rdf:rdf', '<urlset', '<sitemapindex')
+
+
+def kind_from_header(content_type: str) -> str:
+    """Map a Content-Type header to a document kind; '' when it says nothing useful"""
+    content_type = content_type.split(';')[0].strip().lower()
+    if 'html' in content_type:
+        return HTML
+    if content_type.endswith('json') or content_type.endswith('+json'):
+        return JSON
+    if content_type in ('text/csv', 'application/csv', 'text/tab-separated-values'):
+        return CSV
+    if content_type.endswith('xml') or content_type.endswith('+xml'):
+        return XML
+    if content_type.startswith(BINARY_TYPE_PREFIXES):
+        return BINARY
+    return ''
+
+
+def looks_like_csv(body: str) -> bool:
+    lines = [line for line in body.splitlines()[:20] if line.strip()]
+    if len(lines) < 2:
+        return False
+    try:
+        dialect = csv.Sniffer().sniff('\n'.join(lines), delimiters=',;\t|')
+    except csv.Error:
+        return False
+    widths = {len(row) for row in csv.reader(lines, dialect)}
+    return len(widths) == 1 and widths.pop() > 1
+
+
+def sniff_kind(content_type: str, body: str) -> str:
+    """Decide how a response should be processed from its header and, when that is vague, its body"""
+    kind = kind_from_header(content_type)
+    if kind and kind != XML:
+        return kind
+
+    head = body[:512].lstrip('\ufeff \t\r\n').lower()
+    if '\x00' in head:
+        return BINARY
+    if head.startswith(HTML_PREFIXES):
+        return HTML
+    # XHTML is served as XML, so only trust an XML header once the body is not HTML
+    if kind == XML or head.startswith(XML_PREFIXES):
+        return XML
+    if head[:1] in ('{', '['):
+        try:
+            json.loads(body)
+            return JSON
+        except ValueError:
+            pass
+    if head.startswith('<'):
+        return HTML
+    if looks_like_csv(body):
+        return CSV
+    return TEXT
@@ -0,0 +1,159 @@
+from .html_scraper import HTMLScraper
+from ..utils.bloom_filter import BloomFilter
+from ..utils.url_utils import normalize_url
+from dataclasses import dataclass, field
+from typing import Optional, List, Callable, Awaitable, Iterable, AsyncIterator
+from urllib.parse import urljoin, urlparse
+import asyncio
+import itertools
+import logging
+import re
+
+SKIPPED_EXTENSIONS = re.compile(
+    r'\.(jpe?g|png|gif|webp|svg|ico|bmp|pdf|zip|gz|tar|rar|7z|exe|dmg|mp[34]|avi|mov|webm|woff2?|ttf|css|js)$', re.I)
+
+PageFetcher = Callable[[str], Awaitable[str]]
+
+
+@dataclass(order=True)
+class FrontierItem:
+    priority: float
+    sequence: int
+    url: str = field(compare=False)
+    depth: int = field(compare=False)
+
+
+@dataclass
+class CrawlResult:
+    url: str
+    depth: int
+    content: str
+    sequence: int
+    links_found: int = 0
+
+
+class Crawler:
+    """Link-following crawler with a deduplicating priority frontier.
+
+    URLs are deduplicated by their normalized form, remembered in a Bloom filter
+    so memory stays bounded on large crawls, but fetched exactly as they were
+    linked. Shallower pages and URLs that match ``priority_patterns`` are fetched
+    first by ``workers`` parallel workers. ``iter_pages`` hands pages over as they
+    arrive, so a long crawl never holds more than a few of them at once.
+    """
+
+    def __init__(self, fetch_page: PageFetcher, html_scraper: Optional[HTMLScraper] = None,
+                 max_depth: int = 1, max_pages: int = 50, workers: int = 4,
+                 same_domain: bool = True, allowed_domains: Optional[Iterable[str]] = None,
+                 include_patterns: Optional[Iterable[str]] = None,
+                 exclude_patterns: Optional[Iterable[str]] = None,
+                 priority_patterns: Optional[Iterable[str]] = None,
+                 expected_urls: int = 100_000, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.fetch_page = fetch_page
+        self.html_scraper = html_scraper or HTMLScraper()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = max(1, workers)
+        self.same_domain = same_domain
+        self.allowed_domains = [d.lower() for d in (allowed_domains or [])]
+        self.include_patterns = [re.compile(p) for p in (include_patterns or [])]
+        self.exclude_patterns = [re.compile(p) for p in (exclude_patterns or [])]
+        self.priority_patterns = [re.compile(p) for p in (priority_patterns or [])]
+        self.expected_urls = expected_urls
+
+    def is_allowed(self, url: str, root_host: str) -> bool:
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or SKIPPED_EXTENSIONS.search(parsed.path):
+            return False
+        host = (parsed.hostname or '').lower()
+        if self.allowed_domains:
+            if not any(host == d or host.endswith('.' + d) for d in self.allowed_domains):
+                return False
+        elif self.same_domain and host != root_host:
+            return False
+        if self.include_patterns and not any(p.search(url) for p in self.include_patterns):
+            return False
+        return not any(p.search(url) for p in self.exclude_patterns)
+
+    def get_priority(self, url: str, depth: int) -> float:
+        # Breadth-first by default; priority patterns jump ahead within their depth
+        boost = 0.5 if any(p.search(url) for p in self.priority_patterns) else 0.0
+        return depth - boost
+
+    async def extract_links(self, base_url: str, content: str) -> List[str]:
+        links = (await self.html_scraper.extract(content))['links']
+        return [urljoin(base_url, link) for link in links]
+
+    async def iter_pages(self, start_url: str,
+                         on_page: Optional[Callable[[CrawlResult], None]] = None) -> AsyncIterator[CrawlResult]:
+        """Crawl from ``start_url``, yielding pages in the order they are fetched.
+
+        Workers wait while ``workers`` fetched pages are still unconsumed, so pages
+        are not piled up in memory faster than the caller processes them.
+        """
+        root_host = (urlparse(start_url).hostname or '').lower()
+        seen = BloomFilter(self.expected_urls)
+        frontier: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=self.workers)
+        sequence = itertools.count()
+        scheduled = 0
+        crawled = 0
+
+        def enqueue(url: str, depth: int):
+            nonlocal scheduled
+            # The normalized form only decides whether the page was seen; servers get the URL as linked
+            if scheduled >= self.max_pages or not seen.add(normalize_url(url)):
+                return
+            scheduled += 1
+            frontier.put_nowait(FrontierItem(self.get_priority(url, depth), next(sequence), url, depth))
+
+        async def worker():
+            nonlocal crawled
+            while True:
+                item = await frontier.get()
+                try:
+                    content = await self.fetch_page(item.url)
+                    links = []
+                    if item.depth < self.max_depth:
+                        links = [link for link in await self.extract_links(item.url, content)
+                                 if self.is_allowed(link, root_host)]
+                        for link in links:
+                            enqueue(link, item.depth + 1)
+
+                    result = CrawlResult(item.url, item.depth, content, item.sequence, len(links))
+                    crawled += 1
+                    self.logger.info(f"Crawled {item.url} (depth {item.depth}, {crawled}/{scheduled})")
+                    if on_page:
+                        on_page(result)
+                    await fetched.put(result)
+                except Exception as e:
+                    # Fetch failures arrive here as FetchError; the page is simply left out
+                    self.logger.warning(f"Skipping {item.url}: {str(e)}")
+                finally:
+                    frontier.task_done()
+
+        async def finish():
+            await frontier.join()
+            await fetched.put(None)
+
+        enqueue(start_url, 0)
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(finish()))
+        try:
+            while True:
+                result = await fetched.get()
+                if result is None:
+                    break
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def crawl(self, start_url: str,
+                    on_page: Optional[Callable[[CrawlResult], None]] = None) -> List[CrawlResult]:
+        """Crawl from ``start_url`` and return all fetched pages in discovery order"""
+        results = [result async for result in self.iter_pages(start_url, on_page)]
+        return sorted(results, key=lambda result: result.sequence)
@@ -0,0 +1,18 @@
+import csv
+import io
+from .base_scraper import BaseScraper
+from typing import Dict, Any
+
+class CSVScraper(BaseScraper):
+    async def fetch_content(self, url: str, proxy: str = None) -> str:
+        raise NotImplementedError("CSV content is fetched by HTTPScraper")
+
+    async def extract(self, content: str) -> Dict[str, Any]:
+        sample = content[:8192]
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(io.StringIO(content.lstrip('\ufeff')), dialect=dialect)
+        records = [{key: value for key, value in row.items() if key is not None} for row in reader]
+        return {'columns': reader.fieldnames or [], 'records': records}
@@ -0,0 +1,17 @@
+from typing import Optional
+
+class ScraperException(Exception):
+    """Base exception for scraping errors"""
+    pass
+
+class FetchError(ScraperException):
+    """Raised when a page could not be fetched"""
+    def __init__(self, url: str, message: str, status: Optional[int] = None, retriable: bool = False):
+        super().__init__(f"Failed to load {url}: {message}")
+        self.url = url
+        self.status = status
+        self.retriable = retriable
+
+class CircuitOpenError(ScraperException):
+    """Raised without fetching when a host has failed repeatedly and its circuit is open"""
+    pass
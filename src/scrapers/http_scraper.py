@@ -0,0 +1,232 @@
+import aiohttp
+from .base_scraper import BaseScraper
+from .playwright_scraper import DEFAULT_USER_AGENT
+from ..utils.content_cache import ContentCache
+from ..utils.fetch_scheduler import FetchScheduler
+from .exceptions import FetchError
+from .retry_policy import RetryPolicy, CircuitBreaker, RETRIABLE_STATUS
+from .content_types import sniff_kind, HTML, DATA_KINDS, DATA_URL_PATTERN
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Any, Optional, List, Tuple
+from urllib.parse import urlparse
+import asyncio
+import logging
+import re
+import time
+
+# Markup that only turns into content once JavaScript runs
+SPA_ROOT_PATTERN = re.compile(
+    r'<(div|main|app-root)[^>]*\bid=["\'](root|app|__next|__nuxt|svelte|ember-app)["\'][^>]*>\s*</\1>', re.I)
+SPA_MARKERS = ('<app-root></app-root>', 'ng-version=', 'data-server-rendered="false"')
+NOSCRIPT_WALL_PATTERN = re.compile(
+    r'<noscript[^>]*>[^<]*(enable javascript|javascript is (disabled|required)|requires javascript|turn on javascript)',
+    re.I)
+CHALLENGE_MARKERS = ('cf-browser-verification', 'challenge-platform', 'Just a moment...', '_incapsula_resource',
+                     'px-captcha', 'captcha-delivery.com')
+SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style|noscript|template)[^>]*>.*?</\1>', re.I | re.S)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+@dataclass
+class HTTPResponse:
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    text: str = ''
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('Content-Type', self.headers.get('content-type', '')).split(';')[0].strip().lower()
+
+    @cached_property
+    def kind(self) -> str:
+        """html, json, csv, xml, text or binary, from the header and a look at the body"""
+        return sniff_kind(self.content_type, self.text)
+
+
+class HTTPScraper(BaseScraper):
+    """Plain HTTP fetch tier that serves static pages without starting a browser.
+
+    Responses that look like they need JavaScript to render fall back to
+    PlaywrightScraper, and that decision is remembered per domain.
+    """
+
+    # domain -> (needs_browser, decided_at), shared by every instance in the process
+    domain_decisions: Dict[str, Tuple[bool, float]] = {}
+
+    def __init__(self, timeout: float = 10.0, min_text_length: int = 200,
+                 decision_ttl: float = 3600.0, max_connections: int = 20,
+                 content_cache: Optional[ContentCache] = None, max_body_bytes: int = 10 * 1024 * 1024,
+                 retry_policy: Optional[RetryPolicy] = None, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.timeout = timeout
+        self.min_text_length = min_text_length
+        self.decision_ttl = decision_ttl
+        self.max_connections = max_connections
+        self.content_cache = content_cache
+        self.max_body_bytes = max_body_bytes
+        self.scheduler = FetchScheduler.shared()
+        # The session enforces the timeout itself, so attempts get no extra deadline
+        self.retry_policy = retry_policy or RetryPolicy(debug=debug)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_config(cls, config) -> 'HTTPScraper':
+        content_cache = ContentCache.shared(config.cache_dir, config.cache_ttl, config.cache_max_bytes,
+                                            config.debug) if config.use_cache else None
+        retry_policy = RetryPolicy(max_retries=config.max_retries, base_delay=config.retry_base_delay,
+                                   max_delay=config.retry_max_delay, breaker=CircuitBreaker.shared(config),
+                                   debug=config.debug)
+        return cls(timeout=config.http_timeout, content_cache=content_cache,
+                   max_body_bytes=config.http_max_bytes, retry_policy=retry_policy, debug=config.debug)
+
+    def get_headers(self) -> Dict[str, str]:
+        return {
+            'User-Agent': DEFAULT_USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Referer': 'https://www.google.com/',
+            'Upgrade-Insecure-Requests': '1',
+        }
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the keep-alive session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                headers=self.get_headers(),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed and self._session_loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+
+    async def revalidate(self, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str]]:
+        async with self.scheduler.slot(url):
+            async with self.get_session().get(url, headers=headers, allow_redirects=True) as response:
+                self.scheduler.report(url, response.status, response.headers)
+                return response.status, dict(response.headers)
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        if self.content_cache:
+            cached = await self.content_cache.lookup(url, {'renderer': 'http'}, self.revalidate)
+            if cached is not None:
+                return HTTPResponse(url=cached.url, status=200, headers=cached.headers, text=cached.text)
+
+        # Transient failures are retried here and count toward the host's circuit, like browser navigations
+        result = await self.retry_policy.run(url, lambda: self.fetch_once(url, headers),
+                                             slot=lambda: self.scheduler.slot(url))
+        if self.content_cache and result.status == 200:
+            await self.content_cache.store(url, result.text, result.headers, {'renderer': 'http'})
+        return result
+
+    async def fetch_once(self, url: str, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        """One GET attempt; the caller holds the scheduler slot for ``url``"""
+        try:
+            async with self.get_session().get(url, headers=headers, allow_redirects=True) as response:
+                self.scheduler.report(url, response.status, response.headers)
+                if response.status in RETRIABLE_STATUS:
+                    raise FetchError(url, f"HTTP {response.status}", status=response.status, retriable=True)
+                text = await self.read_text(response)
+                return HTTPResponse(url=str(response.url), status=response.status,
+                                    headers=dict(response.headers), text=text)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise FetchError(url, f"connection failed: {str(e) or type(e).__name__}", retriable=True) from e
+
+    async def read_text(self, response: aiohttp.ClientResponse) -> str:
+        """Decode the body, refusing to buffer more than max_body_bytes of it"""
+        length = response.content_length
+        if length is not None and length > self.max_body_bytes:
+            raise FetchError(str(response.url), f"response is {length} bytes, over the {self.max_body_bytes} byte limit",
+                             status=response.status)
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+            if len(body) > self.max_body_bytes:
+                raise FetchError(str(response.url), f"response is over the {self.max_body_bytes} byte limit",
+                                 status=response.status)
+        try:
+            return body.decode(response.charset or 'utf-8', errors='replace')
+        except LookupError:
+            return body.decode('utf-8', errors='replace')
+
+    async def fetch_content(self, url: str, proxy: str = None) -> str:
+        response = await self.fetch(url)
+        return response.text
+
+    async def extract(self, content: str) -> Dict[str, Any]:
+        return {"raw_content": content}
+
+    def visible_text_length(self, html: str) -> int:
+        body = SCRIPT_STYLE_PATTERN.sub(' ', html)
+        return len(re.sub(r'\s+', ' ', TAG_PATTERN.sub(' ', body)).strip())
+
+    def needs_javascript(self, response: HTTPResponse) -> bool:
+        """Heuristic: does this response need a real browser to produce its content?"""
+        if response.status >= 400:
+            return True
+        if response.kind in DATA_KINDS:
+            return False
+        if response.kind != HTML:
+            return True
+        html = response.text
+        if any(marker in html for marker in CHALLENGE_MARKERS):
+            return True
+        if SPA_ROOT_PATTERN.search(html) or any(marker in html for marker in SPA_MARKERS):
+            return True
+        if NOSCRIPT_WALL_PATTERN.search(html):
+            return True
+        return self.visible_text_length(html) < self.min_text_length
+
+    def get_decision(self, url: str) -> Optional[bool]:
+        domain = (urlparse(url).hostname or '').lower()
+        decision = self.domain_decisions.get(domain)
+        if decision is None or time.time() - decision[1] > self.decision_ttl:
+            return None
+        return decision[0]
+
+    def record_decision(self, url: str, needs_browser: bool):
+        domain = (urlparse(url).hostname or '').lower()
+        self.domain_decisions[domain] = (needs_browser, time.time())
+
+    async def fetch_responses(self, urls: List[str]) -> Optional[List[HTTPResponse]]:
+        """Fetch all URLs over plain HTTP, or return None when a browser is needed"""
+        if not urls:
+            return None
+        # Data endpoints are worth a try even on domains whose pages need a browser
+        if self.get_decision(urls[0]) is True and not DATA_URL_PATTERN.search(urls[0]):
+            return None
+
+        try:
+            # Each fetch waits for its FetchScheduler slot, so the host limits bound how many run at once
+            responses = await asyncio.gather(*(self.fetch(url) for url in urls))
+        except (aiohttp.ClientError, asyncio.TimeoutError, FetchError) as e:
+            # FetchError covers bodies over max_body_bytes, which the browser may still render usefully
+            self.logger.info(f"HTTP fast path failed, falling back to browser: {str(e)}")
+            return None
+
+        needs_browser = any(self.needs_javascript(response) for response in responses)
+        html_responses = [response for response in responses if response.kind == HTML]
+        if html_responses:
+            # Only pages say anything about whether the rest of the domain renders without JavaScript
+            self.record_decision(urls[0], any(self.needs_javascript(response) for response in html_responses))
+        if needs_browser:
+            self.logger.info(f"{urlparse(urls[0]).hostname} needs JavaScript rendering, using browser")
+            return None
+
+        self.logger.info(f"Fetched {len(urls)} page(s) without a browser")
+        return responses
+
+    async def fetch_pages(self, urls: List[str]) -> Optional[List[str]]:
+        """Like fetch_responses, but only the page bodies"""
+        responses = await self.fetch_responses(urls)
+        return [response.text for response in responses] if responses is not None else None
@@ -1,7 +1,6 @@
-
 import json
 from .base_scraper import BaseScraper
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 class JSONScraper(BaseScraper):
     async def fetch_content(self, url: str, proxy: str = None) -> str:
@@ -9,6 +8,25 @@ class JSONScraper(BaseScraper):
 
     async def extract(self, content: str) -> Dict[str, Any]:
         try:
-            return json.loads(content)
+            return self.parse(content)
         except json.JSONDecodeError:
             return {"error": "Invalid JSON content"}
+
+    def parse(self, content: str) -> Any:
+        """Like extract, but raises json.JSONDecodeError for malformed JSON"""
+        return json.loads(content)
+
+    def find_records(self, data: Any) -> List[Dict[str, Any]]:
+        """Return the largest list of objects anywhere in a JSON payload, e.g. the items of a listing API"""
+        best: List[Dict[str, Any]] = []
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                records = [item for item in node if isinstance(item, dict)]
+                if len(records) > len(best):
+                    best = records
+                stack.extend(node)
+        return best
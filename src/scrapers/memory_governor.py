@@ -0,0 +1,184 @@
+from playwright.async_api import Browser, BrowserContext, Page
+from typing import Dict, Any, Optional, List
+import logging
+import time
+
+try:
+    import psutil
+except ImportError:  # process memory is optional; JS heap sampling works without it
+    psutil = None
+
+MB = 1024 * 1024
+
+
+class ContextUsage:
+    def __init__(self):
+        self.pages_served = 0
+        self.js_heap_bytes = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserUsage:
+    def __init__(self):
+        self.pages_served = 0
+        self.rss_bytes = 0
+        self.launched_at = time.monotonic()
+
+
+class MemoryGovernor:
+    """Decides when pooled contexts and browsers have grown enough to be replaced.
+
+    Pages served are counted per context and per browser. Every
+    ``sample_interval`` pages the context's JS heap is read over CDP and, when
+    psutil is installed, the browser's process tree RSS too. A context past its
+    limits is closed instead of being reused; a browser past its limits stops
+    taking new work and is closed once its in-flight pages have finished.
+    """
+
+    _warned_no_psutil = False
+
+    def __init__(self, max_pages_per_context: int = 100, max_pages_per_browser: int = 1000,
+                 max_context_heap_mb: float = 512.0, max_browser_memory_mb: float = 2048.0,
+                 sample_interval: int = 10, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.max_pages_per_context = max_pages_per_context
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_context_heap_mb = max_context_heap_mb
+        self.max_browser_memory_mb = max_browser_memory_mb
+        self.sample_interval = max(1, sample_interval)
+        self.contexts: Dict[int, ContextUsage] = {}
+        self.browsers: Dict[int, BrowserUsage] = {}
+        self.pages_served = 0
+        self.contexts_recycled = 0
+        self.browsers_recycled = 0
+        if max_browser_memory_mb and psutil is None and not MemoryGovernor._warned_no_psutil:
+            MemoryGovernor._warned_no_psutil = True
+            self.logger.warning("max_browser_memory_mb is set but psutil is not installed, so browsers "
+                                "are only recycled by page count (pip install psutil)")
+
+    @classmethod
+    def from_config(cls, config) -> 'MemoryGovernor':
+        return cls(
+            max_pages_per_context=config.max_pages_per_context,
+            max_pages_per_browser=config.max_pages_per_browser,
+            max_context_heap_mb=config.max_context_heap_mb,
+            max_browser_memory_mb=config.max_browser_memory_mb,
+            sample_interval=config.memory_sample_interval,
+            debug=config.debug,
+        )
+
+    def _context_usage(self, context: BrowserContext) -> ContextUsage:
+        if id(context) not in self.contexts:
+            self.contexts[id(context)] = ContextUsage()
+        return self.contexts[id(context)]
+
+    def _browser_usage(self, browser: Browser) -> BrowserUsage:
+        if id(browser) not in self.browsers:
+            self.browsers[id(browser)] = BrowserUsage()
+        return self.browsers[id(browser)]
+
+    async def record_page(self, page: Page):
+        """Count a page served and sample memory every ``sample_interval`` pages"""
+        context = page.context
+        context_usage = self._context_usage(context)
+        context_usage.pages_served += 1
+        self.pages_served += 1
+
+        browser = context.browser
+        browser_usage = self._browser_usage(browser) if browser else None
+        if browser_usage:
+            browser_usage.pages_served += 1
+
+        if context_usage.pages_served % self.sample_interval == 0:
+            heap = await self.sample_js_heap(page)
+            if heap is not None:
+                context_usage.js_heap_bytes = heap
+        if browser_usage and browser_usage.pages_served % self.sample_interval == 0:
+            rss = await self.sample_browser_rss(browser)
+            if rss is not None:
+                browser_usage.rss_bytes = rss
+
+    async def sample_js_heap(self, page: Page) -> Optional[int]:
+        try:
+            session = await page.context.new_cdp_session(page)
+            try:
+                await session.send('Performance.enable')
+                metrics = await session.send('Performance.getMetrics')
+            finally:
+                await session.detach()
+        except Exception as e:
+            self.logger.debug(f"Could not read JS heap size: {str(e)}")
+            return None
+        values = {metric['name']: metric['value'] for metric in metrics.get('metrics', [])}
+        return int(values.get('JSHeapTotalSize', 0))
+
+    async def sample_browser_rss(self, browser: Browser) -> Optional[int]:
+        """Resident memory of the browser and all of its renderer/GPU/utility processes"""
+        if psutil is None:
+            return None
+        try:
+            session = await browser.new_browser_cdp_session()
+            try:
+                info = await session.send('SystemInfo.getProcessInfo')
+            finally:
+                await session.detach()
+        except Exception as e:
+            self.logger.debug(f"Could not list browser processes: {str(e)}")
+            return None
+
+        total = 0
+        for process in info.get('processInfo', []):
+            try:
+                total += psutil.Process(process['id']).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError):
+                continue
+        return total
+
+    def context_recycle_reason(self, context: BrowserContext) -> Optional[str]:
+        usage = self.contexts.get(id(context))
+        if usage is None:
+            return None
+        if self.max_pages_per_context and usage.pages_served >= self.max_pages_per_context:
+            return f"served {usage.pages_served} pages"
+        if self.max_context_heap_mb and usage.js_heap_bytes >= self.max_context_heap_mb * MB:
+            return f"JS heap at {usage.js_heap_bytes / MB:.0f} MB"
+        return None
+
+    def browser_recycle_reason(self, browser: Browser) -> Optional[str]:
+        usage = self.browsers.get(id(browser))
+        if usage is None:
+            return None
+        if self.max_pages_per_browser and usage.pages_served >= self.max_pages_per_browser:
+            return f"served {usage.pages_served} pages"
+        if self.max_browser_memory_mb and usage.rss_bytes >= self.max_browser_memory_mb * MB:
+            return f"using {usage.rss_bytes / MB:.0f} MB"
+        return None
+
+    def forget_context(self, context: BrowserContext, recycled: bool = False):
+        self.contexts.pop(id(context), None)
+        if recycled:
+            self.contexts_recycled += 1
+
+    def forget_browser(self, browser: Browser, recycled: bool = False):
+        self.browsers.pop(id(browser), None)
+        if recycled:
+            self.browsers_recycled += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        browsers: List[Dict[str, Any]] = [
+            {
+                'pages_served': usage.pages_served,
+                'rss_mb': round(usage.rss_bytes / MB, 1) if usage.rss_bytes else None,
+                'uptime_s': round(time.monotonic() - usage.launched_at),
+            }
+            for usage in self.browsers.values()
+        ]
+        return {
+            'pages_served': self.pages_served,
+            'contexts_open': len(self.contexts),
+            'contexts_recycled': self.contexts_recycled,
+            'browsers_recycled': self.browsers_recycled,
+            'max_context_heap_mb': round(max((u.js_heap_bytes for u in self.contexts.values()), default=0) / MB, 1),
+            'browsers': browsers,
+        }
@@ -0,0 +1,201 @@
+from playwright.async_api import Page, Request
+from collections import deque
+from typing import Dict, Any, Optional, List, Deque
+from urllib.parse import urlparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+# Resolves true once the DOM has gone quietMs without a mutation, false when timeoutMs passes first
+DOM_QUIET_SCRIPT = '''
+    ([quietMs, timeoutMs]) => new Promise((resolve) => {
+        let quietTimer = null;
+        let capTimer = null;
+        const observer = new MutationObserver(() => {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => finish(true), quietMs);
+        });
+        const finish = (stable) => {
+            observer.disconnect();
+            clearTimeout(quietTimer);
+            clearTimeout(capTimer);
+            resolve(stable);
+        };
+        observer.observe(document.documentElement || document, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+        quietTimer = setTimeout(() => finish(true), quietMs);
+        capTimer = setTimeout(() => finish(false), timeoutMs);
+    })
+'''
+
+
+class NetworkTracker:
+    """Counts in-flight requests on a page so network idleness can use a threshold"""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.in_flight = 0
+        self.last_change = time.monotonic()
+        page.on('request', self._on_request)
+        page.on('requestfinished', self._on_done)
+        page.on('requestfailed', self._on_done)
+
+    def _on_request(self, request: Request):
+        self.in_flight += 1
+        self.last_change = time.monotonic()
+
+    def _on_done(self, request: Request):
+        self.in_flight = max(0, self.in_flight - 1)
+        self.last_change = time.monotonic()
+
+    def detach(self):
+        self.page.remove_listener('request', self._on_request)
+        self.page.remove_listener('requestfinished', self._on_done)
+        self.page.remove_listener('requestfailed', self._on_done)
+
+
+class PageReadinessDetector:
+    """Waits only until a page is settled instead of sleeping a fixed delay.
+
+    A page counts as ready once the DOM has been free of mutations for the quiet
+    window, no more than ``network_idle_threshold`` requests are in flight and any
+    configured selectors are present. ``max_wait`` stays as the upper bound, and the
+    settle time seen for each domain is remembered so later visits can stop sooner.
+    """
+
+    SAMPLES_PER_DOMAIN = 10
+    SAFETY_MARGIN = 1.5
+
+    def __init__(self, max_wait: float = 2.0, quiet_window: float = 0.5,
+                 network_idle_threshold: int = 0, wait_for_selectors: Optional[List[str]] = None,
+                 profile_path: Optional[str] = None, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.max_wait = max_wait
+        self.quiet_window = quiet_window
+        self.network_idle_threshold = network_idle_threshold
+        self.wait_for_selectors = wait_for_selectors or []
+        self.profile_path = profile_path
+        self.settle_times: Dict[str, Deque[float]] = {}
+        # Saves run in worker threads; the version keeps an older snapshot from overwriting a newer one
+        self._profile_version = 0
+        self._saved_version = 0
+        self._save_lock = threading.Lock()
+        self._load_profile()
+
+    @classmethod
+    def from_config(cls, config) -> 'PageReadinessDetector':
+        return cls(
+            max_wait=config.delay_after_load,
+            quiet_window=config.dom_quiet_window,
+            network_idle_threshold=config.network_idle_threshold,
+            wait_for_selectors=config.wait_for_selectors,
+            profile_path=config.readiness_profile_path,
+            debug=config.debug,
+        )
+
+    @staticmethod
+    def get_domain(url: str) -> str:
+        return (urlparse(url).hostname or '').lower()
+
+    def _load_profile(self):
+        if not self.profile_path or not os.path.exists(self.profile_path):
+            return
+        try:
+            with open(self.profile_path, 'r') as f:
+                data = json.load(f)
+            for domain, samples in data.items():
+                self.settle_times[domain] = deque(samples, maxlen=self.SAMPLES_PER_DOMAIN)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not load readiness profile {self.profile_path}: {str(e)}")
+
+    def _save_profile(self, profile: Dict[str, List[float]], version: int):
+        """Write a snapshot of the profile; runs in a worker thread"""
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            try:
+                # Write to a temporary file first so an interrupted save never leaves a truncated profile
+                tmp_path = f"{self.profile_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(profile, f)
+                os.replace(tmp_path, self.profile_path)
+                self._saved_version = version
+            except OSError as e:
+                self.logger.warning(f"Could not save readiness profile {self.profile_path}: {str(e)}")
+
+    def get_wait_budget(self, url: str) -> float:
+        """Upper bound for this visit: learned settle time plus margin, never above max_wait"""
+        samples = self.settle_times.get(self.get_domain(url))
+        if not samples:
+            return self.max_wait
+        learned = max(samples) * self.SAFETY_MARGIN + self.quiet_window
+        return min(self.max_wait, learned)
+
+    async def record_settle_time(self, url: str, settle_time: float):
+        domain = self.get_domain(url)
+        if domain not in self.settle_times:
+            self.settle_times[domain] = deque(maxlen=self.SAMPLES_PER_DOMAIN)
+        self.settle_times[domain].append(round(settle_time, 3))
+        if self.profile_path:
+            self._profile_version += 1
+            profile = {domain: list(samples) for domain, samples in self.settle_times.items()}
+            await asyncio.to_thread(self._save_profile, profile, self._profile_version)
+
+    def track(self, page: Page) -> NetworkTracker:
+        return NetworkTracker(page)
+
+    async def _wait_for_dom_quiet(self, page: Page, budget: float):
+        try:
+            await page.evaluate(DOM_QUIET_SCRIPT, [int(self.quiet_window * 1000), int(budget * 1000)])
+        except Exception as e:
+            # A client-side redirect can destroy the execution context mid-wait
+            self.logger.debug(f"DOM quiet check interrupted: {str(e)}")
+
+    async def _wait_for_network_idle(self, tracker: NetworkTracker):
+        while True:
+            idle_for = time.monotonic() - tracker.last_change
+            if tracker.in_flight <= self.network_idle_threshold and idle_for >= self.quiet_window:
+                return
+            await asyncio.sleep(0.05)
+
+    async def _wait_for_selectors(self, page: Page, budget: float):
+        for selector in self.wait_for_selectors:
+            await page.wait_for_selector(selector, state='attached', timeout=budget * 1000)
+
+    async def wait_until_ready(self, page: Page, url: str, tracker: Optional[NetworkTracker] = None) -> float:
+        """Wait for the page to settle and return how long that took"""
+        budget = self.get_wait_budget(url)
+        if budget <= 0:
+            return 0.0
+
+        start = time.monotonic()
+        checks = [asyncio.create_task(self._wait_for_dom_quiet(page, budget))]
+        if tracker:
+            checks.append(asyncio.create_task(self._wait_for_network_idle(tracker)))
+        if self.wait_for_selectors:
+            checks.append(asyncio.create_task(self._wait_for_selectors(page, budget)))
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*checks), timeout=budget)
+            settle_time = time.monotonic() - start
+            self.logger.debug(f"Page settled after {settle_time:.2f}s (budget {budget:.2f}s)")
+        except asyncio.TimeoutError:
+            settle_time = budget
+            self.logger.debug(f"Page did not settle within {budget:.2f}s, continuing")
+        except Exception as e:
+            settle_time = time.monotonic() - start
+            self.logger.debug(f"Readiness check failed, continuing: {str(e)}")
+        finally:
+            # gather leaves the other checks running when one fails, and the network one never gives up by itself
+            pending = [check for check in checks if not check.done()]
+            for check in pending:
+                check.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        await self.record_settle_time(url, settle_time)
+        return settle_time
@@ -1,16 +1,75 @@
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from .base_scraper import BaseScraper
-from typing import Dict, Any, Optional, List, Tuple
+from .browser_pool import BrowserPool, BROWSER_ARGS
+from .cdp_browser_manager import CDPBrowserManager
+from .captcha_handoff import CaptchaHandoff, SOLVED, TIMED_OUT
+from .resource_blocker import ResourceBlocker
+from .subresource_cache import SubresourceCache
+from .traffic_archive import TrafficArchive
+from .scroll_paginator import ScrollPaginator
+from .api_capture import ApiResponseCapture, CapturedResponse
+from .memory_governor import MemoryGovernor
+from .page_readiness import PageReadinessDetector
+from ..utils.content_cache import ContentCache
+from ..utils.fetch_scheduler import FetchScheduler
+from ..utils.storage_state_store import StorageStateStore, local_storage_script, state_domain
+from .retry_policy import RetryPolicy, CircuitBreaker, RETRIABLE_STATUS
+from .exceptions import FetchError
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator, Deque, Callable, Awaitable
+from collections import deque
+from contextlib import asynccontextmanager, aclosing
 import asyncio
 import random
 import logging
 import re
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-import platform
-import subprocess
 import time
 import os
-import tempfile
+
+# Responses suggesting the saved cookies for a domain are no longer accepted
+STATE_REJECTED_STATUS = (401, 403, 429)
+
+# Drops the rejected origin's web storage; cookies are cleared on the context
+CLEAR_STORAGE_SCRIPT = '() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }'
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Registered with add_init_script, so it runs in every frame before the page's own scripts
+STEALTH_INIT_SCRIPT = '''
+    (() => {
+        Object.defineProperty(navigator, 'webdriver', {
+            get: () => undefined
+        });
+
+        Object.defineProperty(navigator, 'languages', {
+            get: () => ['en-US', 'en']
+        });
+
+        Object.defineProperty(navigator, 'plugins', {
+            get: () => [1, 2, 3, 4, 5]
+        });
+
+        if (navigator.permissions && navigator.permissions.query) {
+            const originalQuery = navigator.permissions.query.bind(navigator.permissions);
+            navigator.permissions.query = (parameters) => (
+                parameters.name === 'notifications' ?
+                    Promise.resolve({ state: Notification.permission }) :
+                    originalQuery(parameters)
+            );
+        }
+    })();
+'''
+
+CUSTOM_HEADERS = {
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Referer': 'https://www.google.com/',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Upgrade-Insecure-Requests': '1'
+}
 
 class ScraperConfig:
     def __init__(self,
@@ -25,7 +84,73 @@ class ScraperConfig:
                  wait_for: str = 'domcontentloaded',
                  use_current_browser: bool = False,
                  max_retries: int = 3,
-                 delay_after_load: int = 2):
+                 delay_after_load: int = 2,
+                 use_browser_pool: bool = True,
+                 browser_pool_size: int = 1,
+                 max_contexts_per_browser: int = 4,
+                 browser_idle_timeout: float = 300.0,
+                 max_concurrent_pages: int = 1,
+                 max_concurrent_pages_per_host: int = 2,
+                 block_resources: bool = False,
+                 blocked_resource_types: Optional[List[str]] = None,
+                 blocked_domains: Optional[List[str]] = None,
+                 allowed_domains: Optional[List[str]] = None,
+                 block_ads_and_trackers: bool = True,
+                 adaptive_wait: bool = True,
+                 dom_quiet_window: float = 0.5,
+                 network_idle_threshold: int = 0,
+                 wait_for_selectors: Optional[List[str]] = None,
+                 readiness_profile_path: Optional[str] = None,
+                 use_http_fast_path: bool = True,
+                 http_timeout: float = 10.0,
+                 http_max_bytes: int = 10 * 1024 * 1024,
+                 use_cache: bool = True,
+                 cache_dir: str = '.cache',
+                 cache_ttl: float = 900.0,
+                 cache_max_bytes: int = 200 * 1024 * 1024,
+                 host_rate_limit: float = 1.0,
+                 host_burst: int = 3,
+                 max_concurrent_fetches: int = 16,
+                 crawl_max_pages: int = 50,
+                 crawl_workers: int = 4,
+                 retry_base_delay: float = 1.0,
+                 retry_max_delay: float = 30.0,
+                 circuit_failure_threshold: int = 5,
+                 circuit_reset_timeout: float = 60.0,
+                 har_mode: Optional[str] = None,
+                 har_path: Optional[str] = None,
+                 scroll_pagination: bool = False,
+                 scroll_max_items: int = 500,
+                 scroll_max_steps: int = 50,
+                 scroll_time_budget: float = 60.0,
+                 scroll_no_growth_steps: int = 2,
+                 scroll_step_wait: float = 2.0,
+                 load_more_selectors: Optional[List[str]] = None,
+                 scroll_item_selector: Optional[str] = None,
+                 capture_api_responses: bool = False,
+                 api_url_patterns: Optional[List[str]] = None,
+                 api_content_types: Optional[List[str]] = None,
+                 api_max_bytes: int = 2 * 1024 * 1024,
+                 api_max_responses: int = 50,
+                 api_min_records: int = 3,
+                 max_pages_per_context: int = 100,
+                 max_pages_per_browser: int = 1000,
+                 max_context_heap_mb: float = 512.0,
+                 max_browser_memory_mb: float = 2048.0,
+                 memory_sample_interval: int = 10,
+                 cdp_ports: Optional[List[int]] = None,
+                 cdp_launch_chrome: bool = True,
+                 cdp_use_default_context: bool = False,
+                 cdp_max_tabs: int = 4,
+                 cdp_connect_timeout: float = 30.0,
+                 captcha_timeout: float = 300.0,
+                 captcha_console_prompt: bool = True,
+                 captcha_auto_detect: bool = True,
+                 use_storage_state: bool = True,
+                 storage_state_ttl: float = 86400.0,
+                 cache_subresources: bool = False,
+                 subresource_cache_max_bytes: int = 100 * 1024 * 1024,
+                 html_parser: str = 'html.parser'):
         self.use_stealth = use_stealth
         self.simulate_human = simulate_human
         self.use_custom_headers = use_custom_headers
@@ -38,218 +163,515 @@ class ScraperConfig:
         self.use_current_browser = use_current_browser
         self.max_retries = max_retries
         self.delay_after_load = delay_after_load
+        self.use_browser_pool = use_browser_pool
+        self.browser_pool_size = browser_pool_size
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.browser_idle_timeout = browser_idle_timeout
+        self.max_concurrent_pages = max_concurrent_pages
+        self.max_concurrent_pages_per_host = max_concurrent_pages_per_host
+        self.block_resources = block_resources
+        self.blocked_resource_types = blocked_resource_types
+        self.blocked_domains = blocked_domains
+        self.allowed_domains = allowed_domains
+        self.block_ads_and_trackers = block_ads_and_trackers
+        # With adaptive_wait, delay_after_load is only the upper bound on the settle wait
+        self.adaptive_wait = adaptive_wait
+        self.dom_quiet_window = dom_quiet_window
+        self.network_idle_threshold = network_idle_threshold
+        self.wait_for_selectors = wait_for_selectors
+        self.readiness_profile_path = readiness_profile_path
+        self.use_http_fast_path = use_http_fast_path
+        self.http_timeout = http_timeout
+        self.http_max_bytes = http_max_bytes
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self.cache_max_bytes = cache_max_bytes
+        # Politeness limits shared by every fetcher through FetchScheduler
+        self.host_rate_limit = host_rate_limit
+        self.host_burst = host_burst
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.crawl_max_pages = crawl_max_pages
+        self.crawl_workers = crawl_workers
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.circuit_failure_threshold = circuit_failure_threshold
+        self.circuit_reset_timeout = circuit_reset_timeout
+        self.har_mode = har_mode
+        self.har_path = har_path
+        self.scroll_pagination = scroll_pagination
+        self.scroll_max_items = scroll_max_items
+        self.scroll_max_steps = scroll_max_steps
+        self.scroll_time_budget = scroll_time_budget
+        self.scroll_no_growth_steps = scroll_no_growth_steps
+        self.scroll_step_wait = scroll_step_wait
+        self.load_more_selectors = load_more_selectors
+        self.scroll_item_selector = scroll_item_selector
+        self.capture_api_responses = capture_api_responses
+        self.api_url_patterns = api_url_patterns
+        self.api_content_types = api_content_types
+        self.api_max_bytes = api_max_bytes
+        self.api_max_responses = api_max_responses
+        self.api_min_records = api_min_records
+        self.max_pages_per_context = max_pages_per_context
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_context_heap_mb = max_context_heap_mb
+        self.max_browser_memory_mb = max_browser_memory_mb
+        self.memory_sample_interval = memory_sample_interval
+        # Current-browser mode: Chrome debug ports to attach to, spread over for concurrent scrapes
+        self.cdp_ports = cdp_ports
+        self.cdp_launch_chrome = cdp_launch_chrome
+        self.cdp_use_default_context = cdp_use_default_context
+        self.cdp_max_tabs = cdp_max_tabs
+        self.cdp_connect_timeout = cdp_connect_timeout
+        self.captcha_timeout = captcha_timeout
+        self.captcha_console_prompt = captcha_console_prompt
+        self.captcha_auto_detect = captcha_auto_detect
+        # Cookies and localStorage saved per domain and loaded into later contexts
+        self.use_storage_state = use_storage_state
+        self.storage_state_ttl = storage_state_ttl
+        # Scripts, stylesheets and other assets shared by every context through a route-based cache;
+        # opt-in until the cost of routing every request through Python has been measured
+        self.cache_subresources = cache_subresources
+        self.subresource_cache_max_bytes = subresource_cache_max_bytes
+        # Parser behind page cleaning: 'html.parser', or 'lxml' when installed for large pages
+        self.html_parser = html_parser
 
 class PlaywrightScraper(BaseScraper):
-    def __init__(self, config: ScraperConfig = ScraperConfig()):
+    def __init__(self, config: ScraperConfig = ScraperConfig(), browser_pool: Optional[BrowserPool] = None):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG if config.debug else logging.INFO)
         self.config = config
-        self.chrome_process = None
-        self.temp_user_data_dir = None
+        self.owns_browser_pool = browser_pool is None and config.use_browser_pool
+        self.browser_pool = BrowserPool.from_config(config) if self.owns_browser_pool else browser_pool
+        self.cdp_manager = CDPBrowserManager.shared(config) if config.use_current_browser else None
+        # The pool's governor makes the recycling decisions, so its counters are the ones to feed
+        if self.cdp_manager is not None and self.cdp_manager.governor is not None:
+            self.memory_governor = self.cdp_manager.governor
+        elif self.browser_pool is not None and self.browser_pool.governor is not None:
+            self.memory_governor = self.browser_pool.governor
+        else:
+            self.memory_governor = MemoryGovernor.from_config(config)
+        self.resource_blocker = ResourceBlocker.from_config(config) if config.block_resources else None
+        self.readiness = PageReadinessDetector.from_config(config) if config.adaptive_wait else None
+        self.traffic_archive = TrafficArchive.from_config(config) if config.har_mode else None
+        self.scroll_paginator = ScrollPaginator.from_config(config)
+        self.api_capture = ApiResponseCapture.from_config(config) if config.capture_api_responses else None
+        # Recording or replaying must see every request, so the page cache is bypassed
+        self.content_cache = ContentCache.shared(config.cache_dir, config.cache_ttl, config.cache_max_bytes,
+                                                 config.debug) if config.use_cache and not config.har_mode else None
+        self.subresource_cache = SubresourceCache.from_config(config) \
+            if config.use_cache and config.cache_subresources and not config.har_mode else None
+        self.scheduler = FetchScheduler.shared(config)
+        self.captcha_handoff = CaptchaHandoff.shared(config)
+        # Replays must not depend on what earlier sessions left behind
+        self.storage_states = StorageStateStore.from_config(config) \
+            if config.use_storage_state and not config.har_mode else None
+        self.retry_policy = RetryPolicy(
+            max_retries=config.max_retries,
+            base_delay=config.retry_base_delay,
+            max_delay=config.retry_max_delay,
+            # Navigation timeout plus the longest settle wait, with some slack
+            attempt_timeout=config.timeout / 1000 + config.delay_after_load + 5,
+            breaker=CircuitBreaker.shared(config),
+            debug=config.debug,
+        )
 
-    async def fetch_content(self, url: str, proxy: Optional[str] = None, pages: Optional[str] = None, url_pattern: Optional[str] = None, handle_captcha: bool = False) -> List[str]:
-        async with async_playwright() as p:
-            if self.config.use_current_browser:
-                browser = await self.launch_and_connect_to_chrome(p)
-            else:
-                browser = await self.launch_browser(p, proxy, handle_captcha)
+    async def fetch_content(self, url: str, proxy: Optional[str] = None, pages: Optional[str] = None, url_pattern: Optional[str] = None, handle_captcha: bool = False, scroll: Optional[bool] = None, captured_responses: Optional[List[CapturedResponse]] = None) -> List[str]:
+        return [content async for content in self.iter_content(url, proxy, pages, url_pattern, handle_captcha,
+                                                               scroll, captured_responses)]
+
+    async def iter_content(self, url: str, proxy: Optional[str] = None, pages: Optional[str] = None, url_pattern: Optional[str] = None, handle_captcha: bool = False, scroll: Optional[bool] = None, captured_responses: Optional[List[CapturedResponse]] = None) -> AsyncIterator[str]:
+        """Streaming fetch_content: yields each page as soon as it loads instead of returning them all.
 
+        With capture_api_responses enabled, JSON responses loaded by the pages are
+        appended to ``captured_responses`` once the pages have been consumed.
+        """
+        async with self.page_session(url, proxy, handle_captcha) as page:
+            capture = None
+            if self.api_capture and captured_responses is not None:
+                capture = self.api_capture.attach(page.context, captured_responses)
             try:
-                context = await self.create_context(browser, proxy)
+                # aclosing() shuts the inner generator down before the page is released
+                async with aclosing(self.iter_pages(page, url, pages, url_pattern, scroll)) as page_contents:
+                    async for content in page_contents:
+                        yield content
+            finally:
+                if capture:
+                    await capture.finish()
+
+    async def fetch_page(self, url: str, proxy: Optional[str] = None) -> str:
+        """Fetch exactly one URL, without page-pattern detection"""
+        async with self.page_session(url, proxy) as page:
+            return await self.navigate_and_get_content(page, url)
+
+    @asynccontextmanager
+    async def page_session(self, url: str, proxy: Optional[str] = None, handle_captcha: bool = False) -> AsyncIterator[Page]:
+        """Yield a prepared page, leased from the browser pool or the attached Chrome where possible"""
+        started = time.time()
+        if self.cdp_manager is not None:
+            async with self.cdp_manager.lease(self.get_context_options(proxy),
+                                              on_create=self.setup_context,
+                                              setup_key=self.context_setup_key(url)) as page:
+                try:
+                    await self.load_storage_state(page, url)
+                    if handle_captcha:
+                        await self.handle_captcha(page, url)
+                    yield page
+                    await self.save_storage_state(page.context, url, started)
+                finally:
+                    if self.traffic_archive:
+                        self.traffic_archive.save()
+            return
+
+        # CAPTCHA solving needs a visible browser, so only regular headless scrapes are served from the pool
+        if self.browser_pool is not None and not handle_captcha:
+            async with self.browser_pool.lease(self.get_context_options(proxy),
+                                               on_create=self.setup_context,
+                                               setup_key=self.context_setup_key(url)) as context:
                 page = await context.new_page()
+                try:
+                    await self.load_storage_state(page, url)
+                    yield page
+                    await self.save_storage_state(context, url, started)
+                finally:
+                    await page.close()
+                    if self.traffic_archive:
+                        self.traffic_archive.save()
+            return
 
-                if self.config.use_stealth:
-                    await self.apply_stealth_settings(page)
-                await self.set_browser_features(page)
+        async with async_playwright() as p:
+            browser = await self.launch_browser(p, proxy, handle_captcha)
+
+            context = None
+            try:
+                context = await self.create_context(browser, proxy, url)
+                await self.setup_context(context)
+                page = await context.new_page()
 
                 if handle_captcha:
                     await self.handle_captcha(page, url)
-                
-                contents = await self.scrape_multiple_pages(page, url, pages, url_pattern)
-            except Exception as e:
-                self.logger.error(f"Error during scraping: {str(e)}")
-                contents = [f"Error: {str(e)}"]
-            finally:
-                if not self.config.use_current_browser:
-                    await browser.close()
-                    self.logger.info("Browser closed after scraping.")
 
-        return contents
+                yield page
+                await self.save_storage_state(context, url, started)
+            finally:
+                if self.traffic_archive:
+                    self.traffic_archive.save()
+                if context is not None:
+                    self.memory_governor.forget_context(context)
+                self.memory_governor.forget_browser(browser)
+                await browser.close()
+                self.logger.info("Browser closed after scraping.")
+
+    async def warm_up(self, proxy: Optional[str] = None, url: Optional[str] = None):
+        """Launch the pooled browser and set up contexts ahead of the first scrape (of ``url``, if given)"""
+        if self.cdp_manager is not None:
+            await self.cdp_manager.warm()
+        elif self.browser_pool is not None:
+            await self.browser_pool.warm(self.get_context_options(proxy), on_create=self.setup_context,
+                                         setup_key=self.context_setup_key(url),
+                                         count=self.config.max_concurrent_pages)
+
+    def context_setup_key(self, url: Optional[str] = None) -> Tuple:
+        # Contexts carry the handlers installed by setup_context, so pooled contexts
+        # are only shared between scrapers that would set them up identically.
+        # With saved storage states they also keep one site's cookies, so each domain gets its own.
+        return (self.config.use_stealth, self.config.use_custom_headers,
+                id(self.resource_blocker) if self.resource_blocker else None,
+                id(self.traffic_archive) if self.traffic_archive else None,
+                id(self.subresource_cache) if self.subresource_cache else None,
+                state_domain(url) if self.storage_states and url else None)
+
+    async def setup_context(self, context: BrowserContext):
+        """One-time context setup; init scripts and headers then apply to every page and navigation"""
+        if self.config.use_stealth:
+            await self.apply_stealth_settings(context)
+        await self.set_browser_features(context)
+        # Handlers registered later run first, so blocked requests never reach the cache or the archive
+        if self.traffic_archive:
+            await self.traffic_archive.install(context)
+        if self.subresource_cache:
+            await self.subresource_cache.install(context)
+        if self.resource_blocker:
+            await self.resource_blocker.install(context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {'scheduler': self.scheduler.get_stats(), 'circuit_breaker': self.retry_policy.breaker.get_stats()}
+        if self.content_cache:
+            stats['cache'] = self.content_cache.get_stats()
+        if self.subresource_cache:
+            stats['subresource_cache'] = self.subresource_cache.get_stats()
+        if self.resource_blocker:
+            stats['resource_blocking'] = self.resource_blocker.get_stats()
+        if self.traffic_archive:
+            stats['traffic_archive'] = self.traffic_archive.get_stats()
+        if self.cdp_manager:
+            stats['cdp'] = self.cdp_manager.get_stats()
+        stats['memory'] = self.memory_governor.get_stats()
+        stats['captcha'] = self.captcha_handoff.get_stats()
+        if self.storage_states:
+            stats['storage_state'] = self.storage_states.get_stats()
+        return stats
+
+    async def close(self):
+        if self.traffic_archive:
+            self.traffic_archive.save()
+        if self.owns_browser_pool and self.browser_pool:
+            await self.browser_pool.close()
 
     async def handle_captcha(self, page: Page, url: str):
+        """Park this scrape until the CAPTCHA is solved; other scrapes keep running meanwhile"""
         self.logger.info("Waiting for user to solve CAPTCHA...")
         await page.goto(url, wait_until=self.config.wait_for, timeout=self.config.timeout)
-        
-        print("Please solve the CAPTCHA in the browser window.")
-        print("Once solved, press Enter in this console to continue...")
-        input()
-        
-        await page.wait_for_load_state('networkidle')
-        self.logger.info("CAPTCHA handling completed.")
 
-    async def launch_and_connect_to_chrome(self, playwright):
-        if self.chrome_process is None:
-            self.temp_user_data_dir = tempfile.mkdtemp(prefix="chrome_debug_profile_")
-            chrome_executable = self.get_chrome_executable()
-            command = [
-                chrome_executable,
-                f"--user-data-dir={self.temp_user_data_dir}",
-                "--remote-debugging-port=9222",
-                "--no-first-run",
-                "--no-default-browser-check"
-            ]
-            self.chrome_process = subprocess.Popen(command)
-            self.logger.info("Launched Chrome with remote debugging.")
-
-        for _ in range(30):
-            try:
-                browser = await playwright.chromium.connect_over_cdp("http://localhost:9222")
-                self.logger.info("Successfully connected to Chrome.")
-                return browser
-            except Exception as e:
-                self.logger.debug(f"Connection attempt failed: {str(e)}")
-                await asyncio.sleep(1)
-        
-        raise Exception("Failed to connect to Chrome after 30 seconds")
-
-    def get_chrome_executable(self):
-        system = platform.system()
-        if system == "Darwin":  # macOS
-            return "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-        elif system == "Linux":
-            return "google-chrome"
-        else:
-            raise NotImplementedError(f"Unsupported operating system: {system}")
-
-    def __del__(self):
-        if self.chrome_process:
-            self.chrome_process.terminate()
-            self.chrome_process.wait()
-            self.logger.info("Chrome process terminated.")
-        if self.temp_user_data_dir:
-            import shutil
-            shutil.rmtree(self.temp_user_data_dir, ignore_errors=True)
-            self.logger.info(f"Temporary user data directory removed: {self.temp_user_data_dir}")
-
-    async def connect_to_current_browser(self, playwright):
-        system = platform.system()
-        if system == "Darwin":
-            subprocess.Popen(["open", "-a", "Google Chrome", "--args", "--remote-debugging-port=9222"])
-        elif system == "Linux":
-            subprocess.Popen(["google-chrome", "--remote-debugging-port=9222"])
-        elif system == "Windows":
-            subprocess.Popen(["start", "chrome", "--remote-debugging-port=9222"], shell=True)
-        else:
-            raise NotImplementedError(f"Connecting to current browser is not implemented for {system}")
+        status = await self.captcha_handoff.solve(page, url)
+        if status == TIMED_OUT:
+            raise FetchError(url, f"CAPTCHA was not solved within {self.captcha_handoff.timeout:.0f} seconds")
+        if status != SOLVED:
+            raise FetchError(url, "CAPTCHA handoff was cancelled")
+        # Keep the clearance right away, so later fetches of this domain skip the challenge
+        await self.save_storage_state(page.context, url)
 
-        self.logger.info("Waiting for browser to start...")
-        for _ in range(30):
-            try:
-                browser = await playwright.chromium.connect_over_cdp("http://localhost:9222")
-                self.logger.info("Successfully connected to the browser.")
-                return browser
-            except Exception as e:
-                self.logger.debug(f"Connection attempt failed: {str(e)}")
-                await asyncio.sleep(1)
-        
-        raise Exception("Failed to connect to the current browser after 30 seconds")
+        try:
+            await page.wait_for_load_state('networkidle', timeout=self.config.timeout)
+        except Exception as e:
+            self.logger.debug(f"Page did not go idle after the CAPTCHA: {str(e)}")
+        self.logger.info("CAPTCHA handling completed.")
 
     async def launch_browser(self, playwright, proxy: Optional[str] = None, handle_captcha: bool = False) -> Browser:
         return await playwright.chromium.launch(
             headless=self.config.headless and not handle_captcha,
-            args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-infobars',
-                  '--window-position=0,0', '--ignore-certifcate-errors',
-                  '--ignore-certifcate-errors-spki-list'],
+            args=BROWSER_ARGS,
             proxy={'server': proxy} if proxy else None
         )
 
-    async def create_context(self, browser: Browser, proxy: Optional[str] = None) -> BrowserContext:
-        return await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            proxy={'server': proxy} if proxy else None,
-            java_script_enabled=True,
-            ignore_https_errors=True
-        )
+    def get_context_options(self, proxy: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            'viewport': {'width': 1920, 'height': 1080},
+            'user_agent': DEFAULT_USER_AGENT,
+            'proxy': {'server': proxy} if proxy else None,
+            'java_script_enabled': True,
+            'ignore_https_errors': True
+        }
+
+    async def create_context(self, browser: Browser, proxy: Optional[str] = None,
+                             url: Optional[str] = None) -> BrowserContext:
+        options = self.get_context_options(proxy)
+        state = self.storage_states.get(url) if self.storage_states and url else None
+        if state:
+            options['storage_state'] = state
+        return await browser.new_context(**options)
+
+    def uses_own_profile(self, context: BrowserContext) -> bool:
+        """The attached Chrome's own context holds the user's logins for every site, so saved states stay out of it"""
+        return self.cdp_manager is not None and self.cdp_manager.is_default_context(context)
+
+    async def load_storage_state(self, page: Page, url: str):
+        """Load the domain's saved state into a page whose pooled context was created without it"""
+        if self.uses_own_profile(page.context):
+            return
+        state = self.storage_states.get(url) if self.storage_states else None
+        if not state:
+            return
+        if state['cookies']:
+            await page.context.add_cookies(state['cookies'])
+        if state['origins']:
+            await page.add_init_script(local_storage_script(state['origins']))
+
+    async def save_storage_state(self, context: BrowserContext, url: str, session_started: Optional[float] = None):
+        if not self.storage_states or self.uses_own_profile(context):
+            return
+        try:
+            self.storage_states.put(url, await context.storage_state(), session_started)
+        except Exception as e:
+            self.logger.debug(f"Could not save storage state for {url}: {str(e)}")
+
+    async def reset_storage_state(self, page: Page, url: str, reason: str):
+        """Forget the domain's saved state and clear what the (possibly pooled) context still holds"""
+        self.storage_states.invalidate(url, reason=reason)
+        if self.uses_own_profile(page.context):
+            # Clearing the user's profile would log them out of every site
+            return
+        try:
+            await page.context.clear_cookies()
+            await page.evaluate(CLEAR_STORAGE_SCRIPT)
+        except Exception as e:
+            self.logger.debug(f"Could not clear storage for {url}: {str(e)}")
 
-    async def apply_stealth_settings(self, page: Page):
-        await page.evaluate('''
-            () => {
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['en-US', 'en']
-                });
-
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5]
-                });
-
-                const originalQuery = window.navigator.permissions.query;
-                window.navigator.permissions.query = (parameters) => (
-                    parameters.name === 'notifications' ?
-                        Promise.resolve({ state: Notification.permission }) :
-                        originalQuery(parameters)
-                );
-            }
-        ''')
-
-    async def set_browser_features(self, page: Page):
+    async def apply_stealth_settings(self, context: BrowserContext):
+        await context.add_init_script(STEALTH_INIT_SCRIPT)
+
+    async def set_browser_features(self, context: BrowserContext):
         if self.config.use_custom_headers:
-            await page.set_extra_http_headers({
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Referer': 'https://www.google.com/',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Upgrade-Insecure-Requests': '1'
-            })
-
-    async def scrape_multiple_pages(self, page: Page, base_url: str, pages: Optional[str] = None, url_pattern: Optional[str] = None) -> List[str]:
-        contents = []
+            await context.set_extra_http_headers(CUSTOM_HEADERS)
+
+    async def scrape_multiple_pages(self, page: Page, base_url: str, pages: Optional[str] = None, url_pattern: Optional[str] = None, scroll: Optional[bool] = None) -> List[str]:
+        return [content async for content in self.iter_pages(page, base_url, pages, url_pattern, scroll)]
+
+    async def iter_pages(self, page: Page, base_url: str, pages: Optional[str] = None, url_pattern: Optional[str] = None, scroll: Optional[bool] = None) -> AsyncIterator[str]:
+        """Yield each page's HTML in page order as soon as it has loaded"""
+        if scroll is None:
+            scroll = self.config.scroll_pagination
 
         if not url_pattern:
             url_pattern = self.detect_url_pattern(base_url)
 
         if not url_pattern and not pages:
+            if scroll:
+                async with aclosing(self.iter_scroll_pages(page, base_url)) as page_contents:
+                    async for content in page_contents:
+                        yield content
+                return
+
             # Single page scraping
             self.logger.info(f"Scraping single page: {base_url}")
-            content = await self.navigate_and_get_content(page, base_url)
-            contents.append(content)
-        else:
-            # Multiple page scraping
-            page_numbers = self.parse_page_numbers(pages) if pages else [1]
-            for page_num in page_numbers:
-                current_url = self.apply_url_pattern(base_url, url_pattern, page_num) if url_pattern else base_url
-                self.logger.info(f"Scraping page {page_num}: {current_url}")
-
-                content = await self.navigate_and_get_content(page, current_url)
-                contents.append(content)
-
-                if page_num < len(page_numbers):
-                    await asyncio.sleep(random.uniform(1, 2))
+            yield await self.navigate_and_get_content(page, base_url)
+            return
+
+        # Multiple page scraping
+        page_urls = self.get_page_urls(base_url, pages, url_pattern)
+
+        if self.config.max_concurrent_pages > 1 and len(page_urls) > 1:
+            async with aclosing(self.iter_pages_concurrently(page, page_urls)) as page_contents:
+                async for content in page_contents:
+                    yield content
+            return
+
+        for page_num, current_url in page_urls:
+            self.logger.info(f"Scraping page {page_num}: {current_url}")
+
+            # Pacing between pages is left to the shared FetchScheduler
+            content = await self.navigate_multi_page(page, current_url)
+            if content is not None:
+                yield content
+
+    async def iter_scroll_pages(self, page: Page, url: str) -> AsyncIterator[str]:
+        """Yield the first screen of a scroll-paginated listing, then only the nodes each scroll step adds"""
+        self.logger.info(f"Scraping scroll-paginated page: {url}")
+        # The page has to be live for scrolling, so the content cache is not consulted here
+        yield await self.retry_policy.run(
+            url, lambda: self.navigate_once(page, url, capture=self.scroll_paginator.start),
+            slot=lambda: self.scheduler.slot(url))
+        async with aclosing(self.scroll_paginator.iter_steps(page, url, self.scheduler)) as steps:
+            async for fragment in steps:
+                yield fragment
+
+    async def navigate_multi_page(self, page: Page, url: str) -> Optional[str]:
+        """navigate_and_get_content for one page of a range: a page that keeps failing is skipped, not fatal"""
+        try:
+            return await self.navigate_and_get_content(page, url)
+        except FetchError as e:
+            self.logger.warning(f"Skipping page: {str(e)}")
+            return None
+
+    async def iter_pages_concurrently(self, page: Page, page_urls: List[Tuple[int, str]]) -> AsyncIterator[str]:
+        tab_count = min(self.config.max_concurrent_pages, len(page_urls))
+        tabs: asyncio.Queue = asyncio.Queue()
+        tabs.put_nowait(page)
+        extra_tabs = []
+        pending: Deque[asyncio.Task] = deque()
+
+        async def scrape(page_num: int, url: str) -> Optional[str]:
+            # Per-host concurrency is capped by the FetchScheduler inside navigate_and_get_content
+            tab = await tabs.get()
+            try:
+                self.logger.info(f"Scraping page {page_num}: {url}")
+                return await self.navigate_multi_page(tab, url)
+            finally:
+                tabs.put_nowait(tab)
 
-        return contents
+        try:
+            for _ in range(tab_count - 1):
+                tab = await page.context.new_page()
+                extra_tabs.append(tab)
+                tabs.put_nowait(tab)
+
+            self.logger.info(f"Scraping {len(page_urls)} pages with {tab_count} tabs")
+            # Only a small window of pages runs ahead of the consumer, which keeps
+            # output in page order while bounding how many pages sit in memory.
+            window = tab_count * 2
+            for page_num, url in page_urls:
+                pending.append(asyncio.create_task(scrape(page_num, url)))
+                if len(pending) >= window:
+                    content = await pending.popleft()
+                    if content is not None:
+                        yield content
+            while pending:
+                content = await pending.popleft()
+                if content is not None:
+                    yield content
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for tab in extra_tabs:
+                await tab.close()
+
+    def cache_options(self) -> Dict[str, Any]:
+        # Settings that change what page.content() returns for the same URL
+        return {
+            'renderer': 'playwright',
+            'block_resources': self.config.block_resources,
+            'wait_for_selectors': self.config.wait_for_selectors,
+        }
+
+    async def revalidate(self, page: Page, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str]]:
+        async with self.scheduler.slot(url):
+            response = await page.context.request.get(url, headers=headers, timeout=self.config.timeout,
+                                                      fail_on_status_code=False)
+        try:
+            self.scheduler.report(url, response.status, response.headers)
+            return response.status, response.headers
+        finally:
+            await response.dispose()
 
     async def navigate_and_get_content(self, page: Page, url: str) -> str:
+        # A cached page loads no API responses, so nothing could be captured from it
+        if self.content_cache and not self.api_capture:
+            cached = await self.content_cache.lookup(
+                url, self.cache_options(), lambda cached_url, headers: self.revalidate(page, cached_url, headers))
+            if cached is not None:
+                self.logger.info(f"Serving {url} from cache")
+                return cached.text
+
+        return await self.retry_policy.run(url, lambda: self.navigate_once(page, url),
+                                           slot=lambda: self.scheduler.slot(url))
+
+    async def navigate_once(self, page: Page, url: str,
+                            capture: Optional[Callable[[Page], Awaitable[str]]] = None) -> str:
+        """One navigation attempt; the caller holds the scheduler slot for ``url``"""
+        tracker = self.readiness.track(page) if self.readiness else None
         try:
             self.logger.info(f"Navigating to {url}")
-            await page.goto(url, wait_until=self.config.wait_for, timeout=self.config.timeout)
+            response = await page.goto(url, wait_until=self.config.wait_for, timeout=self.config.timeout)
+            if response is not None:
+                self.scheduler.report(url, response.status, response.headers)
+                if response.status >= 400:
+                    if response.status in STATE_REJECTED_STATUS and self.storage_states:
+                        # Saved cookies may be what got us flagged, so neither the store nor this context keeps them
+                        await self.reset_storage_state(page, url, reason=f"HTTP {response.status}")
+                    # Error pages are never handed on as content
+                    raise FetchError(url, f"HTTP {response.status}", status=response.status,
+                                     retriable=response.status in RETRIABLE_STATUS)
             self.logger.info(f"Successfully loaded {url}")
-            
-            await asyncio.sleep(self.config.delay_after_load)
-            
+
+            if self.readiness:
+                await self.readiness.wait_until_ready(page, url, tracker)
+            else:
+                await asyncio.sleep(self.config.delay_after_load)
+
             self.logger.info("Extracting page content")
-            content = await page.content()
-            self.logger.info(f"Successfully extracted content (length: {len(content)})")
-            return content
-        except Exception as e:
-            self.logger.error(f"Error navigating to {url}: {str(e)}")
-            return f"Error: Failed to load {url}. {str(e)}"
+            content = await (capture(page) if capture else page.content())
+            await self.memory_governor.record_page(page)
+        finally:
+            if tracker:
+                tracker.detach()
+
+        self.logger.info(f"Successfully extracted content (length: {len(content)})")
+
+        if self.content_cache and response is not None and response.ok:
+            await self.content_cache.store(url, content, response.headers, self.cache_options())
+        return content
 
     async def bypass_cloudflare(self, page: Page, url: str) -> str:
         max_retries = 3
@@ -317,6 +739,18 @@ class PlaywrightScraper(BaseScraper):
         else:
             return base_url
 
+    def get_page_urls(self, base_url: str, pages: Optional[str] = None, url_pattern: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Resolve the (page number, URL) pairs that scrape_multiple_pages would visit"""
+        if not url_pattern:
+            url_pattern = self.detect_url_pattern(base_url)
+
+        if not url_pattern and not pages:
+            return [(1, base_url)]
+
+        page_numbers = self.parse_page_numbers(pages) if pages else [1]
+        return [(page_num, self.apply_url_pattern(base_url, url_pattern, page_num) if url_pattern else base_url)
+                for page_num in page_numbers]
+
     def parse_page_numbers(self, pages: Optional[str]) -> List[int]:
         if not pages:
             return [1]
@@ -0,0 +1,109 @@
+from playwright.async_api import BrowserContext, Page, Route
+from typing import Dict, Any, Optional, Iterable, Union
+from urllib.parse import urlparse
+import logging
+
+# Resource types that never contribute to page.content()
+DEFAULT_BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font', 'imageset', 'texttrack', 'beacon', 'csp_report', 'ping']
+
+AD_TRACKER_DOMAINS = [
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'google-analytics.com',
+    'googletagmanager.com', 'googletagservices.com', 'adservice.google.com', 'connect.facebook.net',
+    'facebook.net', 'amazon-adsystem.com', 'adnxs.com', 'adsrvr.org', 'criteo.com', 'criteo.net',
+    'taboola.com', 'outbrain.com', 'scorecardresearch.com', 'quantserve.com', 'moatads.com',
+    'hotjar.com', 'mixpanel.com', 'segment.io', 'segment.com', 'nr-data.net', 'optimizely.com',
+    'pubmatic.com', 'rubiconproject.com', 'openx.net', 'casalemedia.com', 'bing.com/bat.js',
+    'clarity.ms', 'yandex.ru/metrika', 'mc.yandex.ru', 'tiktok.com/i18n/pixel', 'snap.licdn.com',
+    'ads.linkedin.com', 'analytics.twitter.com', 'static.ads-twitter.com', 'branch.io', 'adroll.com',
+]
+
+# Rough transfer sizes used to estimate what an aborted request would have cost
+TYPICAL_RESOURCE_BYTES = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 30_000,
+    'script': 50_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+}
+DEFAULT_RESOURCE_BYTES = 10_000
+
+
+class ResourceBlocker:
+    """Route handler that aborts requests which are not needed to build the DOM"""
+
+    def __init__(self, blocked_resource_types: Optional[Iterable[str]] = None,
+                 blocked_domains: Optional[Iterable[str]] = None,
+                 allowed_domains: Optional[Iterable[str]] = None,
+                 block_ads_and_trackers: bool = True,
+                 debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.blocked_resource_types = set(
+            DEFAULT_BLOCKED_RESOURCE_TYPES if blocked_resource_types is None else blocked_resource_types)
+        self.blocked_domains = list(blocked_domains or [])
+        if block_ads_and_trackers:
+            self.blocked_domains.extend(AD_TRACKER_DOMAINS)
+        self.allowed_domains = list(allowed_domains or [])
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, config) -> 'ResourceBlocker':
+        return cls(
+            blocked_resource_types=config.blocked_resource_types,
+            blocked_domains=config.blocked_domains,
+            allowed_domains=config.allowed_domains,
+            block_ads_and_trackers=config.block_ads_and_trackers,
+            debug=config.debug,
+        )
+
+    def reset_stats(self):
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.bytes_saved_estimate = 0
+        self.blocked_by_type: Dict[str, int] = {}
+
+    @staticmethod
+    def _matches(url: str, host: str, patterns: Iterable[str]) -> bool:
+        for pattern in patterns:
+            if '/' in pattern:
+                if pattern in url:
+                    return True
+            elif host == pattern or host.endswith('.' + pattern):
+                return True
+        return False
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if resource_type == 'document':
+            return False
+        host = (urlparse(url).hostname or '').lower()
+        if self.allowed_domains and self._matches(url, host, self.allowed_domains):
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        return self._matches(url, host, self.blocked_domains)
+
+    async def handle_route(self, route: Route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.requests_blocked += 1
+            self.blocked_by_type[request.resource_type] = self.blocked_by_type.get(request.resource_type, 0) + 1
+            self.bytes_saved_estimate += TYPICAL_RESOURCE_BYTES.get(request.resource_type, DEFAULT_RESOURCE_BYTES)
+            self.logger.debug(f"Blocked {request.resource_type}: {request.url}")
+            await route.abort('blockedbyclient')
+        else:
+            self.requests_allowed += 1
+            # fallback() lets other route handlers on the context see the request
+            await route.fallback()
+
+    async def install(self, target: Union[BrowserContext, Page]):
+        await target.route('**/*', self.handle_route)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'requests_allowed': self.requests_allowed,
+            'requests_blocked': self.requests_blocked,
+            'bytes_saved_estimate': self.bytes_saved_estimate,
+            'blocked_by_type': dict(self.blocked_by_type),
+        }
@@ -0,0 +1,199 @@
+from .exceptions import FetchError, CircuitOpenError
+from contextlib import AsyncExitStack
+from typing import Dict, Any, Optional, Callable, Awaitable, AsyncContextManager, TypeVar
+from urllib.parse import urlparse
+import asyncio
+import logging
+import random
+import time
+
+T = TypeVar('T')
+
+RETRIABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Substrings of browser/network error messages, checked fatal-first
+FATAL_ERROR_MARKERS = ('ERR_NAME_NOT_RESOLVED', 'ERR_CERT_', 'ERR_SSL_', 'ERR_INVALID_URL', 'ERR_UNKNOWN_URL_SCHEME',
+                       'ERR_BLOCKED_BY_CLIENT', 'ERR_TOO_MANY_REDIRECTS', 'ERR_INVALID_RESPONSE',
+                       'Name or service not known', 'nodename nor servname')
+RETRIABLE_ERROR_MARKERS = ('Timeout', 'timed out', 'ERR_CONNECTION_', 'ERR_TIMED_OUT', 'ERR_EMPTY_RESPONSE',
+                           'ERR_NETWORK_CHANGED', 'ERR_INTERNET_DISCONNECTED', 'ERR_PROXY_', 'ERR_SOCKS_',
+                           'ERR_HTTP2_PROTOCOL_ERROR', 'Connection refused', 'Connection reset', 'Connection aborted',
+                           'RemoteDisconnected', 'Temporary failure', 'SOCKS', 'Target closed')
+
+
+def is_retriable(exc: Optional[BaseException]) -> bool:
+    """Classify an error (following its cause chain) as transient or fatal"""
+    while exc is not None:
+        if isinstance(exc, CircuitOpenError):
+            return False
+        if isinstance(exc, FetchError):
+            return exc.retriable
+        if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+        if status is not None:
+            return status in RETRIABLE_STATUS
+        message = str(exc)
+        if any(marker in message for marker in FATAL_ERROR_MARKERS):
+            return False
+        if any(marker in message for marker in RETRIABLE_ERROR_MARKERS):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class HostCircuit:
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.half_open = False
+        self.trial_in_flight = False
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker shared by every fetcher in the process.
+
+    After ``failure_threshold`` consecutive transient failures a host's circuit
+    opens and requests fail immediately with CircuitOpenError. Once
+    ``reset_timeout`` has passed a single trial request is let through; success
+    closes the circuit, failure opens it again.
+    """
+
+    _shared: Optional['CircuitBreaker'] = None
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hosts: Dict[str, HostCircuit] = {}
+
+    @classmethod
+    def shared(cls, config=None) -> 'CircuitBreaker':
+        """Return the process-wide breaker, applying thresholds from a ScraperConfig if given"""
+        if cls._shared is None:
+            cls._shared = cls()
+        if config is not None:
+            cls._shared.failure_threshold = config.circuit_failure_threshold
+            cls._shared.reset_timeout = config.circuit_reset_timeout
+        return cls._shared
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        return (urlparse(url).hostname or '').lower()
+
+    def _circuit(self, url: str) -> HostCircuit:
+        host = self.get_host(url)
+        if host not in self.hosts:
+            self.hosts[host] = HostCircuit()
+        return self.hosts[host]
+
+    def before_request(self, url: str):
+        circuit = self._circuit(url)
+        if circuit.open_until == 0.0:
+            return
+        now = time.monotonic()
+        if now < circuit.open_until or circuit.trial_in_flight:
+            raise CircuitOpenError(f"{self.get_host(url)} is failing repeatedly; "
+                                   f"retrying in {max(0.0, circuit.open_until - now):.0f}s")
+        circuit.half_open = True
+        circuit.trial_in_flight = True
+
+    def record_success(self, url: str):
+        circuit = self._circuit(url)
+        if circuit.half_open:
+            self.logger.info(f"Circuit for {self.get_host(url)} closed again")
+        self.hosts[self.get_host(url)] = HostCircuit()
+
+    def record_failure(self, url: str):
+        circuit = self._circuit(url)
+        circuit.failures += 1
+        circuit.trial_in_flight = False
+        if circuit.half_open or circuit.failures >= self.failure_threshold:
+            circuit.half_open = False
+            circuit.open_until = time.monotonic() + self.reset_timeout
+            self.logger.warning(f"Circuit for {self.get_host(url)} opened after {circuit.failures} failures")
+
+    def is_open(self, url: str) -> bool:
+        return time.monotonic() < self._circuit(url).open_until
+
+    def cancel_trial(self, url: str):
+        self._circuit(url).trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            host: {'failures': circuit.failures, 'open_for': round(max(0.0, circuit.open_until - now), 1)}
+            for host, circuit in self.hosts.items() if circuit.failures
+        }
+
+
+class RetryPolicy:
+    """Retries transient failures with exponential backoff, full jitter and a per-attempt deadline.
+
+    Only transient failures count against the host's circuit. Errors the host
+    answered with deliberately, like a 404, and 429 throttling leave it
+    unchanged either way.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 attempt_timeout: Optional[float] = None, breaker: Optional[CircuitBreaker] = None,
+                 debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.breaker = breaker or CircuitBreaker.shared()
+
+    def get_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def run(self, url: str, operation: Callable[[], Awaitable[T]],
+                  slot: Optional[Callable[[], AsyncContextManager]] = None) -> T:
+        """Run ``operation`` until it succeeds or fails for good.
+
+        ``slot`` (e.g. ``lambda: scheduler.slot(url)``) is entered around every
+        attempt. The attempt deadline and the circuit breaker only start once it
+        is granted, so time spent queued behind politeness limits or a server's
+        Retry-After never counts as a failure of the host.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with AsyncExitStack() as stack:
+                    if slot:
+                        await stack.enter_async_context(slot())
+                    self.breaker.before_request(url)
+                    try:
+                        if self.attempt_timeout:
+                            result = await asyncio.wait_for(operation(), self.attempt_timeout)
+                        else:
+                            result = await operation()
+                    except BaseException:
+                        self.breaker.cancel_trial(url)
+                        raise
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                retriable = is_retriable(e)
+                # A 429 is the server pacing us, which the scheduler already honours by pausing the host
+                throttled = isinstance(e, FetchError) and e.status == 429
+                if retriable and not throttled:
+                    self.breaker.record_failure(url)
+
+                if not retriable or attempt >= self.max_retries or self.breaker.is_open(url):
+                    if isinstance(e, FetchError):
+                        raise
+                    message = str(e) or type(e).__name__
+                    raise FetchError(url, message, retriable=retriable) from e
+
+                delay = self.get_delay(attempt)
+                attempt += 1
+                self.logger.warning(f"Attempt {attempt} for {url} failed ({str(e) or type(e).__name__}), "
+                                    f"retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success(url)
+                return result
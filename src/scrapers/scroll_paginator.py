@@ -0,0 +1,229 @@
+from playwright.async_api import Page
+from typing import Dict, Any, Optional, List, AsyncIterator
+import logging
+import time
+
+DEFAULT_LOAD_MORE_SELECTORS = [
+    'button:has-text("Load more")',
+    'button:has-text("Show more")',
+    'a:has-text("Load more")',
+    'a:has-text("Show more")',
+    '[data-testid*="load-more"]',
+    '.load-more',
+]
+
+# Starts recording added elements and returns the document as it is at that instant,
+# so no node can fall between the initial snapshot and the first captured step
+CAPTURE_START_SCRIPT = '''
+    () => {
+        const previous = window.__scrollCapture;
+        if (previous) previous.observer.disconnect();
+        const state = window.__scrollCapture = { added: [], mutations: 0, mark: 0, lastMutation: performance.now() };
+        state.observer = new MutationObserver((records) => {
+            for (const record of records) {
+                for (const node of record.addedNodes) {
+                    if (node.nodeType === Node.ELEMENT_NODE) state.added.push(node);
+                }
+            }
+            state.mutations += records.length;
+            state.lastMutation = performance.now();
+        });
+        state.observer.observe(document.body || document.documentElement, { childList: true, subtree: true });
+        const doctype = document.doctype ? '<!DOCTYPE ' + document.doctype.name + '>' : '';
+        return doctype + document.documentElement.outerHTML;
+    }
+'''
+
+ITEM_COUNT_SCRIPT = '''
+    (itemSelector) => itemSelector ? document.querySelectorAll(itemSelector).length : 0
+'''
+
+SCROLL_SCRIPT = '''
+    () => {
+        const state = window.__scrollCapture;
+        if (state) state.mark = state.mutations;
+        const root = document.scrollingElement || document.documentElement;
+        window.scrollTo(0, root.scrollHeight);
+    }
+'''
+
+MARK_SCRIPT = '''
+    () => {
+        const state = window.__scrollCapture;
+        if (state) state.mark = state.mutations;
+    }
+'''
+
+# Resolves true once new nodes have arrived and the DOM has been quiet for quietMs,
+# or with whether anything arrived at all when timeoutMs runs out
+WAIT_FOR_GROWTH_SCRIPT = '''
+    ([quietMs, timeoutMs]) => new Promise((resolve) => {
+        const state = window.__scrollCapture;
+        if (!state) return resolve(false);
+        const start = performance.now();
+        const check = () => {
+            const now = performance.now();
+            const grew = state.mutations > state.mark;
+            if (grew && now - state.lastMutation >= quietMs) return resolve(true);
+            if (now - start >= timeoutMs) return resolve(grew);
+            setTimeout(check, 50);
+        };
+        check();
+    })
+'''
+
+# Serializes only the outermost newly added elements that are still in the document
+DRAIN_SCRIPT = '''
+    (itemSelector) => {
+        const state = window.__scrollCapture;
+        if (!state) return null;
+        const added = new Set(state.added);
+        state.added = [];
+        const skipped = new Set(['SCRIPT', 'STYLE', 'LINK', 'META', 'NOSCRIPT']);
+        const roots = [];
+        for (const node of added) {
+            if (!node.isConnected || skipped.has(node.tagName)) continue;
+            let parent = node.parentNode;
+            let nested = false;
+            while (parent) {
+                if (added.has(parent)) { nested = true; break; }
+                parent = parent.parentNode;
+            }
+            if (!nested) roots.push(node);
+        }
+        let items = roots.length;
+        if (itemSelector) {
+            items = 0;
+            for (const node of roots) {
+                items += (node.matches(itemSelector) ? 1 : 0) + node.querySelectorAll(itemSelector).length;
+            }
+        }
+        return { html: roots.map((node) => node.outerHTML).join('\\n'), nodes: roots.length, items: items };
+    }
+'''
+
+STOP_SCRIPT = '''
+    () => {
+        const state = window.__scrollCapture;
+        if (state) state.observer.disconnect();
+        delete window.__scrollCapture;
+    }
+'''
+
+
+class ScrollPaginator:
+    """Pages through infinite-scroll and "load more" listings one batch at a time.
+
+    Each step clicks a visible load-more control (or scrolls to the bottom when
+    there is none), waits for new nodes to settle and returns only the elements
+    added since the previous step. Stops at ``max_items``, after
+    ``no_growth_steps`` steps without new content, or when ``time_budget`` runs out.
+    """
+
+    def __init__(self, max_items: int = 500, max_steps: int = 50, time_budget: float = 60.0,
+                 no_growth_steps: int = 2, step_wait: float = 2.0, quiet_window: float = 0.5,
+                 load_more_selectors: Optional[List[str]] = None, item_selector: Optional[str] = None,
+                 debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.max_items = max_items
+        self.max_steps = max_steps
+        self.time_budget = time_budget
+        self.no_growth_steps = max(1, no_growth_steps)
+        self.step_wait = step_wait
+        self.quiet_window = quiet_window
+        self.load_more_selectors = load_more_selectors if load_more_selectors is not None else DEFAULT_LOAD_MORE_SELECTORS
+        self.item_selector = item_selector
+
+    @classmethod
+    def from_config(cls, config) -> 'ScrollPaginator':
+        return cls(
+            max_items=config.scroll_max_items,
+            max_steps=config.scroll_max_steps,
+            time_budget=config.scroll_time_budget,
+            no_growth_steps=config.scroll_no_growth_steps,
+            step_wait=config.scroll_step_wait,
+            quiet_window=config.dom_quiet_window,
+            load_more_selectors=config.load_more_selectors,
+            item_selector=config.scroll_item_selector,
+            debug=config.debug,
+        )
+
+    async def start(self, page: Page) -> str:
+        """Begin recording added nodes and return the current document"""
+        return await page.evaluate(CAPTURE_START_SCRIPT)
+
+    async def click_load_more(self, page: Page) -> bool:
+        for selector in self.load_more_selectors:
+            button = page.locator(selector).first
+            try:
+                if await button.count() and await button.is_visible() and await button.is_enabled():
+                    await page.evaluate(MARK_SCRIPT)
+                    await button.click(timeout=self.step_wait * 1000)
+                    self.logger.debug(f"Clicked load-more control {selector}")
+                    return True
+            except Exception as e:
+                self.logger.debug(f"Could not click {selector}: {str(e)}")
+        return False
+
+    async def advance(self, page: Page):
+        if not await self.click_load_more(page):
+            await page.evaluate(SCROLL_SCRIPT)
+
+    async def wait_for_growth(self, page: Page, budget: float) -> bool:
+        return await page.evaluate(WAIT_FOR_GROWTH_SCRIPT,
+                                   [int(self.quiet_window * 1000), int(max(0.0, budget) * 1000)])
+
+    async def drain(self, page: Page) -> Optional[Dict[str, Any]]:
+        return await page.evaluate(DRAIN_SCRIPT, self.item_selector)
+
+    async def iter_steps(self, page: Page, url: str, scheduler=None) -> AsyncIterator[str]:
+        """Yield an HTML fragment with the newly added nodes for every step that grew the page.
+
+        ``start`` must have been called on the page first. Each step is paced by the
+        FetchScheduler when one is given, since it usually triggers requests to the host.
+        """
+        deadline = time.monotonic() + self.time_budget
+        # Without an item selector every new top-level node counts as one item
+        items = await page.evaluate(ITEM_COUNT_SCRIPT, self.item_selector)
+        stalls = 0
+        reason = 'step limit'
+        try:
+            for step in range(1, self.max_steps + 1):
+                if items >= self.max_items:
+                    reason = 'item target'
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    reason = 'time budget'
+                    break
+
+                if scheduler:
+                    async with scheduler.slot(url):
+                        await self.advance(page)
+                        await self.wait_for_growth(page, min(self.step_wait, remaining))
+                else:
+                    await self.advance(page)
+                    await self.wait_for_growth(page, min(self.step_wait, remaining))
+
+                batch = await self.drain(page)
+                if batch is None:
+                    reason = 'page navigated away'
+                    break
+                if not batch['nodes']:
+                    stalls += 1
+                    if stalls >= self.no_growth_steps:
+                        reason = 'no new content'
+                        break
+                    continue
+
+                stalls = 0
+                items += batch['items']
+                self.logger.debug(f"Scroll step {step}: {batch['nodes']} new nodes, {items} items so far")
+                yield f'<div data-scroll-step="{step}">{batch["html"]}</div>'
+        finally:
+            self.logger.info(f"Stopped scrolling {url} ({reason}, {items} items)")
+            try:
+                await page.evaluate(STOP_SCRIPT)
+            except Exception:
+                pass
@@ -0,0 +1,269 @@
+from playwright.async_api import BrowserContext, Page, Route
+from ..utils.content_cache import freshness_lifetime, get_header, FRESHNESS_HEADERS
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Iterable, Tuple, Union
+from urllib.parse import urldefrag
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Site-wide assets that are worth keeping even when the server sends no caching headers
+DEFAULT_CACHED_RESOURCE_TYPES = ['script', 'stylesheet', 'font', 'image']
+
+# Fetched JSON configs and the like are only kept when the server says how long they stay fresh
+EXPLICIT_ONLY_RESOURCE_TYPES = ['fetch', 'xhr']
+
+# Bodies are stored decoded, so headers describing the wire encoding are not replayed
+SKIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+
+@dataclass
+class IndexedResource:
+    stored_at: float
+    ttl: float
+    size: int
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl
+
+
+class SubresourceCache:
+    """Route handler that shares scripts, stylesheets and other assets between contexts.
+
+    Contexts do not share the browser's HTTP cache, so every new context downloads
+    the same framework bundles again. Cacheable GET responses are kept in a SQLite
+    file, keyed by URL, for every context and browser in the process. Fresh
+    entries are served without touching the network. Stale ones are revalidated
+    with their ETag/Last-Modified. The file is kept under ``max_bytes`` by
+    evicting the least recently used entries.
+
+    Which URLs are cached, and how fresh they are, is kept in an in-memory LRU
+    index, so misses never touch the database. Bodies are read and written on a
+    worker thread. Last-use times are only written with the next store, so a hit
+    never commits.
+    """
+
+    _instances: Dict[str, 'SubresourceCache'] = {}
+
+    def __init__(self, cache_dir: str = '.cache', max_bytes: int = 100 * 1024 * 1024,
+                 max_entry_bytes: int = 5 * 1024 * 1024, default_ttl: float = 3600.0,
+                 resource_types: Optional[Iterable[str]] = None, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+        self.resource_types = set(DEFAULT_CACHED_RESOURCE_TYPES if resource_types is None else resource_types)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'subresource_cache.sqlite3')
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS resources (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                ttl REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS resources_last_access ON resources (last_access)')
+        self.conn.commit()
+        self._lock = threading.Lock()
+        # url -> freshness, least recently used first
+        self.index: 'OrderedDict[str, IndexedResource]' = OrderedDict(
+            (url, IndexedResource(stored_at, ttl, size)) for url, stored_at, ttl, size in self.conn.execute(
+                'SELECT url, stored_at, ttl, size FROM resources ORDER BY last_access'))
+        self.total_bytes = sum(entry.size for entry in self.index.values())
+        # url -> last use not yet written to the database
+        self.touched: Dict[str, float] = {}
+        self.reset_stats()
+
+    @classmethod
+    def shared(cls, cache_dir: str, max_bytes: int = 100 * 1024 * 1024, debug: bool = False) -> 'SubresourceCache':
+        """One cache per directory, so every context and browser in the process shares it"""
+        key = os.path.abspath(cache_dir)
+        if key not in cls._instances:
+            cls._instances[key] = cls(cache_dir, max_bytes, debug=debug)
+        return cls._instances[key]
+
+    @classmethod
+    def from_config(cls, config) -> 'SubresourceCache':
+        return cls.shared(config.cache_dir, config.subresource_cache_max_bytes, config.debug)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+    def is_cacheable_request(self, route: Route) -> bool:
+        request = route.request
+        if request.method != 'GET' or not request.url.startswith(('http://', 'https://')):
+            return False
+        return request.resource_type in self.resource_types or request.resource_type in EXPLICIT_ONLY_RESOURCE_TYPES
+
+    def get_ttl(self, resource_type: str, headers: Dict[str, str]) -> Optional[float]:
+        """How long to keep a response, or None when it must not be shared between contexts"""
+        cache_control = (get_header(headers, 'Cache-Control') or '').lower()
+        if 'private' in cache_control or get_header(headers, 'Set-Cookie'):
+            return None
+        vary = (get_header(headers, 'Vary') or '').lower()
+        if vary and vary.replace(' ', '') not in ('accept-encoding', 'origin', 'accept-encoding,origin'):
+            return None
+        default_ttl = self.default_ttl if resource_type in self.resource_types else None
+        return freshness_lifetime(headers, default_ttl)
+
+    def lookup(self, url: str) -> Optional[IndexedResource]:
+        """Freshness of a cached URL from the in-memory index, marking it as recently used"""
+        with self._lock:
+            entry = self.index.get(url)
+            if entry is not None:
+                self.index.move_to_end(url)
+                self.touched[url] = time.time()
+            return entry
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """Status, headers and body of a cached URL; reads only, so call it off the event loop"""
+        with self._lock:
+            row = self.conn.execute('SELECT status, headers, body FROM resources WHERE url = ?',
+                                    (url,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes, ttl: float):
+        if len(body) > self.max_entry_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO resources (url, status, headers, body, stored_at, ttl, last_access, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, status, json.dumps(headers), body, now, ttl, now, len(body)))
+            previous = self.index.pop(url, None)
+            self.total_bytes += len(body) - (previous.size if previous else 0)
+            self.index[url] = IndexedResource(now, ttl, len(body))
+            self.touched.pop(url, None)
+            self._evict()
+            self._write_touched()
+            self.conn.commit()
+            self.stores += 1
+
+    def refresh(self, url: str, headers: Dict[str, str], ttl: Optional[float]):
+        """Mark an entry fresh again after a 304, keeping the updated validators.
+
+        ``ttl`` None means the 304 carried no Cache-Control or Expires, and the
+        entry keeps its previous lifetime.
+        """
+        with self._lock:
+            entry = self.index.get(url)
+            row = self.conn.execute('SELECT headers FROM resources WHERE url = ?', (url,)).fetchone()
+            if entry is None or row is None:
+                return
+            merged = json.loads(row[0])
+            merged.update({k.lower(): v for k, v in headers.items()
+                           if k.lower() in ('etag', 'last-modified', 'date') + FRESHNESS_HEADERS})
+            entry.stored_at = time.time()
+            if ttl is not None:
+                entry.ttl = ttl
+            self.conn.execute('UPDATE resources SET headers = ?, stored_at = ?, ttl = ? WHERE url = ?',
+                              (json.dumps(merged), entry.stored_at, entry.ttl, url))
+            self._write_touched()
+            self.conn.commit()
+
+    def _write_touched(self):
+        if self.touched:
+            self.conn.executemany('UPDATE resources SET last_access = ? WHERE url = ?',
+                                  [(used, url) for url, used in self.touched.items()])
+            self.touched = {}
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.index:
+            url, entry = self.index.popitem(last=False)
+            self.conn.execute('DELETE FROM resources WHERE url = ?', (url,))
+            self.touched.pop(url, None)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+
+    @staticmethod
+    def replay_headers(headers: Dict[str, str]) -> Dict[str, str]:
+        return {k: v for k, v in headers.items() if k.lower() not in SKIPPED_HEADERS}
+
+    async def handle_route(self, route: Route):
+        if not self.is_cacheable_request(route):
+            await route.fallback()
+            return
+
+        request = route.request
+        url = urldefrag(request.url)[0]
+        indexed = self.lookup(url)
+        entry = await asyncio.to_thread(self.get, url) if indexed is not None else None
+        request_headers = None
+        if entry is not None:
+            status, headers, body = entry
+            if indexed.is_fresh():
+                self.hits += 1
+                self.bytes_served += len(body)
+                await route.fulfill(status=status, headers=self.replay_headers(headers), body=body)
+                return
+            conditional = {}
+            if get_header(headers, 'ETag'):
+                conditional['If-None-Match'] = get_header(headers, 'ETag')
+            if get_header(headers, 'Last-Modified'):
+                conditional['If-Modified-Since'] = get_header(headers, 'Last-Modified')
+            if conditional:
+                request_headers = {**request.headers, **conditional}
+
+        try:
+            response = await route.fetch(headers=request_headers)
+        except Exception as e:
+            self.logger.debug(f"Fetching {url} failed: {str(e)}")
+            await route.abort('failed')
+            return
+
+        if response.status == 304 and entry is not None and request_headers is not None:
+            status, headers, body = entry
+            ttl = None
+            if any(k.lower() in FRESHNESS_HEADERS for k in response.headers):
+                merged = {**headers, **{k.lower(): v for k, v in response.headers.items()}}
+                ttl = self.get_ttl(request.resource_type, merged) or 0.0
+            await asyncio.to_thread(self.refresh, url, response.headers, ttl)
+            self.revalidations += 1
+            self.bytes_served += len(body)
+            await route.fulfill(status=status, headers=self.replay_headers(headers), body=body)
+            return
+
+        self.misses += 1
+        body = await response.body()
+        if response.status == 200:
+            ttl = self.get_ttl(request.resource_type, response.headers)
+            # Entries without freshness or validators could never be served again
+            if ttl is not None and (ttl > 0 or get_header(response.headers, 'ETag')
+                                    or get_header(response.headers, 'Last-Modified')):
+                await asyncio.to_thread(self.put, url, response.status, response.headers, body, ttl)
+        await route.fulfill(response=response, body=body)
+
+    async def install(self, target: Union[BrowserContext, Page]):
+        await target.route('**/*', self.handle_route)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'bytes_served': self.bytes_served,
+            'entries': len(self.index),
+            'size_bytes': self.total_bytes,
+        }
@@ -0,0 +1,311 @@
+import aiohttp
+import asyncio
+import logging
+import secrets
+import time
+from aiohttp_socks import ProxyConnector
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+from .exceptions import TorCircuitError
+from ...utils.event_loop import run_on_loop
+
+# Weight of the newest sample in the latency and throughput averages
+EWMA_ALPHA = 0.3
+
+# Seconds within which circuit replacements count as degrading together
+RENEWAL_WINDOW = 60.0
+
+
+class TorCircuit:
+    """One isolated Tor circuit: its own SOCKS credentials and keep-alive session.
+
+    Tor puts streams with different SOCKS usernames/passwords on different circuits
+    (IsolateSOCKSAuth, on by default), so changing the credentials is enough to
+    move to a fresh circuit.
+    """
+
+    def __init__(self, index: int, proxy_host: str, proxy_port: int, max_connections: int):
+        self.index = index
+        self.proxy_host = proxy_host
+        self.proxy_port = proxy_port
+        self.max_connections = max_connections
+        self.generation = 0
+        self.in_flight = 0
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Replaced sessions and the loops they belong to, closed once no request is using them
+        self.retired_sessions: List[Tuple[aiohttp.ClientSession, asyncio.AbstractEventLoop]] = []
+        self.rotate_credentials()
+
+    def rotate_credentials(self):
+        self.generation += 1
+        self.username = f"cyberscraper-{self.index}-{self.generation}"
+        self.password = secrets.token_hex(8)
+        # Requests still running on the old circuit finish before its session is closed
+        self.retire_session()
+        self.created_at = time.monotonic()
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.throughput: Optional[float] = None
+        self.bytes_received = 0
+
+    def retire_session(self):
+        if self.session is not None and not self.session.closed:
+            self.retired_sessions.append((self.session, self.session_loop))
+        self.session = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self.session_loop is not loop:
+            self.retire_session()
+            connector = ProxyConnector.from_url(
+                f'socks5://{self.username}:{self.password}@{self.proxy_host}:{self.proxy_port}',
+                rdns=True, limit=self.max_connections)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self.session_loop = loop
+        return self.session
+
+    def record(self, generation: int, latency: Optional[float], elapsed: float, bytes_received: int, ok: bool):
+        """Account a finished request, unless it ran on credentials that have since been replaced.
+
+        ``latency`` is the time until the response headers arrived, so a large page
+        does not make its circuit look slow; ``elapsed`` also covers reading the body.
+        """
+        if generation != self.generation:
+            return
+        self.requests += 1
+        if not ok:
+            self.failures += 1
+            self.consecutive_failures += 1
+            return
+        self.consecutive_failures = 0
+        self.bytes_received += bytes_received
+        if latency is not None:
+            self.latency = latency if self.latency is None else \
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+        if elapsed > 0 and bytes_received:
+            rate = bytes_received / elapsed
+            self.throughput = rate if self.throughput is None else \
+                EWMA_ALPHA * rate + (1 - EWMA_ALPHA) * self.throughput
+
+    async def close_retired(self, force: bool = False):
+        if self.in_flight and not force:
+            return
+        loop = asyncio.get_running_loop()
+        retired, self.retired_sessions = self.retired_sessions, []
+        for session, session_loop in retired:
+            if session.closed:
+                continue
+            if session_loop is loop:
+                await session.close()
+            else:
+                # A session can only be closed on its own loop; one whose loop has closed took its sockets along
+                run_on_loop(session_loop, session.close())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'circuit': self.index,
+            'generation': self.generation,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'latency_s': round(self.latency, 2) if self.latency is not None else None,
+            'throughput_kbps': round(self.throughput / 1024, 1) if self.throughput is not None else None,
+            'age_s': round(time.monotonic() - self.created_at),
+        }
+
+
+class TorController:
+    """Minimal client for Tor's control port, enough to authenticate and request new circuits"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9051, password: Optional[str] = None,
+                 debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.host = host
+        self.port = port
+        self.password = password
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _send(self, command: str) -> List[str]:
+        self._writer.write(command.encode() + b'\r\n')
+        await self._writer.drain()
+        lines = []
+        while True:
+            raw = await self._reader.readline()
+            if not raw:
+                raise TorCircuitError("Tor control connection closed")
+            line = raw.decode(errors='replace').rstrip('\r\n')
+            lines.append(line)
+            # "250-" continues a reply, "250 " ends it
+            if len(line) >= 4 and line[3] == ' ':
+                break
+        if not lines[-1].startswith('250'):
+            raise TorCircuitError(f"Tor control command failed: {lines[-1]}")
+        return lines
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        info = ' '.join(await self._send('PROTOCOLINFO 1'))
+        if self.password is not None:
+            escaped = self.password.replace('\\', '\\\\').replace('"', '\\"')
+            await self._send(f'AUTHENTICATE "{escaped}"')
+        elif 'COOKIEFILE=' in info and 'COOKIE' in info.split('METHODS=')[-1].split(' ')[0]:
+            cookie_path = info.split('COOKIEFILE="', 1)[1].split('"', 1)[0]
+            with open(cookie_path, 'rb') as f:
+                await self._send(f'AUTHENTICATE {f.read().hex()}')
+        else:
+            await self._send('AUTHENTICATE')
+        self.logger.debug("Authenticated with the Tor control port.")
+
+    async def command(self, command: str) -> List[str]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._writer = None
+        async with self._lock:
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    await self._connect()
+                return await self._send(command)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                self._writer = None
+                raise TorCircuitError(f"Tor control port unavailable: {str(e) or type(e).__name__}") from e
+            except TorCircuitError:
+                # Tor may have rejected authentication, so the next command starts over
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+                raise
+
+    async def new_identity(self):
+        """SIGNAL NEWNYM: new streams stop reusing every existing circuit"""
+        await self.command('SIGNAL NEWNYM')
+
+    async def close(self):
+        if self._writer is not None and self._loop is asyncio.get_running_loop():
+            self._writer.close()
+        self._writer = None
+
+
+class TorCircuitManager:
+    """Spreads onion requests over several isolated circuits and replaces slow or failing ones.
+
+    Each request goes to the circuit with the lowest expected completion time
+    (its average latency times the requests already queued on it). A circuit is
+    replaced after repeated failures, when its average latency passes
+    ``degraded_latency`` or once it is older than ``max_circuit_age``. When most
+    circuits degrade together, NEWNYM is sent over the control port so Tor
+    rebuilds all of them, at most once per ``newnym_interval``.
+    """
+
+    def __init__(self, socks_host: str = '127.0.0.1', socks_port: int = 9050, circuit_count: int = 4,
+                 max_connections: int = 10, degraded_latency: float = 10.0, max_failures: int = 2,
+                 max_circuit_age: float = 600.0, controller: Optional[TorController] = None,
+                 newnym_interval: float = 10.0, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.circuits = [TorCircuit(i, socks_host, socks_port, max_connections)
+                         for i in range(max(1, circuit_count))]
+        self.degraded_latency = degraded_latency
+        self.max_failures = max_failures
+        self.max_circuit_age = max_circuit_age
+        self.controller = controller
+        self.newnym_interval = newnym_interval
+        self.last_newnym = 0.0
+        self.recent_renewals: List[float] = []
+        self.renewals = 0
+        self.newnyms = 0
+
+    @classmethod
+    def from_config(cls, config) -> 'TorCircuitManager':
+        controller = TorController(port=config.control_port, password=config.control_password,
+                                   debug=config.debug) if config.auto_renew_circuit else None
+        return cls(
+            socks_port=config.socks_port,
+            circuit_count=config.circuit_count,
+            max_connections=config.max_connections,
+            degraded_latency=config.circuit_timeout,
+            max_circuit_age=config.max_circuit_age,
+            controller=controller,
+            debug=config.debug,
+        )
+
+    def expected_time(self, circuit: TorCircuit) -> float:
+        known = [c.latency for c in self.circuits if c.latency is not None]
+        # Untried circuits are assumed to be as fast as the best one, so they get measured
+        latency = circuit.latency if circuit.latency is not None else min(known, default=1.0)
+        return latency * (circuit.in_flight + 1)
+
+    def choose(self) -> TorCircuit:
+        return min(self.circuits, key=self.expected_time)
+
+    def degradation(self, circuit: TorCircuit) -> Optional[str]:
+        if circuit.consecutive_failures >= self.max_failures:
+            return f"{circuit.consecutive_failures} failures in a row"
+        if self.degraded_latency and circuit.latency is not None and circuit.latency > self.degraded_latency:
+            return f"average latency {circuit.latency:.1f}s"
+        if self.max_circuit_age and time.monotonic() - circuit.created_at > self.max_circuit_age:
+            return "circuit is old"
+        return None
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[TorCircuit]:
+        """Borrow the best circuit for one request; report its outcome with ``circuit.record``
+
+        Note ``circuit.generation`` before sending, since the circuit may be replaced meanwhile.
+        """
+        circuit = self.choose()
+        circuit.in_flight += 1
+        try:
+            yield circuit
+        finally:
+            circuit.in_flight -= 1
+            await self.maintain(circuit)
+
+    async def maintain(self, circuit: TorCircuit):
+        reason = self.degradation(circuit)
+        if reason:
+            self.logger.info(f"Replacing Tor circuit {circuit.index}: {reason}.")
+            circuit.rotate_credentials()
+            self.renewals += 1
+            now = time.monotonic()
+            self.recent_renewals = [t for t in self.recent_renewals if now - t < RENEWAL_WINDOW] + [now]
+            # Most circuits going bad at once points at Tor's state rather than single relays
+            if self.controller and len(self.recent_renewals) * 2 >= len(self.circuits):
+                await self.renew_all()
+        await circuit.close_retired()
+
+    async def renew_all(self):
+        """Ask Tor for fresh circuits through the control port, rate limited like Tor itself"""
+        if not self.controller or time.monotonic() - self.last_newnym < self.newnym_interval:
+            return False
+        self.last_newnym = time.monotonic()
+        try:
+            await self.controller.new_identity()
+        except TorCircuitError as e:
+            self.logger.warning(str(e))
+            return False
+        self.newnyms += 1
+        self.logger.info("Requested new Tor circuits (NEWNYM).")
+        return True
+
+    async def close(self):
+        for circuit in self.circuits:
+            circuit.retire_session()
+            await circuit.close_retired(force=True)
+        if self.controller:
+            await self.controller.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'renewals': self.renewals,
+            'newnym_signals': self.newnyms,
+            'circuits': [circuit.get_stats() for circuit in self.circuits],
+        }
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable
+from .exceptions import TorConnectionError
+
+# How soon an unhealthy connection, or one that just failed a fetch, is checked again
+RECHECK_INTERVAL = 15.0
+
+
+class TorHealthMonitor:
+    """Cached verdict on whether requests really leave through Tor.
+
+    Fetches call ``ensure``, which answers from the cached state. The first
+    fetch runs the connectivity check itself and starts a monitor task on the
+    same loop (the app's ``BackgroundLoop``), which re-checks whenever the
+    verdict is ``interval`` seconds old, sooner while Tor is unhealthy.
+    Successful onion fetches count as proof that Tor works and push the next
+    check back, so a busy scraper rarely needs a separate check at all.
+    """
+
+    def __init__(self, check: Callable[[], Awaitable[bool]], interval: float = 300.0, ttl: float = 600.0,
+                 recheck_interval: float = RECHECK_INTERVAL, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.check_connection = check
+        self.interval = interval
+        self.ttl = ttl
+        self.recheck_interval = recheck_interval
+        self.healthy: Optional[bool] = None
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.checks = 0
+        self.failed_checks = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._check_task: Optional[asyncio.Task] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def is_fresh(self) -> bool:
+        if self.healthy is None:
+            return False
+        # A failed verdict expires quickly, so the scraper notices when Tor comes back
+        ttl = self.ttl if self.healthy else self.recheck_interval
+        return time.monotonic() - self.checked_at < ttl
+
+    def is_checking(self) -> bool:
+        return self._check_task is not None and not self._check_task.done()
+
+    def is_monitoring(self) -> bool:
+        return self._monitor_task is not None and not self._monitor_task.done()
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tasks started on a previous loop died with it
+            self._loop = loop
+            self._check_task = None
+            self._monitor_task = None
+
+    def start(self):
+        """Start the periodic check on the running loop unless it is already running there"""
+        self._bind_loop()
+        if self.interval and not self.is_monitoring():
+            self._monitor_task = self._loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            delay = self.interval if self.healthy else self.recheck_interval
+            # Successful fetches move checked_at forward, which postpones the next check
+            remaining = self.checked_at + delay - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            await self.check()
+
+    async def ensure(self):
+        """Raise TorConnectionError unless Tor is known to work, checking only when the verdict is stale"""
+        self.start()
+        if not self.is_fresh():
+            await self.check()
+        if not self.healthy:
+            raise TorConnectionError(self.last_error or "Tor connection is unavailable")
+
+    async def check(self) -> bool:
+        """Run the connectivity check now; concurrent callers share a single check"""
+        if self._loop is not asyncio.get_running_loop():
+            self._bind_loop()
+        if self._check_task is None or self._check_task.done():
+            self._check_task = asyncio.get_running_loop().create_task(self._check())
+        return await asyncio.shield(self._check_task)
+
+    async def _check(self) -> bool:
+        self.checks += 1
+        try:
+            await self.check_connection()
+        except TorConnectionError as e:
+            self.failed_checks += 1
+            if self.healthy is not False:
+                self.logger.warning(f"Tor health check failed: {str(e)}")
+            self._set(False, str(e))
+            return False
+        if self.healthy is False:
+            self.logger.info("Tor connection recovered.")
+        self._set(True)
+        return True
+
+    def _set(self, healthy: bool, error: Optional[str] = None):
+        self.healthy = healthy
+        self.last_error = error
+        self.checked_at = time.monotonic()
+
+    def report_success(self):
+        """An onion service answered, which can only happen through Tor"""
+        self._set(True)
+
+    def report_failure(self):
+        """A fetch failed in transport; check Tor in the background instead of failing other fetches on this alone"""
+        self._bind_loop()
+        if self.is_checking():
+            return
+        if self.healthy is not None and time.monotonic() - self.checked_at < self.recheck_interval:
+            return
+        self._check_task = self._loop.create_task(self._check())
+
+    async def close(self):
+        if self._loop is asyncio.get_running_loop():
+            for task in (self._monitor_task, self._check_task):
+                if task is not None and not task.done():
+                    task.cancel()
+        self._check_task = None
+        self._monitor_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'status': 'unknown' if self.healthy is None else 'healthy' if self.healthy else 'unhealthy',
+            'checked_s_ago': round(time.monotonic() - self.checked_at) if self.healthy is not None else None,
+            'checking': self.is_checking(),
+            'monitoring': self.is_monitoring(),
+            'checks': self.checks,
+            'failed_checks': self.failed_checks,
+            'last_error': self.last_error,
+        }
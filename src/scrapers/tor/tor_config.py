@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 @dataclass
 class TorConfig:
@@ -13,6 +13,21 @@ class TorConfig:
     auto_renew_circuit: bool = True
     verify_connection: bool = True
     user_agents: List[str] = None
+    use_cache: bool = True
+    cache_dir: str = '.cache'
+    cache_ttl: float = 900.0
+    cache_max_bytes: int = 200 * 1024 * 1024
+    max_connections: int = 10
+    # Requests are spread over this many isolated circuits (distinct SOCKS credentials)
+    circuit_count: int = 4
+    max_circuit_age: float = 600.0
+    control_password: Optional[str] = None
+    # Fetches use the cached verdict, which a background task re-checks every health_check_interval seconds
+    health_check_interval: float = 300.0
+    health_check_ttl: float = 600.0
+    # Onion pages are cut off, not failed, past this many (decompressed) bytes or seconds
+    max_page_bytes: int = 5 * 1024 * 1024
+    max_download_seconds: float = 120.0
     
     def __post_init__(self):
         if self.user_agents is None:
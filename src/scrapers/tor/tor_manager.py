@@ -1,30 +1,155 @@
-import requests
+import aiohttp
+import asyncio
+import codecs
 import random
 import logging
-import socket
-import socks
-from typing import Dict, Optional
+import re
+import time
+from aiohttp_socks import ProxyError, ProxyConnectionError, ProxyTimeoutError
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple, Callable, AsyncIterator
 from urllib.parse import urlparse
 from .tor_config import TorConfig
+from .circuit_manager import TorCircuitManager
+from .health_monitor import TorHealthMonitor
+from ..exceptions import FetchError
+from ..retry_policy import RETRIABLE_STATUS
+from ...utils.fetch_scheduler import FetchScheduler
 from .exceptions import (
-    TorConnectionError, 
-    TorInitializationError, 
+    TorConnectionError,
+    TorInitializationError,
     OnionServiceError,
     TorProxyError
 )
 
+# aiohttp-socks raises these side by side; none of them derives from another
+PROXY_ERRORS = (ProxyError, ProxyConnectionError, ProxyTimeoutError)
+
+@dataclass
+class TorResponse:
+    """A fully read onion response"""
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    text: str = ''
+    # Why the download stopped early, e.g. 'size limit'; None for a complete page
+    truncated: Optional[str] = None
+
+
+def response_charset(headers: Dict[str, str], head: bytes) -> str:
+    """Charset from the Content-Type header, else a <meta> tag near the start of the page, else UTF-8"""
+    match = re.search(r'charset=["\']?([\w.:-]+)', headers.get('Content-Type', ''), re.I)
+    charset = match.group(1) if match else None
+    if charset is None:
+        match = re.search(rb'<meta[^>]+charset=["\']?([\w.:-]+)', head[:4096], re.I)
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return 'utf-8'
+
+
+class TorStream:
+    """An onion response read chunk by chunk, within a size and time budget.
+
+    aiohttp inflates gzip/deflate bodies as they arrive and ``iter_text`` decodes
+    the charset incrementally, so the page is never held whole. When the budget
+    runs out, or the circuit drops part way through, reading stops and
+    ``truncated`` says why instead of the fetch failing.
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse, stack: AsyncExitStack, max_bytes: int,
+                 max_seconds: float, on_finish: Callable[[int, bool], None]):
+        self.url = str(response.url)
+        self.status = response.status
+        self.headers = dict(response.headers)
+        self.max_bytes = max_bytes
+        self.deadline = time.monotonic() + max_seconds
+        self.bytes_received = 0
+        self.truncated: Optional[str] = None
+        self._response = response
+        self._stack = stack
+        self._on_finish = on_finish
+        self._finished = False
+        self._first: Optional[bytes] = None
+
+    def _finish(self, ok: bool, truncated: Optional[str] = None):
+        self.truncated = self.truncated or truncated
+        if not self._finished:
+            self._finished = True
+            self._on_finish(self.bytes_received, ok)
+
+    async def _read(self) -> bytes:
+        """Next chunk of the decompressed body, b'' once the page is complete or cut off"""
+        if self._finished:
+            return b''
+        try:
+            chunk = await asyncio.wait_for(self._response.content.readany(),
+                                           max(self.deadline - time.monotonic(), 0))
+        except (*PROXY_ERRORS, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if time.monotonic() >= self.deadline:
+                self._finish(True, 'time limit')
+                return b''
+            if self.bytes_received:
+                self._finish(False, 'connection lost')
+                return b''
+            self._finish(False)
+            raise FetchError(self.url, f"Tor connection failed: {str(e) or type(e).__name__}",
+                             retriable=True) from e
+        if not chunk:
+            self._finish(True)
+            return b''
+        if self.bytes_received + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.bytes_received]
+            self.bytes_received += len(chunk)
+            self._finish(True, 'size limit')
+            return chunk
+        self.bytes_received += len(chunk)
+        return chunk
+
+    async def prefetch(self):
+        """Read the first chunk, so a circuit that fails before sending anything raises here"""
+        self._first = await self._read()
+
+    async def iter_text(self) -> AsyncIterator[str]:
+        decoder = None
+        while True:
+            chunk, self._first = (self._first if self._first is not None else await self._read()), None
+            if not chunk:
+                break
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(response_charset(self.headers, chunk))(errors='replace')
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        if decoder is not None:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+
+    async def close(self):
+        # A reader that stopped early still got an answer from the circuit
+        self._finish(True)
+        await self._stack.aclose()
+
+    async def __aenter__(self) -> 'TorStream':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
 class TorManager:
     def __init__(self, config: TorConfig = TorConfig()):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG if config.debug else logging.INFO)
         self.config = config
+        self.scheduler = FetchScheduler.shared()
         self._setup_logging()
-        # Store proxy configuration without applying globally
-        self.proxies = {
-            'http': f'socks5h://127.0.0.1:{self.config.socks_port}',
-            'https': f'socks5h://127.0.0.1:{self.config.socks_port}'
-        }
-        
+        self.circuits = TorCircuitManager.from_config(config)
+        self.health = TorHealthMonitor(self.verify_tor_connection, config.health_check_interval,
+                                       config.health_check_ttl, debug=config.debug)
+
     def _setup_logging(self):
         handler = logging.StreamHandler()
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -47,29 +172,33 @@ class TorManager:
             'Sec-Fetch-User': '?1'
         }
 
-    def get_tor_session(self) -> requests.Session:
-        """Create a requests session that routes through Tor"""
-        session = requests.Session()
-        session.proxies = self.proxies
-        session.headers = self.get_headers()
-        return session
+    def get_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.config.timeout)
+
+    def get_stream_timeout(self) -> aiohttp.ClientTimeout:
+        # Streamed bodies are bounded by max_download_seconds, so only connecting and stalls time out here
+        return aiohttp.ClientTimeout(total=None, connect=self.config.timeout, sock_read=self.config.timeout)
+
+    async def close(self):
+        await self.health.close()
+        await self.circuits.close()
 
     async def verify_tor_connection(self) -> bool:
         """Verify Tor connection is working"""
         try:
-            session = self.get_tor_session()
-            response = session.get('https://check.torproject.org/api/ip', 
-                                 timeout=self.config.timeout)
-            is_tor = response.json().get('IsTor', False)
-            
-            if is_tor:
-                self.logger.info("Successfully connected to Tor network")
-                return True
-            else:
-                raise TorConnectionError("Connection is not using Tor network")
-                
-        except Exception as e:
-            raise TorConnectionError(f"Failed to verify Tor connection: {str(e)}")
+            async with self.circuits.lease() as circuit:
+                async with circuit.get_session().get('https://check.torproject.org/api/ip',
+                                                     headers=self.get_headers(),
+                                                     timeout=self.get_timeout()) as response:
+                    data = await response.json(content_type=None)
+            is_tor = data.get('IsTor', False)
+        except (aiohttp.ClientError, *PROXY_ERRORS, asyncio.TimeoutError, ValueError) as e:
+            raise TorConnectionError(f"Failed to verify Tor connection: {str(e) or type(e).__name__}")
+
+        if is_tor:
+            self.logger.info("Successfully connected to Tor network")
+            return True
+        raise TorConnectionError("Connection is not using Tor network")
 
     @staticmethod
     def is_onion_url(url: str) -> bool:
@@ -80,24 +209,91 @@ class TorManager:
         except Exception:
             return False
 
+    async def revalidate(self, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str]]:
+        """Send a conditional request for a cached onion page"""
+        async with self.scheduler.slot(url), self.circuits.lease() as circuit:
+            async with circuit.get_session().get(url, headers={**self.get_headers(), **headers},
+                                                 timeout=self.get_timeout()) as response:
+                self.scheduler.report(url, response.status, response.headers)
+                return response.status, dict(response.headers)
+
     async def fetch_content(self, url: str) -> str:
         """Fetch content from an onion site"""
+        response = await self.fetch_response(url)
+        return response.text
+
+    async def ensure_connection(self):
+        """Raise TorConnectionError unless Tor is known to work (when verify_connection is on)"""
+        if self.config.verify_connection:
+            await self.health.ensure()
+
+    async def fetch_response(self, url: str, verify: bool = True) -> TorResponse:
+        """Fetch a whole onion page, keeping the response headers for caching"""
+        async with await self.open_stream(url, verify) as stream:
+            text = ''.join([chunk async for chunk in stream.iter_text()])
+        if stream.truncated:
+            self.logger.warning(f"Stopped reading {url} after {stream.bytes_received} bytes ({stream.truncated})")
+        else:
+            self.logger.info(f"Successfully fetched content from {url}")
+        return TorResponse(url=stream.url, status=stream.status, headers=stream.headers, text=text,
+                           truncated=stream.truncated)
+
+    async def open_stream(self, url: str, verify: bool = True) -> TorStream:
+        """Start downloading an onion page; read it with ``iter_text`` and close the stream when done.
+
+        ``verify=False`` skips the connection check for callers that ran ``ensure_connection`` already.
+        """
         if not self.is_onion_url(url):
             raise OnionServiceError("URL is not a valid onion service")
 
+        if verify:
+            await self.ensure_connection()
+
+        # The scheduler slot and circuit lease are held until the stream is closed
+        stack = AsyncExitStack()
         try:
-            session = self.get_tor_session()
-            
-            if self.config.verify_connection:
-                await self.verify_tor_connection()
-            
-            response = session.get(url, timeout=self.config.timeout)
-            response.raise_for_status()
-            
-            self.logger.info(f"Successfully fetched content from {url}")
-            return response.text
-            
-        except requests.RequestException as e:
-            raise OnionServiceError(f"Failed to fetch onion content: {str(e)}")
-        except Exception as e:
-            raise TorException(f"Unexpected error fetching onion content: {str(e)}")
\ No newline at end of file
+            await stack.enter_async_context(self.scheduler.slot(url))
+            circuit = await stack.enter_async_context(self.circuits.lease())
+            generation = circuit.generation
+            started = time.monotonic()
+            # Time to the response headers, which is what circuit latency is judged by
+            latency = None
+
+            def on_finish(bytes_received: int, ok: bool):
+                circuit.record(generation, latency, time.monotonic() - started, bytes_received, ok)
+                if ok:
+                    self.health.report_success()
+                else:
+                    self.health.report_failure()
+
+            try:
+                response = await stack.enter_async_context(
+                    circuit.get_session().get(url, headers=self.get_headers(), timeout=self.get_stream_timeout()))
+            except (*PROXY_ERRORS, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                on_finish(0, False)
+                # Circuits and relays fail transiently, so these are worth another attempt
+                raise FetchError(url, f"Tor connection failed: {str(e) or type(e).__name__}", retriable=True) from e
+            except aiohttp.ClientError as e:
+                raise OnionServiceError(f"Failed to fetch onion content: {str(e)}") from e
+            latency = time.monotonic() - started
+
+            self.scheduler.report(url, response.status, response.headers)
+            if response.status >= 400:
+                # An HTTP error still means the circuit delivered an answer
+                on_finish(0, True)
+                raise FetchError(url, f"HTTP {response.status}", status=response.status,
+                                 retriable=response.status in RETRIABLE_STATUS)
+
+            stream = TorStream(response, stack, self.config.max_page_bytes, self.config.max_download_seconds,
+                               on_finish)
+            await stream.prefetch()
+            return stream
+        except BaseException:
+            await stack.aclose()
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.circuits.get_stats()
+
+    def get_health(self) -> Dict[str, Any]:
+        return self.health.get_stats()
@@ -1,12 +1,17 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, AsyncIterator, Awaitable, Callable, TypeVar
 from .tor_manager import TorManager
 from .tor_config import TorConfig
-from .exceptions import TorException
+from .exceptions import TorException, OnionServiceError
 from ..base_scraper import BaseScraper
+from ..exceptions import FetchError
+from ..retry_policy import RetryPolicy
+from ...utils.content_cache import ContentCache
 from bs4 import BeautifulSoup
 import logging
 from urllib.parse import urlparse
 
+T = TypeVar('T')
+
 class TorScraper(BaseScraper):
     """Scraper implementation for Tor hidden services"""
     
@@ -15,6 +20,10 @@ class TorScraper(BaseScraper):
         self.logger.setLevel(logging.DEBUG if config.debug else logging.INFO)
         self.tor_manager = TorManager(config)
         self.config = config
+        self.content_cache = ContentCache.shared(config.cache_dir, config.cache_ttl, config.cache_max_bytes,
+                                                 config.debug) if config.use_cache else None
+        # The Tor session enforces config.timeout itself, so attempts get no extra deadline
+        self.retry_policy = RetryPolicy(max_retries=config.max_retries, debug=config.debug)
 
     @staticmethod
     def is_onion_url(url: str) -> bool:
@@ -25,19 +34,92 @@ class TorScraper(BaseScraper):
         except Exception:
             return False
 
+    async def retry_with_tor(self, url: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """Run ``operation`` under the retry policy once Tor itself is known to work.
+
+        The check raises TorConnectionError outside the attempts, so a local Tor
+        outage never counts as a failure of the onion host's circuit.
+        """
+        await self.tor_manager.ensure_connection()
+        return await self.retry_policy.run(url, operation)
+
     async def fetch_content(self, url: str, proxy: str = None) -> str:
         """Fetch content from an onion site"""
         try:
             if not self.is_onion_url(url):
                 raise ValueError("Not an onion URL")
 
+            if self.content_cache:
+                cached = await self.content_cache.lookup(url, {'renderer': 'tor'}, self.tor_manager.revalidate)
+                if cached is not None:
+                    self.logger.info(f"Serving {url} from cache")
+                    return cached.text
+
             # Use Tor manager to fetch content
-            content = await self.tor_manager.fetch_content(url)
-            return content
+            try:
+                response = await self.retry_with_tor(url, lambda: self.tor_manager.fetch_response(url, verify=False))
+            except FetchError as e:
+                raise OnionServiceError(str(e)) from e
+            # A cut-off page would be served as if it were complete
+            if self.content_cache and not response.truncated:
+                await self.content_cache.store(url, response.text, dict(response.headers), {'renderer': 'tor'})
+            return response.text
         except Exception as e:
             self.logger.error(f"Error fetching onion content: {str(e)}")
             raise
 
+    async def iter_content(self, url: str, download: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Yield an onion page as decoded text chunks while it downloads.
+
+        ``download`` is filled with the number of bytes read and, when the page
+        was cut off by the size or time limit, the reason in ``truncated``.
+        """
+        if not self.is_onion_url(url):
+            raise ValueError("Not an onion URL")
+        download = download if download is not None else {}
+
+        if self.content_cache:
+            cached = await self.content_cache.lookup(url, {'renderer': 'tor'}, self.tor_manager.revalidate)
+            if cached is not None:
+                self.logger.info(f"Serving {url} from cache")
+                download.update(bytes=len(cached.text), truncated=None)
+                yield cached.text
+                return
+
+        try:
+            stream = await self.retry_with_tor(url, lambda: self.tor_manager.open_stream(url, verify=False))
+        except FetchError as e:
+            self.logger.error(f"Error fetching onion content: {str(e)}")
+            raise OnionServiceError(str(e)) from e
+
+        # Only pages that fit the limits are cached, and those are at most max_page_bytes
+        texts = [] if self.content_cache else None
+        async with stream:
+            async for text in stream.iter_text():
+                if texts is not None:
+                    texts.append(text)
+                yield text
+        download.update(bytes=stream.bytes_received, truncated=stream.truncated)
+        if stream.truncated:
+            self.logger.warning(f"Stopped reading {url} after {stream.bytes_received} bytes ({stream.truncated})")
+        elif texts is not None:
+            await self.content_cache.store(url, ''.join(texts), stream.headers, {'renderer': 'tor'})
+
+    async def close(self):
+        await self.tor_manager.close()
+
+    def get_health(self) -> Dict[str, Any]:
+        """Last Tor connectivity verdict; reads cached state only, so it is safe to call from the UI thread"""
+        return self.tor_manager.get_health()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Fetch statistics for display in the app"""
+        stats = {'circuit_breaker': self.retry_policy.breaker.get_stats(), 'tor_circuits': self.tor_manager.get_stats(),
+                 'tor_health': self.tor_manager.get_health()}
+        if self.content_cache:
+            stats['cache'] = self.content_cache.get_stats()
+        return stats
+
     async def extract(self, content: str) -> Dict[str, Any]:
         """Extract data from the fetched content"""
         try:
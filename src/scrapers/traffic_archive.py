@@ -0,0 +1,218 @@
+from playwright.async_api import Route, BrowserContext, Page
+from typing import Dict, Any, Optional, List, Tuple, Union
+from datetime import datetime, timezone
+from urllib.parse import urldefrag, urlparse, parse_qsl
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+
+HAR_MODES = ('record', 'replay')
+
+# Bodies are stored decoded, so transport headers describing the wire encoding are dropped on replay
+SKIPPED_REPLAY_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+TEXT_MIME_MARKERS = ('text/', 'json', 'javascript', 'xml', 'html', 'csv', 'svg')
+
+EntryKey = Tuple[str, str, str]
+
+
+class TrafficArchive:
+    """Records a browser session's network traffic to a HAR file and serves it back.
+
+    In ``record`` mode every request is fetched from the network through
+    ``context.route`` and stored; in ``replay`` mode requests are answered from
+    the archive and anything missing is aborted, so runs are fully offline and
+    their timings do not depend on remote servers.
+    """
+
+    def __init__(self, path: str, mode: str = 'replay', debug: bool = False):
+        if mode not in HAR_MODES:
+            raise ValueError(f"Unknown HAR mode {mode!r}, expected one of {HAR_MODES}")
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.path = path
+        self.mode = mode
+        self.entries: List[Dict[str, Any]] = []
+        self.index: Dict[EntryKey, List[Dict[str, Any]]] = {}
+        self.replay_positions: Dict[EntryKey, int] = {}
+        self.dirty = False
+        self.reset_stats()
+
+        if os.path.exists(path):
+            self.load()
+        elif mode == 'replay':
+            raise FileNotFoundError(f"HAR archive not found: {path}")
+
+    @classmethod
+    def from_config(cls, config) -> 'TrafficArchive':
+        if not config.har_path:
+            raise ValueError("har_path must be set when har_mode is used")
+        return cls(config.har_path, config.har_mode, debug=config.debug)
+
+    def reset_stats(self):
+        self.requests_recorded = 0
+        self.requests_replayed = 0
+        self.requests_missing = 0
+
+    @staticmethod
+    def make_key(method: str, url: str, post_data: Optional[bytes] = None) -> EntryKey:
+        body_hash = hashlib.sha1(post_data).hexdigest() if post_data else ''
+        return (method.upper(), urldefrag(url)[0], body_hash)
+
+    @staticmethod
+    def encode_body(body: bytes, mime_type: str) -> Dict[str, Any]:
+        content = {'size': len(body), 'mimeType': mime_type}
+        if any(marker in mime_type for marker in TEXT_MIME_MARKERS):
+            try:
+                content['text'] = body.decode('utf-8')
+                return content
+            except UnicodeDecodeError:
+                pass
+        content['text'] = base64.b64encode(body).decode('ascii')
+        content['encoding'] = 'base64'
+        return content
+
+    @staticmethod
+    def decode_body(content: Dict[str, Any]) -> bytes:
+        text = content.get('text', '')
+        if content.get('encoding') == 'base64':
+            return base64.b64decode(text)
+        return text.encode('utf-8')
+
+    def _index_entry(self, entry: Dict[str, Any]):
+        request = entry['request']
+        post_data = request.get('postData', {}).get('text')
+        key = self.make_key(request['method'], request['url'], post_data.encode('utf-8') if post_data else None)
+        self.index.setdefault(key, []).append(entry)
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            har = json.load(f)
+        self.entries = har.get('log', {}).get('entries', [])
+        self.index = {}
+        for entry in self.entries:
+            self._index_entry(entry)
+        self.logger.info(f"Loaded {len(self.entries)} archived requests from {self.path}")
+
+    def save(self):
+        if self.mode != 'record' or not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        har = {
+            'log': {
+                'version': '1.2',
+                'creator': {'name': 'CyberScraper 2077', 'version': '1.0'},
+                'entries': self.entries,
+            }
+        }
+        # Write to a temporary file first so an interrupted save never leaves a truncated archive
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(har, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        self.logger.info(f"Saved {len(self.entries)} requests to {self.path}")
+
+    def add_entry(self, method: str, url: str, status: int, headers: List[Dict[str, str]], body: bytes,
+                  request_headers: Optional[List[Dict[str, str]]] = None, post_data: Optional[bytes] = None,
+                  status_text: str = '', elapsed: float = 0.0):
+        """Append one request/response pair to the archive"""
+        mime_type = next((h['value'] for h in headers if h['name'].lower() == 'content-type'), '')
+        location = next((h['value'] for h in headers if h['name'].lower() == 'location'), '')
+        request = {
+            'method': method.upper(),
+            'url': url,
+            'httpVersion': 'HTTP/1.1',
+            'headers': request_headers or [],
+            'queryString': [{'name': k, 'value': v} for k, v in parse_qsl(urlparse(url).query)],
+            'cookies': [],
+            'headersSize': -1,
+            'bodySize': len(post_data) if post_data else 0,
+        }
+        if post_data:
+            request['postData'] = {'mimeType': '', 'text': post_data.decode('utf-8', errors='replace')}
+        entry = {
+            'startedDateTime': datetime.now(timezone.utc).isoformat(),
+            'time': round(elapsed * 1000, 1),
+            'request': request,
+            'response': {
+                'status': status,
+                'statusText': status_text,
+                'httpVersion': 'HTTP/1.1',
+                'headers': headers,
+                'cookies': [],
+                'content': self.encode_body(body, mime_type),
+                'redirectURL': location,
+                'headersSize': -1,
+                'bodySize': len(body),
+            },
+            'cache': {},
+            'timings': {'send': 0, 'wait': round(elapsed * 1000, 1), 'receive': 0},
+        }
+        self.entries.append(entry)
+        self._index_entry(entry)
+        self.requests_recorded += 1
+        self.dirty = True
+
+    def lookup(self, method: str, url: str, post_data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+        """Return the archived entry for a request; repeated requests step through repeated recordings"""
+        key = self.make_key(method, url, post_data)
+        candidates = self.index.get(key)
+        if not candidates:
+            return None
+        position = self.replay_positions.get(key, 0)
+        self.replay_positions[key] = position + 1
+        return candidates[min(position, len(candidates) - 1)]
+
+    @staticmethod
+    def get_replay_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        for header in entry['response']['headers']:
+            name = header['name'].lower()
+            if name in SKIPPED_REPLAY_HEADERS:
+                continue
+            # Playwright expects repeated headers such as set-cookie joined by newlines
+            headers[name] = f"{headers[name]}\n{header['value']}" if name in headers else header['value']
+        return headers
+
+    async def handle_route(self, route: Route):
+        request = route.request
+        if self.mode == 'replay':
+            entry = self.lookup(request.method, request.url, request.post_data_buffer)
+            if entry is None:
+                self.requests_missing += 1
+                self.logger.debug(f"Not in archive, aborting: {request.method} {request.url}")
+                await route.abort('internetdisconnected')
+                return
+            self.requests_replayed += 1
+            await route.fulfill(status=entry['response']['status'],
+                                headers=self.get_replay_headers(entry),
+                                body=self.decode_body(entry['response']['content']))
+            return
+
+        started = time.monotonic()
+        # Redirects are recorded hop by hop so the browser sees the same URLs on replay
+        response = await route.fetch(max_redirects=0)
+        body = await response.body()
+        self.add_entry(request.method, request.url, response.status, response.headers_array, body,
+                       request_headers=await request.headers_array(), post_data=request.post_data_buffer,
+                       status_text=response.status_text, elapsed=time.monotonic() - started)
+        await route.fulfill(response=response, body=body)
+
+    async def install(self, target: Union[BrowserContext, Page]):
+        await target.route('**/*', self.handle_route)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'path': self.path,
+            'entries': len(self.entries),
+            'requests_recorded': self.requests_recorded,
+            'requests_replayed': self.requests_replayed,
+            'requests_missing': self.requests_missing,
+        }
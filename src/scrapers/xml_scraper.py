@@ -0,0 +1,62 @@
+import xml.etree.ElementTree as ET
+from collections import Counter
+from .base_scraper import BaseScraper
+from typing import Dict, Any, List, Optional
+
+class XMLScraper(BaseScraper):
+    async def fetch_content(self, url: str, proxy: str = None) -> str:
+        raise NotImplementedError("XML content is fetched by HTTPScraper")
+
+    async def extract(self, content: str) -> Dict[str, Any]:
+        try:
+            return self.parse(content)
+        except ET.ParseError:
+            return {"error": "Invalid XML content"}
+
+    def parse(self, content: str) -> Dict[str, Any]:
+        """Like extract, but raises ET.ParseError for malformed XML"""
+        # Parsing the decoded string keeps a stale encoding declaration from garbling the text
+        root = ET.fromstring(content.lstrip('\ufeff'))
+        for element in root.iter():
+            element.tag = self.local_name(element.tag)
+        return {'root': root.tag, 'records': [self.to_record(item) for item in self.find_items(root)]}
+
+    @staticmethod
+    def local_name(tag: Any) -> str:
+        # Drops '{namespace}' prefixes so Atom, RSS and sitemap tags read the same
+        return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+    def find_items(self, root: ET.Element) -> List[ET.Element]:
+        """RSS items and Atom entries, otherwise the most repeated sibling elements"""
+        items = root.findall('./channel/item') or root.findall('./item') or root.findall('./entry')
+        if items:
+            return items
+
+        best: Optional[List[ET.Element]] = None
+        for parent in root.iter():
+            counts = Counter(child.tag for child in parent)
+            if not counts:
+                continue
+            tag, count = counts.most_common(1)[0]
+            if count > 1 and (best is None or count > len(best)):
+                best = [child for child in parent if child.tag == tag]
+        return best or [root]
+
+    def to_record(self, element: ET.Element) -> Dict[str, Any]:
+        record: Dict[str, Any] = {f'@{key}': value for key, value in element.attrib.items()}
+        for child in element:
+            if len(child):
+                value: Any = self.to_record(child)
+            else:
+                # Atom links keep their target in an attribute
+                value = (child.text or '').strip() or child.attrib.get('href', '')
+            if child.tag in record:
+                if not isinstance(record[child.tag], list):
+                    record[child.tag] = [record[child.tag]]
+                record[child.tag].append(value)
+            else:
+                record[child.tag] = value
+        text = (element.text or '').strip()
+        if text and not len(element):
+            record['text'] = text
+        return record
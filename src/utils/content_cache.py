@@ -0,0 +1,250 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+from email.utils import parsedate_to_datetime
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from .url_utils import normalize_url
+
+# Response headers that change how long an entry stays fresh
+FRESHNESS_HEADERS = ('cache-control', 'expires')
+
+# revalidate(url, conditional_headers) -> (status, response_headers)
+Revalidator = Callable[[str, Dict[str, str]], Awaitable[Tuple[int, Dict[str, str]]]]
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    stored_at: float = 0.0
+    ttl: float = 0.0
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        etag = get_header(self.headers, 'ETag')
+        last_modified = get_header(self.headers, 'Last-Modified')
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+def get_header(headers: Dict[str, str], name: str) -> Optional[str]:
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def freshness_lifetime(headers: Dict[str, str], default_ttl: Optional[float]) -> Optional[float]:
+    """Seconds a response stays fresh per Cache-Control/Expires, ``default_ttl`` when they say nothing.
+
+    None means the response must not be stored.
+    """
+    cache_control = (get_header(headers, 'Cache-Control') or '').lower()
+    if 'no-store' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return 0.0
+    match = re.search(r'(?:s-maxage|max-age)=(\d+)', cache_control)
+    if match:
+        return float(match.group(1))
+    expires = get_header(headers, 'Expires')
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+    return default_ttl
+
+
+class ContentCache:
+    """On-disk cache of fetched pages with HTTP validators and LRU eviction.
+
+    Bodies are zlib-compressed in a SQLite file. Freshness follows the response's
+    Cache-Control header, falling back to ``default_ttl``. Stale entries that carry
+    an ETag or Last-Modified are revalidated with a conditional request before
+    being refetched. The async ``lookup`` and ``store`` run the SQLite work in a
+    worker thread, so disk writes never stall the event loop.
+    """
+
+    _instances: Dict[str, 'ContentCache'] = {}
+
+    def __init__(self, cache_dir: str = '.cache', default_ttl: float = 900.0,
+                 max_bytes: int = 200 * 1024 * 1024, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'content_cache.sqlite3')
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        # The connection is shared by the worker threads that lookup() and store() run on
+        self._lock = threading.Lock()
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                headers TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                ttl REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @classmethod
+    def shared(cls, cache_dir: str, default_ttl: float = 900.0, max_bytes: int = 200 * 1024 * 1024,
+               debug: bool = False) -> 'ContentCache':
+        """One cache object per directory, so scrapers pointing at the same directory share stats"""
+        key = os.path.abspath(cache_dir)
+        if key not in cls._instances:
+            cls._instances[key] = cls(cache_dir, default_ttl, max_bytes, debug)
+        return cls._instances[key]
+
+    @staticmethod
+    def make_key(url: str, options: Optional[Dict[str, Any]] = None) -> str:
+        raw = normalize_url(url) + '|' + json.dumps(options or {}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get_ttl(self, headers: Dict[str, str]) -> Optional[float]:
+        """TTL from Cache-Control/Expires; None means the response must not be stored"""
+        return freshness_lifetime(headers, self.default_ttl)
+
+    def get(self, url: str, options: Optional[Dict[str, Any]] = None) -> Optional[CacheEntry]:
+        key = self.make_key(url, options)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT url, body, headers, stored_at, ttl FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        return CacheEntry(url=row[0], text=zlib.decompress(row[1]).decode('utf-8'),
+                          headers=json.loads(row[2]), stored_at=row[3], ttl=row[4])
+
+    def put(self, url: str, text: str, headers: Optional[Dict[str, str]] = None,
+            options: Optional[Dict[str, Any]] = None):
+        headers = headers or {}
+        ttl = self.get_ttl(headers)
+        if ttl is None:
+            return
+        body = zlib.compress(text.encode('utf-8'), 6)
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (key, url, body, headers, stored_at, ttl, last_access, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.make_key(url, options), url, body, json.dumps(headers), now, ttl, now, len(body)))
+            self.conn.commit()
+            self.stores += 1
+            self._evict()
+
+    async def store(self, url: str, text: str, headers: Optional[Dict[str, str]] = None,
+                    options: Optional[Dict[str, Any]] = None):
+        """``put`` on a worker thread, for callers on the event loop"""
+        await asyncio.to_thread(self.put, url, text, headers, options)
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str], options: Optional[Dict[str, Any]] = None):
+        """Mark an entry fresh again after a 304, merging the updated validators.
+
+        A 304 without Cache-Control or Expires keeps the entry's previous lifetime;
+        recomputing it from the stored headers would find an Expires date that has
+        already passed, and every later read would revalidate again.
+        """
+        merged = dict(entry.headers)
+        merged.update({k: v for k, v in headers.items()
+                       if k.lower() in ('etag', 'last-modified', 'date') + FRESHNESS_HEADERS})
+        if any(k.lower() in FRESHNESS_HEADERS for k in headers):
+            ttl = self.get_ttl(merged) or 0.0
+        else:
+            ttl = entry.ttl
+        entry.headers, entry.stored_at, entry.ttl = merged, time.time(), ttl
+        with self._lock:
+            self.conn.execute('UPDATE entries SET headers = ?, stored_at = ?, ttl = ? WHERE key = ?',
+                              (json.dumps(merged), entry.stored_at, ttl, self.make_key(entry.url, options)))
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            total -= size
+            self.evictions += 1
+        self.conn.commit()
+
+    async def lookup(self, url: str, options: Optional[Dict[str, Any]] = None,
+                     revalidate: Optional[Revalidator] = None) -> Optional[CacheEntry]:
+        """Return the cached entry if it is fresh or still valid upstream, else None"""
+        entry = await asyncio.to_thread(self.get, url, options)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.is_fresh():
+            self.hits += 1
+            self.logger.debug(f"Cache hit: {url}")
+            return entry
+
+        conditional = entry.conditional_headers()
+        if revalidate and conditional:
+            try:
+                status, headers = await revalidate(url, conditional)
+            except Exception as e:
+                self.logger.debug(f"Revalidation of {url} failed: {str(e)}")
+                status, headers = None, {}
+            if status == 304:
+                await asyncio.to_thread(self.refresh, entry, headers, options)
+                self.hits += 1
+                self.revalidations += 1
+                self.logger.debug(f"Cache revalidated: {url}")
+                return entry
+
+        self.misses += 1
+        return None
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM entries')
+            self.conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'revalidations': self.revalidations,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': count,
+            'bytes': size,
+        }
@@ -0,0 +1,65 @@
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    """One event loop on a daemon thread that lives as long as the process.
+
+    Browsers, CDP connections and Tor health checks are bound to the loop that
+    created them. Callers that would otherwise start a fresh ``asyncio.run`` per
+    request (every Streamlit message, for one) submit their coroutines here
+    instead, so those long-lived objects are reused rather than rebuilt.
+    """
+
+    _shared: Optional['BackgroundLoop'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name: str = 'cyberscraper-loop'):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def shared(cls) -> 'BackgroundLoop':
+        """Return the process-wide loop, starting it on first use"""
+        with cls._shared_lock:
+            if cls._shared is None or cls._shared.loop.is_closed():
+                cls._shared = cls()
+            return cls._shared
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule ``coro`` on the loop; the returned future can be waited on from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run ``coro`` on the loop and block the calling thread until it finishes"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("BackgroundLoop.run() cannot be called from the loop's own thread")
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run ``coro`` on the shared background loop, like ``asyncio.run`` but keeping the loop alive"""
+    return BackgroundLoop.shared().run(coro, timeout)
+
+
+def run_on_loop(loop: asyncio.AbstractEventLoop, coro: Coroutine) -> bool:
+    """Start ``coro`` on another event loop without waiting for it.
+
+    Returns False when that loop is already closed; the coroutine is discarded then.
+    """
+    if loop.is_closed():
+        coro.close()
+        return False
+    if loop.is_running():
+        asyncio.run_coroutine_threadsafe(coro, loop)
+    else:
+        threading.Thread(target=loop.run_until_complete, args=(coro,), daemon=True).start()
+    return True
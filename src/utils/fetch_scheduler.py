@@ -0,0 +1,194 @@
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, AsyncIterator
+from urllib.parse import urlparse
+import asyncio
+import logging
+import random
+import time
+
+
+class HostState:
+    """Token bucket and backoff bookkeeping for one host"""
+
+    def __init__(self, rate: float, burst: int):
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.requests = 0
+        self.throttled = 0
+
+    def refill(self, rate: float, burst: int):
+        now = time.monotonic()
+        self.tokens = min(float(burst), self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+
+
+class FetchScheduler:
+    """Process-wide politeness scheduler that every fetcher goes through.
+
+    Each host gets a token bucket (``rate`` requests per second, bursting to
+    ``burst``) and an in-flight cap, on top of a global concurrency cap. 429 and
+    503 responses pause the host for its Retry-After, or for an exponential
+    backoff when the server does not send one. Different hosts never wait on each
+    other, so many sites can be crawled in parallel while each stays rate limited.
+    """
+
+    _shared: Optional['FetchScheduler'] = None
+
+    def __init__(self, rate: float = 1.0, burst: int = 3, max_in_flight_per_host: int = 2,
+                 max_in_flight: int = 16, base_backoff: float = 2.0, max_backoff: float = 120.0,
+                 debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight_per_host = max_in_flight_per_host
+        self.max_in_flight = max_in_flight
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hosts: Dict[str, HostState] = {}
+        self.in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Condition] = None
+
+    @classmethod
+    def shared(cls, config=None) -> 'FetchScheduler':
+        """Return the process-wide scheduler, applying rate limits from a ScraperConfig if given"""
+        if cls._shared is None:
+            cls._shared = cls()
+        if config is not None:
+            cls._shared.configure(
+                rate=config.host_rate_limit,
+                burst=config.host_burst,
+                max_in_flight_per_host=config.max_concurrent_pages_per_host,
+                max_in_flight=config.max_concurrent_fetches,
+                debug=config.debug,
+            )
+        return cls._shared
+
+    def configure(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                  max_in_flight_per_host: Optional[int] = None, max_in_flight: Optional[int] = None,
+                  debug: Optional[bool] = None):
+        if rate is not None:
+            self.rate = rate
+        if burst is not None:
+            self.burst = burst
+        if max_in_flight_per_host is not None:
+            self.max_in_flight_per_host = max_in_flight_per_host
+        if max_in_flight is not None:
+            self.max_in_flight = max_in_flight
+        if debug is not None:
+            self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        return (urlparse(url).hostname or '').lower()
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Fetches from a finished loop can never release their slots
+            self._loop = loop
+            self._changed = asyncio.Condition()
+            self.in_flight = 0
+            for state in self.hosts.values():
+                state.in_flight = 0
+
+    def _host_state(self, host: str) -> HostState:
+        if host not in self.hosts:
+            self.hosts[host] = HostState(self.rate, self.burst)
+        return self.hosts[host]
+
+    def _try_acquire(self, state: HostState) -> float:
+        """Take a slot and a token if possible; otherwise return seconds until worth retrying"""
+        now = time.monotonic()
+        if state.blocked_until > now:
+            return state.blocked_until - now
+        if self.in_flight >= self.max_in_flight or state.in_flight >= max(1, self.max_in_flight_per_host):
+            return 1.0
+        if self.rate > 0:
+            state.refill(self.rate, max(1, self.burst))
+            if state.tokens < 1:
+                return (1 - state.tokens) / self.rate
+            state.tokens -= 1
+        state.in_flight += 1
+        state.requests += 1
+        self.in_flight += 1
+        return 0.0
+
+    async def acquire(self, url: str):
+        self._bind_loop()
+        state = self._host_state(self.get_host(url))
+        async with self._changed:
+            while True:
+                wait = self._try_acquire(state)
+                if wait <= 0:
+                    return
+                try:
+                    # Woken early whenever another fetch releases its slot
+                    await asyncio.wait_for(self._changed.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, url: str):
+        state = self._host_state(self.get_host(url))
+        state.in_flight = max(0, state.in_flight - 1)
+        self.in_flight = max(0, self.in_flight - 1)
+        async with self._changed:
+            self._changed.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold a politeness slot for one request to ``url``"""
+        await self.acquire(url)
+        try:
+            yield
+        finally:
+            await self.release(url)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def report(self, url: str, status: Optional[int], headers: Optional[Dict[str, str]] = None):
+        """Feed a response status back so throttled hosts get paused"""
+        state = self._host_state(self.get_host(url))
+        if status in (429, 503):
+            headers = {k.lower(): v for k, v in (headers or {}).items()}
+            delay = self.parse_retry_after(headers.get('retry-after'))
+            if delay is None:
+                delay = self.base_backoff * (2 ** state.consecutive_throttles)
+                delay = random.uniform(delay / 2, delay)
+            delay = min(delay, self.max_backoff)
+            state.consecutive_throttles += 1
+            state.throttled += 1
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            self.logger.warning(f"{self.get_host(url)} answered {status}, pausing it for {delay:.1f}s")
+        elif status is not None and status < 400:
+            state.consecutive_throttles = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            'in_flight': self.in_flight,
+            'hosts': {
+                host: {
+                    'requests': state.requests,
+                    'throttled': state.throttled,
+                    'in_flight': state.in_flight,
+                    'paused_for': round(max(0.0, state.blocked_until - now), 1),
+                }
+                for host, state in self.hosts.items()
+            },
+        }
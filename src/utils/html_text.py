@@ -0,0 +1,259 @@
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import List, Optional
+import html
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; html.parser is always available
+    etree = None
+
+# Subtrees whose text never reaches the model
+SKIPPED_TAGS = {'script', 'style', 'header', 'footer', 'nav', 'aside'}
+
+# BeautifulSoup's get_text() leaves out strings inside these, so the cleaned text does too
+HIDDEN_TEXT_TAGS = {'template', 'rt', 'rp'}
+
+# Strings made only of these collapse to one space or newline, except inside PRESERVE_WHITESPACE_TAGS
+ASCII_SPACES = ' \n\t\x0c\r'
+PRESERVE_WHITESPACE_TAGS = {'pre', 'textarea'}
+
+# Closed as soon as they open, as BeautifulSoup does, so they never hold text
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta',
+             'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+             'nextid', 'spacer'}
+
+
+def clean_lines(text: str) -> List[str]:
+    """Non-empty phrases of ``text``, one per line, split at double spaces"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return [chunk for chunk in chunks if chunk]
+
+
+class OpenElement:
+    __slots__ = ('tag', 'whitespace')
+
+    def __init__(self, tag: str):
+        self.tag = tag
+        # Whitespace seen while the element had no text yet; kept only if text follows before it closes
+        self.whitespace: List[str] = []
+
+
+class TextCleaner:
+    """Turns a stream of parser events into the preprocessed page text in one pass.
+
+    Scripts, styles, comments and header/footer/nav/aside subtrees are dropped,
+    and so is the whitespace of elements that end up without any text, which is
+    what pruning empty tags from a BeautifulSoup tree does. Each element is
+    settled when it closes instead of re-reading its subtree per tag, so the
+    cost is linear in the size of the page. Lines are emitted as soon as they
+    are complete.
+    """
+
+    def __init__(self):
+        self.stack: List[OpenElement] = []
+        # The outermost `confirmed` open elements are known to contain text
+        self.confirmed = 0
+        self.skipped = 0
+        self.hidden = 0
+        self.preserving = 0
+        # Data of the string being read, which ends at the next tag or comment
+        self.current: List[str] = []
+        # Text of the current unfinished line, and lines completed since they were last taken
+        self.pending: List[str] = []
+        self.lines: List[str] = []
+
+    def start(self, tag: str):
+        self.boundary()
+        if tag in VOID_TAGS:
+            return
+        self.stack.append(OpenElement(tag))
+        if tag in SKIPPED_TAGS:
+            self.skipped += 1
+        if tag in HIDDEN_TEXT_TAGS:
+            self.hidden += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserving += 1
+
+    def end(self, tag: str):
+        self.boundary()
+        # Like BeautifulSoup, close the most recent open element of that name and everything inside it
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].tag == tag:
+                break
+        else:
+            return
+        for element in self.stack[index:]:
+            if element.tag in SKIPPED_TAGS:
+                self.skipped -= 1
+            if element.tag in HIDDEN_TEXT_TAGS:
+                self.hidden -= 1
+            if element.tag in PRESERVE_WHITESPACE_TAGS:
+                self.preserving -= 1
+        del self.stack[index:]
+        self.confirmed = min(self.confirmed, index)
+
+    def data(self, text: str):
+        self.current.append(text)
+
+    def boundary(self, cdata: bool = False):
+        """End the current string, at a tag, comment or other markup"""
+        if not self.current:
+            return
+        text = ''.join(self.current)
+        self.current = []
+        # get_text() still includes CDATA sections inside the hidden-text tags
+        if self.skipped or (self.hidden and not cdata):
+            return
+        if not self.preserving and not text.strip(ASCII_SPACES):
+            text = '\n' if '\n' in text else ' '
+        if text.strip():
+            # Every open element now has text, so the whitespace they were holding back is kept
+            for element in self.stack[self.confirmed:]:
+                for whitespace in element.whitespace:
+                    self._emit(whitespace)
+                element.whitespace = []
+            self.confirmed = len(self.stack)
+            self._emit(text)
+        elif self.confirmed == len(self.stack):
+            self._emit(text)
+        else:
+            self.stack[-1].whitespace.append(text)
+
+    def _emit(self, text: str):
+        cut = text.rfind('\n') + 1
+        if not cut:
+            self.pending.append(text)
+            return
+        # Lines are only cleaned once complete, so a phrase split across chunks stays whole
+        self.pending.append(text[:cut])
+        self.lines.extend(clean_lines(''.join(self.pending)))
+        self.pending = [text[cut:]]
+
+    def take_lines(self) -> List[str]:
+        lines, self.lines = self.lines, []
+        return lines
+
+    def finish(self) -> List[str]:
+        self.boundary()
+        self.lines.extend(clean_lines(''.join(self.pending)))
+        self.pending = []
+        return self.take_lines()
+
+
+class StreamingTextExtractor(HTMLParser):
+    """Cleans HTML fed to it chunk by chunk, using the same html.parser tokenizer as BeautifulSoup"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.cleaner = TextCleaner()
+        # Void elements opened as <br>; one matching </br> each is ignored outright, as in BeautifulSoup
+        self.closed_voids: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        self.cleaner.start(tag)
+        if tag in VOID_TAGS:
+            self.closed_voids.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.cleaner.start(tag)
+        self.cleaner.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.closed_voids:
+            self.closed_voids.remove(tag)
+            return
+        self.cleaner.end(tag)
+
+    def handle_data(self, data):
+        self.cleaner.data(data)
+
+    def handle_charref(self, name):
+        self.cleaner.data(html.unescape(f'&#{name};'))
+
+    def handle_entityref(self, name):
+        # Unknown entities stay literal, without their semicolon, as in BeautifulSoup
+        self.cleaner.data(html5.get(name + ';', '&' + name))
+
+    def handle_comment(self, data):
+        self.cleaner.boundary()
+
+    def handle_decl(self, decl):
+        self.cleaner.boundary()
+
+    def handle_pi(self, data):
+        self.cleaner.boundary()
+
+    def unknown_decl(self, data):
+        self.cleaner.boundary()
+        # BeautifulSoup keeps the contents of CDATA sections as text
+        if data.upper().startswith('CDATA['):
+            self.cleaner.data(data[len('CDATA['):])
+            self.cleaner.boundary(cdata=True)
+
+    def feed_text(self, html: str) -> List[str]:
+        """Feed the next chunk of HTML; returns the lines of text it completed"""
+        self.feed(html)
+        return self.cleaner.take_lines()
+
+    def close_text(self) -> List[str]:
+        """Finish the page; returns the remaining lines"""
+        self.close()
+        return self.cleaner.finish()
+
+
+class LxmlTextExtractor:
+    """The same cleaning driven by lxml's C parser, which is several times faster.
+
+    libxml2 repairs broken markup differently from html.parser (it closes
+    unclosed paragraphs and list items itself, for one), so text can be joined
+    slightly differently on malformed pages.
+    """
+
+    def __init__(self):
+        self.cleaner = TextCleaner()
+        self.parser = etree.HTMLParser(target=self, no_network=True)
+
+    # lxml parser target interface
+    def start(self, tag, attrib):
+        self.cleaner.start(tag)
+
+    def end(self, tag):
+        self.cleaner.end(tag)
+
+    def data(self, data):
+        self.cleaner.data(data)
+
+    def comment(self, text):
+        self.cleaner.boundary()
+
+    def close(self):
+        return None
+
+    def feed_text(self, html: str) -> List[str]:
+        self.parser.feed(html)
+        return self.cleaner.take_lines()
+
+    def close_text(self) -> List[str]:
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            # Raised for an empty document; whatever was parsed has been cleaned already
+            pass
+        return self.cleaner.finish()
+
+
+def text_extractor(parser: Optional[str] = 'html.parser'):
+    """Incremental cleaner for ``parser`` ('html.parser' or 'lxml'); html.parser when lxml is not installed"""
+    if parser == 'lxml' and etree is not None:
+        return LxmlTextExtractor()
+    return StreamingTextExtractor()
+
+
+def html_to_text(html: str, parser: Optional[str] = 'html.parser') -> str:
+    """Clean a whole page: the text the model sees, one phrase per line"""
+    extractor = text_extractor(parser)
+    lines = extractor.feed_text(html)
+    lines.extend(extractor.close_text())
+    return '\n'.join(lines)
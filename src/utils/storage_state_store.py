@@ -0,0 +1,142 @@
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlparse
+import json
+import logging
+import os
+import sqlite3
+import time
+
+
+def state_domain(url: str) -> str:
+    """The key states are stored under: the URL's host without a leading www."""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def cookie_applies(cookie: Dict[str, Any], domain: str) -> bool:
+    cookie_host = cookie.get('domain', '').lstrip('.').lower()
+    cookie_host = cookie_host[4:] if cookie_host.startswith('www.') else cookie_host
+    return domain == cookie_host or domain.endswith('.' + cookie_host)
+
+
+class StorageStateStore:
+    """Per-domain cookies and localStorage saved from successful browser sessions.
+
+    States are kept in a SQLite file next to the content cache and handed to new
+    contexts, so consent banners, geo interstitials and bot challenges that were
+    already cleared are not shown again. A state expires ``ttl`` seconds after it
+    was saved, expired cookies are dropped when it is loaded, and ``invalidate``
+    forgets a domain whose saved state stopped working.
+    """
+
+    _instances: Dict[str, 'StorageStateStore'] = {}
+
+    def __init__(self, cache_dir: str = '.cache', ttl: float = 86400.0, debug: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'storage_state.sqlite3')
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS states (
+                domain TEXT PRIMARY KEY,
+                cookies TEXT NOT NULL,
+                origins TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+        # domain -> when its state was last rejected, so sessions that saw the rejection do not save it back
+        self.invalidated: Dict[str, float] = {}
+        self.loads = 0
+        self.saves = 0
+        self.invalidations = 0
+
+    @classmethod
+    def shared(cls, cache_dir: str, ttl: float = 86400.0, debug: bool = False) -> 'StorageStateStore':
+        key = os.path.abspath(cache_dir)
+        if key not in cls._instances:
+            cls._instances[key] = cls(cache_dir, ttl, debug)
+        return cls._instances[key]
+
+    @classmethod
+    def from_config(cls, config) -> 'StorageStateStore':
+        return cls.shared(config.cache_dir, config.storage_state_ttl, config.debug)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Playwright storage state for the URL's domain, or None when there is no usable one"""
+        domain = state_domain(url)
+        row = self.conn.execute('SELECT cookies, origins, saved_at FROM states WHERE domain = ?',
+                                (domain,)).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[2] > self.ttl:
+            self.conn.execute('DELETE FROM states WHERE domain = ?', (domain,))
+            self.conn.commit()
+            self.logger.debug(f"Saved storage state for {domain} expired")
+            return None
+
+        now = time.time()
+        # Session cookies have expires == -1
+        cookies = [cookie for cookie in json.loads(row[0])
+                   if cookie.get('expires', -1) <= 0 or cookie['expires'] > now]
+        origins = json.loads(row[1])
+        if not cookies and not origins:
+            return None
+        self.loads += 1
+        return {'cookies': cookies, 'origins': origins}
+
+    def put(self, url: str, state: Dict[str, Any], session_started: Optional[float] = None):
+        """Keep the parts of a context's storage state that belong to the URL's domain"""
+        domain = state_domain(url)
+        if session_started is not None and self.invalidated.get(domain, 0.0) >= session_started:
+            return
+        cookies = [cookie for cookie in state.get('cookies', []) if cookie_applies(cookie, domain)]
+        origins = [origin for origin in state.get('origins', [])
+                   if state_domain(origin.get('origin', '')) == domain and origin.get('localStorage')]
+        if not cookies and not origins:
+            return
+        self.conn.execute(
+            'INSERT OR REPLACE INTO states (domain, cookies, origins, saved_at) VALUES (?, ?, ?, ?)',
+            (domain, json.dumps(cookies), json.dumps(origins), time.time()))
+        self.conn.commit()
+        self.saves += 1
+        self.logger.debug(f"Saved storage state for {domain}: {len(cookies)} cookies, {len(origins)} origins")
+
+    def invalidate(self, url: str, reason: str = 'invalidated'):
+        domain = state_domain(url)
+        self.invalidated[domain] = time.time()
+        deleted = self.conn.execute('DELETE FROM states WHERE domain = ?', (domain,)).rowcount
+        self.conn.commit()
+        if deleted:
+            self.invalidations += 1
+            self.logger.info(f"Dropped saved storage state for {domain} ({reason}).")
+
+    def clear(self):
+        self.conn.execute('DELETE FROM states')
+        self.conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'domains': self.conn.execute('SELECT COUNT(*) FROM states').fetchone()[0],
+            'loads': self.loads,
+            'saves': self.saves,
+            'invalidations': self.invalidations,
+        }
+
+
+def local_storage_script(origins: List[Dict[str, Any]]) -> str:
+    """Init script restoring saved localStorage into a page whose context was not created with it"""
+    return '''
+        ((origins) => {
+            const saved = origins.find(o => o.origin === location.origin);
+            if (!saved) return;
+            try {
+                for (const item of saved.localStorage) {
+                    // Values the page has set since take precedence over the saved ones
+                    if (localStorage.getItem(item.name) === null) localStorage.setItem(item.name, item.value);
+                }
+            } catch (e) {}
+        })(%s);
+    ''' % json.dumps(origins)
@@ -0,0 +1,40 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class UrlCommand:
+    """A chat message that starts with a URL: ``<url> [pages] [url_pattern] [-flag ...]``"""
+    url: str
+    pages: Optional[str] = None
+    url_pattern: Optional[str] = None
+    flags: List[str] = field(default_factory=list)
+
+    def has_flag(self, name: str) -> bool:
+        return name in self.flags
+
+    def crawl_depth(self) -> Optional[int]:
+        """Link depth asked for with -crawl or -crawl=N; None for a single fetch"""
+        for flag in self.flags:
+            if flag == '-crawl':
+                return 1
+            if flag.startswith('-crawl='):
+                value = flag[len('-crawl='):]
+                return int(value) if value.isdigit() else 1
+        return None
+
+
+def parse_url_command(user_input: str) -> UrlCommand:
+    """Split a URL message into its arguments.
+
+    Flags are whole tokens after the URL, so a URL or pattern that merely
+    contains "-crawl" does not switch anything on.
+    """
+    url, *arguments = user_input.split()
+    positional = [argument if not argument.startswith('-') else None for argument in arguments[:2]]
+    return UrlCommand(
+        url=url,
+        pages=positional[0] if positional else None,
+        url_pattern=positional[1] if len(positional) > 1 else None,
+        flags=[argument.lower() for argument in arguments if argument.startswith('-')],
+    )
@@ -0,0 +1,29 @@
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+TRACKING_PARAMS = ('utm_', 'gclid', 'fbclid', 'mc_cid', 'mc_eid', 'yclid', '_hsenc', '_hsmi')
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so equivalent spellings share cache and dedupe keys.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, sorts the query string and removes a trailing slash from
+    non-root paths.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    if parsed.username:
+        credentials = parsed.username + (f":{parsed.password}" if parsed.password else '')
+        netloc = f"{credentials}@{netloc}"
+
+    path = parsed.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+
+    query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+             if not key.lower().startswith(TRACKING_PARAMS)]
+    return urlunparse((scheme, netloc, path, parsed.params, urlencode(sorted(query)), ''))
@@ -1,5 +1,6 @@
-from typing import Dict, Any, Optional, List, Tuple, Union
+from typing import Dict, Any, Optional, List, Tuple, Union, AsyncIterator
 import json
+from xml.etree.ElementTree import ParseError
 import pandas as pd
 from io import StringIO, BytesIO
 import base64
@@ -11,6 +12,9 @@ from .ollama_models import OllamaModel, OllamaModelManager
 from .scrapers.playwright_scraper import PlaywrightScraper
 from .scrapers.html_scraper import HTMLScraper
 from .scrapers.json_scraper import JSONScraper
+from .scrapers.csv_scraper import CSVScraper
+from .scrapers.xml_scraper import XMLScraper
+from .scrapers.content_types import HTML, JSON, CSV, XML, DATA_KINDS
 from .utils.proxy_manager import ProxyManager
 from .utils.markdown_formatter import MarkdownFormatter
 from .prompts import get_prompt_for_model
@@ -18,16 +22,28 @@ from langchain.schema.runnable import RunnableSequence
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import tiktoken
 import csv
-from bs4 import BeautifulSoup, Comment
 from .scrapers.playwright_scraper import PlaywrightScraper, ScraperConfig
+from .scrapers.browser_pool import BrowserPool
+from .scrapers.http_scraper import HTTPScraper, HTTPResponse
+from .scrapers.crawler import Crawler
 from urllib.parse import urlparse
 import streamlit as st
 import os
 import google.generativeai as genai
 from langchain_google_genai import ChatGoogleGenerativeAI
 from .scrapers.tor.tor_scraper import TorScraper
+from .scrapers.exceptions import FetchError
+from .scrapers.api_capture import ApiPayload, CapturedResponse
 from .scrapers.tor.tor_config import TorConfig
 from .scrapers.tor.exceptions import TorException
+from .utils.html_text import text_extractor, html_to_text
+from .utils.url_command import parse_url_command
+
+# Queries made only of these words ask to reformat tabular data, which needs no model call
+FORMAT_KEYWORDS = {'json', 'csv', 'excel', 'sql', 'html'}
+CONVERSION_WORDS = {'convert', 'export', 'give', 'show', 'return', 'output', 'download', 'save', 'format',
+                    'formatted', 'me', 'it', 'this', 'that', 'the', 'a', 'an', 'as', 'to', 'in', 'into', 'all',
+                    'data', 'everything', 'whole', 'table', 'dataset', 'file', 'please', 'can', 'you', 'records'}
 
 class WebExtractor:
     def __init__(self, model_name: str = "gpt-4o-mini", model_kwargs: Dict[str, Any] = None, 
@@ -46,14 +62,24 @@ class WebExtractor:
         
         self.model_name = model_name
         self.scraper_config = scraper_config or ScraperConfig()
-        self.playwright_scraper = PlaywrightScraper(config=self.scraper_config)
+        # All extractors with the same browser settings share one warm browser pool
+        browser_pool = BrowserPool.shared(self.scraper_config) if self.scraper_config.use_browser_pool else None
+        self.playwright_scraper = PlaywrightScraper(config=self.scraper_config, browser_pool=browser_pool)
+        # The HTTP fast path bypasses the browser, so it is off while a HAR archive is recorded or replayed
+        use_http_fast_path = self.scraper_config.use_http_fast_path and not self.scraper_config.har_mode
+        self.http_scraper = HTTPScraper.from_config(self.scraper_config) if use_http_fast_path else None
         self.html_scraper = HTMLScraper()
         self.json_scraper = JSONScraper()
+        self.csv_scraper = CSVScraper()
+        self.xml_scraper = XMLScraper()
         self.proxy_manager = ProxyManager(proxy)
         self.markdown_formatter = MarkdownFormatter()
         self.current_url = None
         self.current_content = None
         self.preprocessed_content = None
+        self.preprocessed_tokens = None
+        # Records of a JSON/CSV/XML source, so format conversions can skip the model
+        self.structured_data: Optional[List[Dict[str, Any]]] = None
         self.conversation_history: List[str] = []
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=32000,
@@ -96,18 +122,21 @@ class WebExtractor:
 
     async def process_query(self, user_input: str, progress_callback=None) -> str:
         if user_input.lower().startswith("http"):
-            parts = user_input.split(maxsplit=3)
-            url = parts[0]
-            pages = parts[1] if len(parts) > 1 and not parts[1].startswith('-') else None
-            url_pattern = parts[2] if len(parts) > 2 and not parts[2].startswith('-') else None
-            handle_captcha = '-captcha' in user_input.lower()
+            command = parse_url_command(user_input)
+            url, pages, url_pattern = command.url, command.pages, command.url_pattern
+            handle_captcha = command.has_flag('-captcha')
+            scroll = command.has_flag('-scroll')
+            crawl_depth = command.crawl_depth()
 
             website_name = self.get_website_name(url)
 
             if progress_callback:
                 progress_callback(f"Fetching content from {website_name}...")
 
-            response = await self._fetch_url(url, pages, url_pattern, handle_captcha, progress_callback)
+            if crawl_depth is not None:
+                response = await self._crawl_url(url, crawl_depth, progress_callback)
+            else:
+                response = await self._fetch_url(url, pages, url_pattern, handle_captcha, progress_callback, scroll)
         elif not self.current_content:
             response = "Please provide a URL first before asking for information."
         else:
@@ -122,44 +151,66 @@ class WebExtractor:
     async def _fetch_url(self, url: str, pages: Optional[str] = None, 
                         url_pattern: Optional[str] = None, 
                         handle_captcha: bool = False, 
-                        progress_callback=None) -> str:
+                        progress_callback=None,
+                        scroll: bool = False) -> str:
         self.current_url = url
         
+        captured_responses = []
+        download = {}
+        unsubscribe = None
         try:
             # Check if it's an onion URL
             if TorScraper.is_onion_url(url):
                 if progress_callback:
                     progress_callback("Fetching content through Tor network...")
                 
-                content = await self.tor_scraper.fetch_content(url)
-                self.current_content = content
+                # Onion pages are cleaned as their chunks arrive over the (slow) circuit
+                await self._preprocess_chunks(self.tor_scraper.iter_content(url, download), progress_callback)
                 
             else:
                 # Regular scraping without Tor
                 if progress_callback:
                     progress_callback(f"Fetching content from {url}")
                 
-                # Don't use proxy for non-onion URLs
-                contents = await self.playwright_scraper.fetch_content(
-                    url, 
-                    proxy=None,  # Explicitly set proxy to None for regular URLs
-                    pages=pages, 
-                    url_pattern=url_pattern, 
-                    handle_captcha=handle_captcha
-                )
-                self.current_content = "\n".join(contents)
-            
-            if progress_callback:
-                progress_callback("Preprocessing content...")
-            
-            self.preprocessed_content = self._preprocess_content(self.current_content)
-            
-            new_hash = self._hash_content(self.preprocessed_content)
-            if self.content_hash != new_hash:
-                self.content_hash = new_hash
-                self.query_cache.clear()
+                responses = None
+                # Scroll pagination and API capture need a live page, so they always go through the browser
+                scroll = scroll or self.scraper_config.scroll_pagination
+                capture_api = self.scraper_config.capture_api_responses
+                if self.http_scraper and not handle_captcha and not scroll and not capture_api \
+                        and not self.scraper_config.use_current_browser:
+                    page_urls = [page_url for _, page_url in self.playwright_scraper.get_page_urls(url, pages, url_pattern)]
+                    responses = await self.http_scraper.fetch_responses(page_urls)
+
+                if responses is not None and all(response.kind in DATA_KINDS for response in responses):
+                    return await self._load_data_responses(responses, progress_callback)
+
+                if responses is not None:
+                    page_stream = self._iter_pages([response.text for response in responses])
+                else:
+                    if handle_captcha and progress_callback:
+                        unsubscribe = self.playwright_scraper.captcha_handoff.subscribe(
+                            lambda challenge: challenge.url == url and progress_callback(
+                                f"Solve the CAPTCHA in the browser window, scraping resumes once it is gone "
+                                f"or when Enter is pressed in the terminal running the app (challenge {challenge.id})..."))
+                    # Don't use proxy for non-onion URLs
+                    page_stream = self.playwright_scraper.iter_content(
+                        url, 
+                        proxy=None,  # Explicitly set proxy to None for regular URLs
+                        pages=pages, 
+                        url_pattern=url_pattern, 
+                        handle_captcha=handle_captcha,
+                        scroll=scroll,
+                        captured_responses=captured_responses
+                    )
+
+                await self._preprocess_stream(page_stream, progress_callback)
 
             source_type = "Tor network" if TorScraper.is_onion_url(url) else "regular web"
+            api_usage = await self._use_api_payload(captured_responses) if captured_responses else None
+            if api_usage:
+                source_type += f", {api_usage}"
+            if download.get('truncated'):
+                source_type += f", cut off after {download['bytes'] // 1024} KB ({download['truncated']})"
             return f"I've fetched and preprocessed the content from {self.current_url} via {source_type}" + \
                 (f" (pages: {pages})" if pages else "") + \
                 ". What would you like to know about it?"
@@ -168,35 +219,185 @@ class WebExtractor:
             return f"Error accessing onion service: {str(e)}"
         except Exception as e:
             return f"Error fetching content: {str(e)}"
+        finally:
+            if unsubscribe:
+                unsubscribe()
 
-    def _preprocess_content(self, content: str) -> str:
-        soup = BeautifulSoup(content, 'html.parser')
+    @staticmethod
+    async def _iter_pages(contents: List[str]) -> AsyncIterator[str]:
+        for content in contents:
+            yield content
+
+    async def _preprocess_stream(self, page_stream: AsyncIterator[str], progress_callback=None) -> int:
+        """Preprocess and count tokens page by page as pages arrive, so raw HTML is never held all at once"""
+        preprocessed_pages = []
+        tokens = 0
+        async for content in page_stream:
+            text = self._preprocess_content(content)
+            preprocessed_pages.append(text)
+            tokens += self.num_tokens_from_string(text)
+            if progress_callback:
+                progress_callback(f"Preprocessed page {len(preprocessed_pages)} ({tokens} tokens so far)...")
+
+        if not preprocessed_pages:
+            # Keep whatever content was loaded before rather than replacing it with nothing
+            raise FetchError(self.current_url, "none of the requested pages could be loaded")
+
+        self._set_preprocessed_content("\n".join(preprocessed_pages), tokens)
+        return len(preprocessed_pages)
+
+    async def _preprocess_chunks(self, chunks: AsyncIterator[str], progress_callback=None):
+        """Preprocess a single page from chunks of its HTML, so the raw page is never held whole"""
+        extractor = text_extractor(self.scraper_config.html_parser)
+        lines = []
+        received = 0
+        async for chunk in chunks:
+            lines.extend(extractor.feed_text(chunk))
+            received += len(chunk)
+            if progress_callback:
+                progress_callback(f"Received {received // 1024} KB, {len(lines)} lines of text so far...")
+        lines.extend(extractor.close_text())
+
+        text = "\n".join(lines)
+        self._set_preprocessed_content(text, self.num_tokens_from_string(text))
+
+    def _set_preprocessed_content(self, content: str, tokens: int,
+                                  structured_data: Optional[List[Dict[str, Any]]] = None):
+        self.preprocessed_content = content
+        self.preprocessed_tokens = tokens
+        self.structured_data = structured_data
+        # Raw pages are not retained; current_content only marks that content is loaded
+        self.current_content = self.preprocessed_content
+
+        new_hash = self._hash_content(self.preprocessed_content)
+        if self.content_hash != new_hash:
+            self.content_hash = new_hash
+            self.query_cache.clear()
 
-        for script in soup(["script", "style"]):
-            script.decompose()
+    async def _use_api_payload(self, captured_responses: List[CapturedResponse]) -> Optional[str]:
+        """Use captured API records when they are the smaller input; returns how they were used"""
+        payload = await ApiPayload.from_responses(captured_responses, self.json_scraper,
+                                                  self.scraper_config.api_min_records,
+                                                  targeted=bool(self.scraper_config.api_url_patterns))
+        if payload is None:
+            return None
+
+        content = payload.to_text()
+        tokens = self.num_tokens_from_string(content)
+        if self.preprocessed_tokens is not None and tokens >= self.preprocessed_tokens:
+            return None
+
+        if payload.replaces_page():
+            self._set_preprocessed_content(content, tokens, payload.get_table())
+            return "using the JSON data the page loaded from its API"
+        self._set_preprocessed_content(f"{self.preprocessed_content}\n{content}", self.preprocessed_tokens + tokens)
+        return "with the JSON data the page loaded over XHR/fetch added"
 
-        for comment in soup.find_all(text=lambda text: isinstance(text, Comment)):
-            comment.extract()
+    @staticmethod
+    def _compact_json(data: Any) -> str:
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
 
-        for tag in soup(["header", "footer", "nav", "aside"]):
-            tag.decompose()
+    async def _parse_data_response(self, response: HTTPResponse) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        """Model input and records for a JSON, CSV, XML or plain text response.
 
-        for tag in soup.find_all():
-            if len(tag.get_text(strip=True)) == 0:
-                tag.extract()
+        A body that does not parse as the format it claims is an error page, not content,
+        and raises a non-retriable FetchError instead of reaching the model.
+        """
+        if response.kind == JSON:
+            try:
+                data = self.json_scraper.parse(response.text)
+            except json.JSONDecodeError as e:
+                raise FetchError(response.url, f"invalid JSON ({e})", status=response.status) from e
+            return self._compact_json(data), self.json_scraper.find_records(data) or None
+        if response.kind == CSV:
+            # The CSV itself is a more compact model input than the same rows as JSON
+            return response.text.strip(), (await self.csv_scraper.extract(response.text))['records'] or None
+        if response.kind == XML:
+            try:
+                data = self.xml_scraper.parse(response.text)
+            except ParseError as e:
+                raise FetchError(response.url, f"invalid XML ({e})", status=response.status) from e
+            records = data.get('records')
+            return self._compact_json(records if records else data), records or None
+        return response.text.strip(), None
+
+    async def _load_data_responses(self, responses: List[HTTPResponse], progress_callback=None) -> str:
+        """Load data documents straight from their parsers, without the browser or HTML cleaning"""
+        texts, records = [], []
+        for response in responses:
+            if progress_callback:
+                progress_callback(f"Parsing {response.kind.upper()} from {response.url}...")
+            text, response_records = await self._parse_data_response(response)
+            texts.append(text)
+            records.extend(response_records or [])
 
-        text = soup.get_text()
+        content = "\n".join(texts)
+        self._set_preprocessed_content(content, self.num_tokens_from_string(content), records or None)
 
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        kinds = ", ".join(sorted({response.kind.upper() for response in responses}))
+        return f"I've loaded the {kinds} data from {self.current_url} directly" + \
+            (f" ({len(records)} records)" if records else "") + \
+            ". What would you like to know about it?"
 
-        return text
+    @staticmethod
+    def _is_format_conversion(query: str) -> bool:
+        words = re.findall(r'[a-z]+', query.lower())
+        return any(word in FORMAT_KEYWORDS for word in words) and \
+            all(word in FORMAT_KEYWORDS or word in CONVERSION_WORDS for word in words)
+
+    async def _fetch_single_page(self, url: str) -> str:
+        if self.http_scraper and not self.scraper_config.use_current_browser:
+            contents = await self.http_scraper.fetch_pages([url])
+            if contents is not None:
+                return contents[0]
+        return await self.playwright_scraper.fetch_page(url)
+
+    async def _crawl_url(self, url: str, depth: int = 1, progress_callback=None) -> str:
+        self.current_url = url
+        crawler = Crawler(
+            self._fetch_single_page,
+            html_scraper=self.html_scraper,
+            max_depth=depth,
+            max_pages=self.scraper_config.crawl_max_pages,
+            workers=self.scraper_config.crawl_workers,
+            debug=self.scraper_config.debug,
+        )
+
+        def on_page(result):
+            if progress_callback:
+                progress_callback(f"Crawled {result.url} (depth {result.depth})")
+
+        async def crawled_pages() -> AsyncIterator[str]:
+            # Pages are cleaned as the crawl delivers them, so raw HTML is only held for a few at a time
+            async for result in crawler.iter_pages(url, on_page=on_page):
+                yield result.content
+
+        try:
+            pages = await self._preprocess_stream(crawled_pages(), progress_callback)
+            return f"I've crawled and preprocessed {pages} pages starting from {url} (depth {depth}). " \
+                "What would you like to know about them?"
+        except FetchError:
+            return f"Error fetching content: no pages could be crawled from {url}"
+        except Exception as e:
+            return f"Error fetching content: {str(e)}"
+
+    def get_fetch_stats(self) -> Dict[str, Any]:
+        return {
+            'playwright': self.playwright_scraper.get_stats(),
+            'tor': self.tor_scraper.get_stats(),
+        }
+
+    def _preprocess_content(self, content: str) -> str:
+        return html_to_text(content, self.scraper_config.html_parser)
 
     async def _extract_info(self, query: str) -> str:        
         if not self.preprocessed_content:
             return "Please provide a URL first before asking for information."
 
+        if self.structured_data and self._is_format_conversion(query):
+            # The records are already structured, so the requested format is produced directly
+            return self._format_result(json.dumps(self.structured_data), query)
+
         content_hash = self._hash_content(self.preprocessed_content)
         
         if self.content_hash != content_hash:
@@ -208,7 +409,10 @@ class WebExtractor:
         if cache_key in self.query_cache:
             return self.query_cache[cache_key]
         
-        content_tokens = self.num_tokens_from_string(self.preprocessed_content)
+        if self.preprocessed_tokens is not None:
+            content_tokens = self.preprocessed_tokens
+        else:
+            content_tokens = self.num_tokens_from_string(self.preprocessed_content)
         
         if content_tokens <= self.max_tokens - 1000:
             extracted_data = await self._cached_api_call(content_hash, query)
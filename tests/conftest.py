@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the application as ``src.*`` and the shared fakes as ``fakes``, without installing anything
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
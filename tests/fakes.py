@@ -0,0 +1,142 @@
+"""Minimal in-process stand-ins for the Playwright objects the scrapers touch"""
+import asyncio
+
+
+class FakeResponse:
+    def __init__(self, url, status=200, headers=None):
+        self.url = url
+        self.status = status
+        self.ok = status < 400
+        self.headers = headers or {'content-type': 'text/html'}
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = 'about:blank'
+        self.closed = False
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        await asyncio.sleep(0)
+        return FakeResponse(url)
+
+    async def content(self):
+        return f"<html><body><p>content of {self.url}</p></body></html>"
+
+    async def evaluate(self, *args, **kwargs):
+        return None
+
+    async def close(self):
+        self.closed = True
+        if self in self.context.pages:
+            self.context.pages.remove(self)
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    def __init__(self, browser, options):
+        self.browser = browser
+        self.options = options
+        self.pages = []
+        self.closed = False
+        self.cookies = []
+        self.init_scripts = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def add_init_script(self, script=None, **kwargs):
+        self.init_scripts.append(script)
+
+    async def add_cookies(self, cookies):
+        self.cookies.extend(cookies)
+
+    async def clear_cookies(self, **kwargs):
+        self.cookies = []
+
+    async def storage_state(self, **kwargs):
+        return {'cookies': list(self.cookies), 'origins': []}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        context = FakeContext(self, options)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+        for handler in self.handlers.get('disconnected', []):
+            handler(self)
+
+
+class FakeChromium:
+    def __init__(self, playwright):
+        self.playwright = playwright
+
+    async def launch(self, **options):
+        browser = FakeBrowser()
+        self.playwright.browsers.append(browser)
+        return browser
+
+    async def connect_over_cdp(self, url, **kwargs):
+        browser = FakeBrowser()
+        browser.contexts.append(FakeContext(browser, {}))
+        self.playwright.browsers.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    """Records every browser it launches; ``process`` stands in for the driver subprocess"""
+
+    def __init__(self, process=None):
+        self.chromium = FakeChromium(self)
+        self.browsers = []
+        self.stopped = False
+        if process is not None:
+            # Mirrors where playwright keeps its driver process
+            self._connection = type('Connection', (), {})()
+            self._connection._transport = type('Transport', (), {})()
+            self._connection._transport._proc = process
+
+    async def stop(self):
+        self.stopped = True
+
+
+class FakeAsyncPlaywright:
+    """Replacement for ``async_playwright`` that hands out FakePlaywright instances"""
+
+    def __init__(self, process_factory=None):
+        self.process_factory = process_factory
+        self.instances = []
+
+    def __call__(self):
+        return self
+
+    async def start(self):
+        playwright = FakePlaywright(self.process_factory() if self.process_factory else None)
+        self.instances.append(playwright)
+        return playwright
+
+    @property
+    def browsers(self):
+        return [browser for playwright in self.instances for browser in playwright.browsers]
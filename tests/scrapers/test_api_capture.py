@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+from src.scrapers.api_capture import ApiPayload, ApiResponseCapture
+from src.scrapers.json_scraper import JSONScraper
+
+# Shaped like the listing payloads storefronts fetch while rendering
+LISTING = {
+    'meta': {'page': 1, 'filters': [{'name': 'colour'}, {'name': 'size'}]},
+    'data': {
+        'products': [
+            {'id': 1, 'name': 'Lamp', 'price': 25.0},
+            {'id': 2, 'name': 'Desk', 'price': 120.0},
+            {'id': 3, 'name': 'Chair', 'price': 80.0},
+        ],
+    },
+}
+
+
+class FakeRequest:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+
+
+class FakeResponse:
+    def __init__(self, url, body, content_type='application/json', resource_type='xhr', status=200):
+        self.url = url
+        self.status = status
+        self.ok = status < 400
+        self.headers = {'content-type': content_type}
+        self.request = FakeRequest(resource_type)
+        self._body = body.encode()
+
+    async def body(self):
+        return self._body
+
+
+class FakeContext:
+    def __init__(self):
+        self.handlers = []
+
+    def on(self, event, handler):
+        self.handlers.append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers.remove(handler)
+
+    def emit(self, response):
+        for handler in list(self.handlers):
+            handler(response)
+
+
+def capture(responses, **options):
+    async def run():
+        context, sink = FakeContext(), []
+        session = ApiResponseCapture(**options).attach(context, sink)
+        for response in responses:
+            context.emit(response)
+        await session.finish()
+        return sink
+    return asyncio.run(run())
+
+
+def test_find_records_picks_the_largest_list_of_objects():
+    assert [record['name'] for record in JSONScraper().find_records(LISTING)] == ['Lamp', 'Desk', 'Chair']
+
+
+def test_find_records_without_objects():
+    assert JSONScraper().find_records({'tags': ['a', 'b'], 'count': 2}) == []
+
+
+def test_captured_xhr_payload_yields_its_records():
+    captured = capture([
+        FakeResponse('https://shop.test/api/products?page=1', json.dumps(LISTING)),
+        FakeResponse('https://shop.test/app.js', 'console.log(1)', 'application/javascript', 'script'),
+        FakeResponse('https://shop.test/api/missing', '{}', status=404),
+        FakeResponse('https://cdn.test/page.html', '<html></html>', 'text/html', 'fetch'),
+    ])
+    assert [response.url for response in captured] == ['https://shop.test/api/products?page=1']
+
+    scraper = JSONScraper()
+    records = scraper.find_records(asyncio.run(scraper.extract(captured[0].text)))
+    assert records == LISTING['data']['products']
+
+
+def test_url_patterns_and_limits():
+    responses = [FakeResponse(f'https://shop.test/api/{kind}/{i}', '[{"id": 1}]')
+                 for kind in ('products', 'tracking') for i in range(3)]
+    assert len(capture(responses, url_patterns=[r'/api/products/'])) == 3
+    assert len(capture(responses, max_responses=2)) == 2
+    assert capture(responses, max_bytes=5) == []
+
+
+def payload(captured, targeted):
+    return asyncio.run(ApiPayload.from_responses(captured, JSONScraper(), min_records=3, targeted=targeted))
+
+
+def test_untargeted_capture_keeps_the_page_text():
+    # A decoy endpoint with enough records to pass for the page's data
+    recommendations = {'items': [{'sku': i, 'score': 0.5} for i in range(5)]}
+    responses = [FakeResponse('https://ads.test/recommendations', json.dumps(recommendations)),
+                 FakeResponse('https://shop.test/api/products', json.dumps(LISTING))]
+
+    untargeted = payload(capture(responses), targeted=False)
+    assert set(untargeted.records) == {'https://ads.test/recommendations', 'https://shop.test/api/products'}
+    assert not untargeted.replaces_page()
+
+    targeted = payload(capture(responses, url_patterns=[r'/api/products']), targeted=True)
+    assert targeted.replaces_page()
+    assert targeted.get_table() == LISTING['data']['products']
+    assert 'recommendations' not in targeted.to_text()
+
+
+def test_payload_needs_enough_records():
+    assert payload(capture([FakeResponse('https://shop.test/api/me', '{"user": {"id": 1}}')]), targeted=True) is None
@@ -0,0 +1,85 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from fakes import FakeAsyncPlaywright
+from src.scrapers import browser_pool
+from src.scrapers.browser_pool import BrowserPool
+from src.utils.event_loop import BackgroundLoop
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+    fake = FakeAsyncPlaywright()
+    monkeypatch.setattr(browser_pool, 'async_playwright', fake)
+    return fake
+
+
+async def scrape(pool):
+    async with pool.lease() as context:
+        page = await context.new_page()
+        await page.goto('https://example.test/')
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_background_loop_keeps_the_browser_warm_between_calls(fake_playwright):
+    pool = BrowserPool(idle_timeout=0)
+    loop = BackgroundLoop()
+    try:
+        loop.run(scrape(pool))
+        loop.run(scrape(pool))
+        assert len(fake_playwright.browsers) == 1
+        assert fake_playwright.browsers[0].is_connected()
+        # The context was parked after the first lease and handed out again
+        assert len(fake_playwright.browsers[0].contexts) == 1
+        loop.run(pool.close())
+    finally:
+        loop.stop()
+
+
+def test_back_to_back_asyncio_run_stops_the_previous_driver(monkeypatch):
+    drivers = []
+
+    def start_driver():
+        drivers.append(subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']))
+        return drivers[-1]
+
+    fake = FakeAsyncPlaywright(process_factory=start_driver)
+    monkeypatch.setattr(browser_pool, 'async_playwright', fake)
+    pool = BrowserPool(idle_timeout=0)
+    try:
+        asyncio.run(scrape(pool))
+        asyncio.run(scrape(pool))
+        assert len(drivers) == 2
+        # The first loop is closed, so its driver (and the browsers it launched) is terminated
+        assert drivers[0].wait(timeout=5) is not None
+        assert drivers[1].poll() is None
+    finally:
+        for driver in drivers:
+            driver.kill()
+            driver.wait()
+
+
+def test_previous_loop_still_running_closes_its_own_browsers(fake_playwright):
+    pool = BrowserPool(idle_timeout=0)
+    loop = BackgroundLoop()
+    try:
+        loop.run(scrape(pool))
+        first = fake_playwright.instances[0]
+        asyncio.run(scrape(pool))
+        assert wait_for(lambda: first.stopped)
+        assert not first.browsers[0].is_connected()
+        assert fake_playwright.instances[1].browsers[0].is_connected()
+    finally:
+        loop.stop()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+import pytest
+
+from fakes import FakeBrowser
+from src.scrapers import captcha_handoff
+from src.scrapers.captcha_handoff import CaptchaHandoff, ConsoleResolver, SOLVED, CANCELLED, TIMED_OUT
+from src.scrapers.playwright_scraper import ScraperConfig
+
+
+class TTYPipe:
+    """The read end of a pipe that claims to be a terminal"""
+
+    def __init__(self, fd):
+        self.file = os.fdopen(fd)
+
+    def isatty(self):
+        return True
+
+    def readline(self):
+        return self.file.readline()
+
+
+@pytest.fixture
+def console(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    monkeypatch.setattr(captcha_handoff.sys, 'stdin', TTYPipe(read_fd))
+    monkeypatch.setattr(CaptchaHandoff, '_console', ConsoleResolver())
+    yield lambda: os.write(write_fd, b'\n')
+    # EOF ends the reader thread
+    os.close(write_fd)
+
+
+async def page():
+    context = await FakeBrowser().new_context()
+    return await context.new_page()
+
+
+async def park(handoff, url):
+    """Start a solve() and wait until its challenge is registered"""
+    task = asyncio.create_task(handoff.solve(await page(), url))
+    while not handoff.pending():
+        await asyncio.sleep(0)
+    return task, handoff.pending()[0]
+
+
+def test_enter_resolves_the_current_challenge_not_an_earlier_one(console):
+    handoff = CaptchaHandoff(timeout=5, auto_detect=False)
+
+    async def main():
+        first, _ = await park(handoff, 'https://a.test/')
+        # Resolved some other way, e.g. by the page losing its CAPTCHA
+        handoff.resolve()
+        assert await first == SOLVED
+
+        second, challenge = await park(handoff, 'https://b.test/')
+        console()
+        assert await asyncio.wait_for(second, 5) == SOLVED
+        return challenge
+
+    assert asyncio.run(main()).url == 'https://b.test/'
+
+
+def test_enter_with_nothing_waiting_is_dropped(console):
+    handoff = CaptchaHandoff(timeout=0.3, auto_detect=False)
+
+    async def main():
+        first, _ = await park(handoff, 'https://a.test/')
+        handoff.resolve(solved=False)
+        assert await first == CANCELLED
+        console()
+        # Give the reader time to consume the stray line
+        await asyncio.sleep(0.1)
+        second, _ = await park(handoff, 'https://b.test/')
+        return await second
+
+    assert asyncio.run(main()) == TIMED_OUT
+
+
+def test_shared_handoff_is_per_configuration(monkeypatch):
+    monkeypatch.setattr(CaptchaHandoff, '_shared', {})
+    short = CaptchaHandoff.shared(ScraperConfig(captcha_timeout=30))
+    assert CaptchaHandoff.shared(ScraperConfig(captcha_timeout=30)) is short
+    assert CaptchaHandoff.shared(ScraperConfig(captcha_timeout=600)).timeout == 600
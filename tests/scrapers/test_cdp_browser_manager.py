@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+from fakes import FakeAsyncPlaywright
+from src.scrapers import cdp_browser_manager
+from src.scrapers.cdp_browser_manager import CDPBrowserManager
+from src.utils.event_loop import BackgroundLoop
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+    fake = FakeAsyncPlaywright()
+    monkeypatch.setattr(cdp_browser_manager, 'async_playwright', fake)
+    return fake
+
+
+async def scrape(manager):
+    async with manager.lease() as page:
+        await page.goto('https://example.test/')
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_connection_and_tabs_are_reused_on_one_loop(fake_playwright):
+    manager = CDPBrowserManager(launch_chrome=False)
+    loop = BackgroundLoop()
+    try:
+        loop.run(scrape(manager))
+        loop.run(scrape(manager))
+        assert len(fake_playwright.instances) == 1
+        assert len(fake_playwright.browsers) == 1
+        assert manager.tabs_opened == 1
+        assert manager.tabs_reused == 1
+        loop.run(manager.close())
+    finally:
+        loop.stop()
+
+
+def test_new_loop_closes_the_previous_connection(fake_playwright):
+    manager = CDPBrowserManager(launch_chrome=False)
+    loop = BackgroundLoop()
+    try:
+        loop.run(scrape(manager))
+        first = fake_playwright.instances[0]
+        context = first.browsers[0].contexts[-1]
+        asyncio.run(scrape(manager))
+        assert wait_for(lambda: first.stopped)
+        assert not first.browsers[0].is_connected()
+        assert context.closed
+        # The parked tab was closed too
+        assert context.pages == []
+        assert fake_playwright.instances[1].browsers[0].is_connected()
+    finally:
+        loop.stop()
@@ -0,0 +1,37 @@
+import pytest
+
+from src.scrapers.content_types import sniff_kind, kind_from_header, HTML, JSON, CSV, XML, TEXT, BINARY
+
+
+@pytest.mark.parametrize('content_type, expected', [
+    ('text/html; charset=utf-8', HTML),
+    ('application/json', JSON),
+    ('application/ld+json', JSON),
+    ('text/csv', CSV),
+    ('application/rss+xml', XML),
+    ('image/png', BINARY),
+    ('text/plain', ''),
+    ('', ''),
+])
+def test_kind_from_header(content_type, expected):
+    assert kind_from_header(content_type) == expected
+
+
+@pytest.mark.parametrize('content_type, body, expected', [
+    # A specific header wins over the body
+    ('application/json', 'not json at all', JSON),
+    # XHTML served as XML is still a page
+    ('application/xhtml+xml', '<!DOCTYPE html><html><body>x</body></html>', HTML),
+    ('text/xml', '<?xml version="1.0"?><rss><channel></channel></rss>', XML),
+    # Vague or missing headers fall back to the body
+    ('text/plain', '﻿  <?xml version="1.0"?><feed></feed>', XML),
+    ('', '<html><body>hello</body></html>', HTML),
+    ('text/plain', '{"items": [{"a": 1}]}', JSON),
+    ('text/plain', '{"items": [', TEXT),
+    ('application/octet-stream', '<div>fragment</div>', HTML),
+    ('text/plain', 'name,price\nlamp,10\nchair,25\n', CSV),
+    ('text/plain', 'just a sentence, with a comma', TEXT),
+    ('', 'PK\x03\x04\x00\x00', BINARY),
+])
+def test_sniff_kind(content_type, body, expected):
+    assert sniff_kind(content_type, body) == expected
@@ -0,0 +1,79 @@
+import asyncio
+
+from src.scrapers.crawler import Crawler
+
+
+class Site:
+    """A tiny in-memory site; links are written exactly as a real page would carry them"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    async def fetch(self, url):
+        self.requested.append(url)
+        await asyncio.sleep(0)
+        if url not in self.pages:
+            raise ValueError(f"404 for {url}")
+        links = ''.join(f'<a href="{link}">link</a>' for link in self.pages[url])
+        return f'<html><body>{links}</body></html>'
+
+
+def test_pages_are_fetched_as_linked_but_deduplicated_by_normalized_form():
+    site = Site({
+        'https://shop.test/': ['/list/?b=2&a=1', '/list?a=1&b=2', '/list/?b=2&a=1&utm_source=x', '/item#reviews'],
+        'https://shop.test/list/?b=2&a=1': [],
+        'https://shop.test/item#reviews': [],
+    })
+    results = asyncio.run(Crawler(site.fetch, max_depth=1).crawl('https://shop.test/'))
+
+    assert site.requested.count('https://shop.test/list/?b=2&a=1') == 1
+    assert 'https://shop.test/list?a=1&b=2' not in site.requested
+    assert [result.url for result in results] == [
+        'https://shop.test/', 'https://shop.test/list/?b=2&a=1', 'https://shop.test/item#reviews']
+
+
+def test_depth_domain_and_page_limits():
+    site = Site({
+        'https://shop.test/': ['/a', '/b', '/c', 'https://other.test/x', '/image.png'],
+        'https://shop.test/a': ['/deep'],
+        'https://shop.test/b': [],
+        'https://shop.test/c': [],
+    })
+    results = asyncio.run(Crawler(site.fetch, max_depth=1, max_pages=3).crawl('https://shop.test/'))
+
+    assert len(results) == 3
+    assert all(url.startswith('https://shop.test/') for url in site.requested)
+    assert 'https://shop.test/deep' not in site.requested
+    assert 'https://shop.test/image.png' not in site.requested
+
+
+def test_failed_pages_are_skipped():
+    site = Site({'https://shop.test/': ['/missing', '/ok'], 'https://shop.test/ok': []})
+    results = asyncio.run(Crawler(site.fetch).crawl('https://shop.test/'))
+    assert [result.url for result in results] == ['https://shop.test/', 'https://shop.test/ok']
+
+
+def test_priority_patterns_are_fetched_first_within_a_depth():
+    site = Site({'https://shop.test/': ['/about', '/product/1'], 'https://shop.test/about': [],
+                 'https://shop.test/product/1': []})
+    crawler = Crawler(site.fetch, workers=1, priority_patterns=[r'/product/'])
+    asyncio.run(crawler.crawl('https://shop.test/'))
+    assert site.requested == ['https://shop.test/', 'https://shop.test/product/1', 'https://shop.test/about']
+
+
+def test_iter_pages_holds_back_workers_until_pages_are_consumed():
+    site = Site({'https://shop.test/': [f'/p{i}' for i in range(20)],
+                 **{f'https://shop.test/p{i}': [] for i in range(20)}})
+
+    async def consume_one():
+        pages = Crawler(site.fetch, workers=2).iter_pages('https://shop.test/')
+        first = await pages.__anext__()
+        await asyncio.sleep(0.05)
+        await pages.aclose()
+        return first
+
+    first = asyncio.run(consume_one())
+    assert first.url == 'https://shop.test/'
+    # The root page plus at most one finished page per worker and one in each worker's hands
+    assert len(site.requested) <= 1 + 2 * 2
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from aiohttp import web
+
+from src.scrapers.exceptions import FetchError
+from src.scrapers.http_scraper import HTTPScraper, HTTPResponse
+from src.scrapers.retry_policy import CircuitBreaker, RetryPolicy
+from src.utils.fetch_scheduler import FetchScheduler
+
+ARTICLE = '<html><body><article>' + 'Plain server-rendered text. ' * 20 + '</article></body></html>'
+
+
+@asynccontextmanager
+async def serve(app: web.Application):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        await runner.cleanup()
+
+
+def make_scraper(**kwargs) -> HTTPScraper:
+    kwargs.setdefault('retry_policy', RetryPolicy(max_retries=2, base_delay=0, breaker=CircuitBreaker()))
+    scraper = HTTPScraper(**kwargs)
+    scraper.scheduler = FetchScheduler(rate=0, max_in_flight_per_host=1)
+    HTTPScraper.domain_decisions.clear()
+    return scraper
+
+
+def test_page_fetches_wait_for_their_scheduler_slot():
+    active, peak = 0, 0
+
+    async def page(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return web.Response(text=ARTICLE, content_type='text/html')
+
+    scraper = make_scraper()
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/page/{n}', page)
+        async with serve(app) as base:
+            try:
+                return await scraper.fetch_responses([f'{base}/page/{n}' for n in range(4)])
+            finally:
+                await scraper.close()
+
+    responses = asyncio.run(main())
+    assert len(responses) == 4
+    assert peak == 1
+    assert scraper.scheduler.get_stats()['hosts']['127.0.0.1']['requests'] == 4
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_oversized_bodies_are_refused(chunked):
+    async def big(request):
+        if not chunked:
+            return web.Response(body=b'x' * 5000, content_type='text/plain')
+        response = web.StreamResponse(headers={'Content-Type': 'text/plain'})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(5):
+            await response.write(b'x' * 1000)
+        await response.write_eof()
+        return response
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/big', big)
+        async with serve(app) as base:
+            scraper = make_scraper(max_body_bytes=4096)
+            try:
+                await scraper.fetch(f'{base}/big')
+            finally:
+                await scraper.close()
+
+    with pytest.raises(FetchError, match='4096 byte limit'):
+        asyncio.run(main())
+
+
+def test_oversized_page_falls_back_to_the_browser():
+    async def big(request):
+        return web.Response(text=ARTICLE * 20, content_type='text/html')
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/big', big)
+        async with serve(app) as base:
+            scraper = make_scraper(max_body_bytes=4096)
+            try:
+                return await scraper.fetch_responses([f'{base}/big'])
+            finally:
+                await scraper.close()
+
+    assert asyncio.run(main()) is None
+
+
+def test_transient_errors_are_retried_before_falling_back():
+    calls = 0
+
+    async def flaky(request):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return web.Response(status=503)
+        return web.Response(text=ARTICLE, content_type='text/html')
+
+    scraper = make_scraper()
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/flaky', flaky)
+        async with serve(app) as base:
+            try:
+                return await scraper.fetch_responses([f'{base}/flaky'])
+            finally:
+                await scraper.close()
+
+    responses = asyncio.run(main())
+    assert calls == 2
+    assert responses[0].text == ARTICLE
+
+
+def test_connection_failures_count_toward_the_hosts_circuit():
+    async def reset(request):
+        request.transport.close()
+        return web.Response()
+
+    breaker = CircuitBreaker(failure_threshold=3)
+    scraper = make_scraper(retry_policy=RetryPolicy(max_retries=2, base_delay=0, breaker=breaker))
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/reset', reset)
+        async with serve(app) as base:
+            try:
+                return await scraper.fetch_responses([f'{base}/reset'])
+            finally:
+                await scraper.close()
+
+    assert asyncio.run(main()) is None
+    assert breaker.is_open('http://127.0.0.1/')
+
+
+def test_body_is_decoded_with_the_declared_charset():
+    async def latin(request):
+        return web.Response(body='café'.encode('latin-1'), headers={'Content-Type': 'text/plain; charset=latin-1'})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/latin', latin)
+        async with serve(app) as base:
+            scraper = make_scraper(max_body_bytes=4096)
+            try:
+                return await scraper.fetch(f'{base}/latin')
+            finally:
+                await scraper.close()
+
+    assert asyncio.run(main()).text == 'café'
+
+
+def response(text, status=200, content_type='text/html'):
+    return HTTPResponse(url='https://shop.test/', status=status, headers={'Content-Type': content_type}, text=text)
+
+
+@pytest.mark.parametrize('html', [
+    '<html><body><div id="root"></div><script src="/app.js"></script></body></html>',
+    '<html><body><div id="__next">  </div></body></html>',
+    '<html><body><app-root></app-root></body></html>',
+    '<html><body><noscript>You need to enable JavaScript to run this app.</noscript>' + ARTICLE + '</body></html>',
+    '<html><head><title>Just a moment...</title></head><body>' + ARTICLE + '</body></html>',
+    # Scripts and styles do not count as visible text
+    '<html><body><script>' + 'var x = 1;' * 100 + '</script><p>Loading</p></body></html>',
+])
+def test_pages_that_need_javascript(html):
+    assert make_scraper().needs_javascript(response(html))
+
+
+@pytest.mark.parametrize('page', [
+    response(ARTICLE),
+    # A root element that is already rendered on the server
+    response('<html><body><div id="root"><article>' + 'Server rendered. ' * 30 + '</article></div></body></html>'),
+    # An optional noscript hint next to real content
+    response('<html><body><noscript><img src="/pixel.gif"></noscript>' + ARTICLE + '</body></html>'),
+    response('{"items": []}', content_type='application/json'),
+    response('name,price\nlamp,10\nchair,25\n', content_type='text/csv'),
+])
+def test_pages_that_render_without_javascript(page):
+    assert not make_scraper().needs_javascript(page)
+
+
+@pytest.mark.parametrize('page', [
+    response(ARTICLE, status=403),
+    response('\x00\x01binary', content_type='application/octet-stream'),
+])
+def test_errors_and_binary_bodies_go_to_the_browser(page):
+    assert make_scraper().needs_javascript(page)
+
+
+def test_domain_decision_is_remembered_until_it_expires():
+    scraper = make_scraper(decision_ttl=60)
+    assert scraper.get_decision('https://shop.test/a') is None
+    scraper.record_decision('https://shop.test/a', True)
+    assert scraper.get_decision('https://SHOP.test/b') is True
+    HTTPScraper.domain_decisions['shop.test'] = (True, time.time() - 61)
+    assert scraper.get_decision('https://shop.test/a') is None
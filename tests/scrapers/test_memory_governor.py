@@ -0,0 +1,21 @@
+import logging
+
+from src.scrapers import memory_governor
+from src.scrapers.memory_governor import MemoryGovernor
+
+
+def test_missing_psutil_is_reported_once(monkeypatch, caplog):
+    monkeypatch.setattr(memory_governor, 'psutil', None)
+    monkeypatch.setattr(MemoryGovernor, '_warned_no_psutil', False)
+    with caplog.at_level(logging.WARNING, logger=memory_governor.__name__):
+        MemoryGovernor(max_browser_memory_mb=2048)
+        MemoryGovernor(max_browser_memory_mb=2048)
+    assert sum('psutil is not installed' in record.message for record in caplog.records) == 1
+
+
+def test_no_warning_without_a_memory_limit(monkeypatch, caplog):
+    monkeypatch.setattr(memory_governor, 'psutil', None)
+    monkeypatch.setattr(MemoryGovernor, '_warned_no_psutil', False)
+    with caplog.at_level(logging.WARNING, logger=memory_governor.__name__):
+        MemoryGovernor(max_browser_memory_mb=0)
+    assert not caplog.records
@@ -0,0 +1,50 @@
+import asyncio
+
+from src.scrapers.page_readiness import NetworkTracker, PageReadinessDetector
+
+URL = 'https://shop.test/list'
+
+
+class BusyPage:
+    """A page whose network never goes idle and whose selector wait fails"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def remove_listener(self, event, handler):
+        self.handlers.pop(event, None)
+
+    async def evaluate(self, script, *args):
+        return True
+
+    async def wait_for_selector(self, selector, **kwargs):
+        raise RuntimeError("Target page, context or browser has been closed")
+
+
+def test_failed_check_cancels_the_network_idle_wait(tmp_path):
+    detector = PageReadinessDetector(max_wait=5, quiet_window=0.05, wait_for_selectors=['.item'])
+    page = BusyPage()
+    tracker = NetworkTracker(page)
+    page.handlers['request'](None)
+
+    async def main():
+        settle_time = await detector.wait_until_ready(page, URL, tracker)
+        return settle_time, asyncio.all_tasks() - {asyncio.current_task()}
+
+    settle_time, leftover = asyncio.run(main())
+    assert settle_time < 1
+    assert not leftover
+
+
+def test_profile_is_saved_and_reloaded(tmp_path):
+    path = str(tmp_path / 'readiness.json')
+    detector = PageReadinessDetector(profile_path=path)
+
+    async def main():
+        await asyncio.gather(*(detector.record_settle_time(URL, t) for t in (0.2, 0.4, 0.3)))
+
+    asyncio.run(main())
+    assert list(PageReadinessDetector(profile_path=path).settle_times['shop.test']) == [0.2, 0.4, 0.3]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from fakes import FakeBrowser, FakePage, FakeResponse
+from src.scrapers.cdp_browser_manager import CDPBrowserManager
+from src.scrapers.exceptions import FetchError
+from src.scrapers.playwright_scraper import PlaywrightScraper, ScraperConfig
+
+URL = 'https://shop.test/cart'
+
+
+class RejectedPage(FakePage):
+    def __init__(self, context, status):
+        super().__init__(context)
+        self.status = status
+        self.scripts = []
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        return FakeResponse(url, status=self.status)
+
+    async def evaluate(self, script, *args):
+        self.scripts.append(script)
+
+
+def make_scraper(tmp_path, **options):
+    return PlaywrightScraper(ScraperConfig(cache_dir=str(tmp_path), use_cache=False, adaptive_wait=False,
+                                           max_retries=0, **options))
+
+
+def test_rejected_state_is_cleared_from_the_store_and_the_pooled_context(tmp_path):
+    scraper = make_scraper(tmp_path)
+
+    async def main():
+        context = await FakeBrowser().new_context()
+        await context.add_cookies([{'name': 'session', 'value': 'v', 'domain': '.shop.test', 'path': '/'}])
+        scraper.storage_states.put(URL, await context.storage_state())
+        page = RejectedPage(context, 403)
+        with pytest.raises(FetchError):
+            await scraper.navigate_once(page, URL)
+        return context, page
+
+    context, page = asyncio.run(main())
+    assert scraper.storage_states.get(URL) is None
+    assert context.cookies == []
+    assert any('localStorage.clear()' in script for script in page.scripts)
+
+
+def test_rejection_leaves_the_users_own_profile_alone(tmp_path):
+    scraper = make_scraper(tmp_path)
+    scraper.cdp_manager = CDPBrowserManager(use_default_context=True)
+    endpoint = scraper.cdp_manager.endpoints[0]
+
+    async def main():
+        context = await FakeBrowser().new_context()
+        endpoint.default_context_key = ('default',)
+        endpoint.contexts[endpoint.default_context_key] = context
+        await context.add_cookies([{'name': 'sid', 'value': 'v', 'domain': '.mail.test', 'path': '/'}])
+        page = RejectedPage(context, 403)
+        with pytest.raises(FetchError):
+            await scraper.navigate_once(page, URL)
+        await scraper.save_storage_state(context, URL)
+        return context, page
+
+    context, page = asyncio.run(main())
+    assert [cookie['name'] for cookie in context.cookies] == ['sid']
+    assert page.scripts == []
+    assert scraper.storage_states.get(URL) is None
+
+
+def test_pooled_contexts_are_per_domain_when_states_are_saved(tmp_path):
+    with_states = make_scraper(tmp_path)
+    assert with_states.context_setup_key('https://a.test/') != with_states.context_setup_key('https://b.test/')
+    assert with_states.context_setup_key('https://www.a.test/x') == with_states.context_setup_key('https://a.test/')
+
+    without_states = make_scraper(tmp_path, use_storage_state=False)
+    assert without_states.context_setup_key('https://a.test/') == without_states.context_setup_key('https://b.test/')
@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import pytest
+
+from src.scrapers.exceptions import CircuitOpenError, FetchError
+from src.scrapers.retry_policy import CircuitBreaker, RetryPolicy, is_retriable
+from src.utils.fetch_scheduler import FetchScheduler
+
+URL = 'https://h.test/page'
+
+
+def failing(status, retriable):
+    async def operation():
+        raise FetchError(URL, f"HTTP {status}", status=status, retriable=retriable)
+    return operation
+
+
+async def succeed():
+    return 'ok'
+
+
+def policy(breaker, **kwargs):
+    return RetryPolicy(max_retries=kwargs.pop('max_retries', 0), base_delay=0, breaker=breaker, **kwargs)
+
+
+def test_breaker_opens_after_the_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure(URL)
+    breaker.before_request(URL)
+    breaker.record_failure(URL)
+    assert breaker.is_open(URL)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(URL)
+
+
+def test_breaker_half_open_allows_one_trial_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure(URL)
+    time.sleep(0.06)
+    breaker.before_request(URL)
+    # A second request while the trial is running still fails fast
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(URL)
+    breaker.record_success(URL)
+    breaker.before_request(URL)
+    assert not breaker.is_open(URL)
+    assert breaker.get_stats() == {}
+
+
+def test_breaker_half_open_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure(URL)
+    time.sleep(0.06)
+    breaker.before_request(URL)
+    breaker.record_failure(URL)
+    assert breaker.is_open(URL)
+
+
+def test_breaker_hosts_are_independent():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure(URL)
+    breaker.before_request('https://other.test/')
+
+
+def test_non_retriable_errors_leave_the_failure_count_alone():
+    breaker = CircuitBreaker(failure_threshold=3)
+    retry = policy(breaker)
+    for _ in range(2):
+        with pytest.raises(FetchError):
+            asyncio.run(retry.run(URL, failing(503, True)))
+    with pytest.raises(FetchError):
+        asyncio.run(retry.run(URL, failing(404, False)))
+    assert breaker.hosts['h.test'].failures == 2
+    with pytest.raises(FetchError):
+        asyncio.run(retry.run(URL, failing(503, True)))
+    assert breaker.is_open(URL)
+
+
+def test_non_retriable_error_ends_a_half_open_trial_without_closing_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure(URL)
+    time.sleep(0.06)
+    with pytest.raises(FetchError):
+        asyncio.run(policy(breaker).run(URL, failing(404, False)))
+    assert breaker.hosts['h.test'].failures == 1
+    # The next request becomes the trial
+    assert asyncio.run(policy(breaker).run(URL, succeed)) == 'ok'
+    assert breaker.get_stats() == {}
+
+
+def test_throttling_does_not_count_against_the_host():
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(FetchError):
+        asyncio.run(policy(breaker).run(URL, failing(429, True)))
+    assert not breaker.is_open(URL)
+
+
+def test_retries_transient_failures_then_succeeds():
+    breaker = CircuitBreaker(failure_threshold=5)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise asyncio.TimeoutError()
+        return 'ok'
+
+    assert asyncio.run(policy(breaker, max_retries=3).run(URL, flaky)) == 'ok'
+    assert len(attempts) == 3
+    assert breaker.get_stats() == {}
+
+
+def test_time_queued_for_the_scheduler_is_not_part_of_the_attempt_deadline():
+    scheduler = FetchScheduler(rate=0, base_backoff=0.2)
+    breaker = CircuitBreaker(failure_threshold=1)
+    retry = policy(breaker, attempt_timeout=0.05)
+
+    async def main():
+        # The host is paused for longer than the attempt deadline
+        scheduler.report(URL, 429)
+        started = time.monotonic()
+        result = await retry.run(URL, succeed, slot=lambda: scheduler.slot(URL))
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(main())
+    assert result == 'ok'
+    assert elapsed >= 0.09
+    assert breaker.get_stats() == {}
+
+
+@pytest.mark.parametrize('error, expected', [
+    (FetchError(URL, 'HTTP 503', status=503, retriable=True), True),
+    (FetchError(URL, 'HTTP 404', status=404), False),
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (Exception('net::ERR_NAME_NOT_RESOLVED at https://h.test'), False),
+    (Exception('net::ERR_CONNECTION_RESET'), True),
+    (CircuitOpenError('open'), False),
+    (ValueError('bad'), False),
+])
+def test_is_retriable(error, expected):
+    assert is_retriable(error) is expected
@@ -0,0 +1,96 @@
+import asyncio
+
+from src.scrapers.subresource_cache import SubresourceCache
+
+SCRIPT = 'https://cdn.test/app.js'
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type='script'):
+        self.url = url
+        self.method = 'GET'
+        self.resource_type = resource_type
+        self.headers = {}
+
+
+class FakeFetched:
+    def __init__(self, status, headers, body=b''):
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class FakeRoute:
+    """Answers fetch() from ``server``, a function of the request headers"""
+
+    def __init__(self, url, server, resource_type='script'):
+        self.request = FakeRequest(url, resource_type)
+        self.server = server
+        self.fetched_with = []
+        self.fulfilled = None
+
+    async def fetch(self, headers=None):
+        self.fetched_with.append(headers)
+        return self.server(headers or {})
+
+    async def fulfill(self, response=None, status=None, headers=None, body=None):
+        self.fulfilled = {'status': status or response.status, 'body': body}
+
+    async def fallback(self):
+        self.fulfilled = 'fallback'
+
+
+def request(cache, url, server, resource_type='script'):
+    route = FakeRoute(url, server, resource_type)
+    asyncio.run(cache.handle_route(route))
+    return route
+
+
+def test_fresh_hits_skip_the_network_and_never_commit(tmp_path):
+    cache = SubresourceCache(str(tmp_path))
+    server = lambda headers: FakeFetched(200, {'cache-control': 'max-age=600'}, b'bundle')
+    request(cache, SCRIPT, server)
+
+    changes = cache.conn.total_changes
+    route = request(cache, SCRIPT, server)
+    assert route.fetched_with == []
+    assert route.fulfilled['body'] == b'bundle'
+    assert cache.conn.total_changes == changes
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_304_without_freshness_headers_keeps_the_lifetime(tmp_path):
+    cache = SubresourceCache(str(tmp_path))
+    request(cache, SCRIPT, lambda headers: FakeFetched(200, {'cache-control': 'max-age=600', 'etag': '"v1"'}, b'x'))
+    cache.index[SCRIPT].stored_at -= 601
+
+    route = request(cache, SCRIPT, lambda headers: FakeFetched(304, {'etag': '"v1"'}))
+    assert route.fetched_with[0]['If-None-Match'] == '"v1"'
+    assert route.fulfilled['body'] == b'x'
+    assert cache.index[SCRIPT].ttl == 600
+    assert cache.index[SCRIPT].is_fresh()
+
+
+def test_least_recently_used_entries_are_evicted_and_the_index_survives_restarts(tmp_path):
+    cache = SubresourceCache(str(tmp_path), max_bytes=25)
+    server = lambda headers: FakeFetched(200, {'cache-control': 'max-age=600'}, b'0123456789')
+    for name in ('a', 'b'):
+        request(cache, f'https://cdn.test/{name}.js', server)
+    # Using a.js makes b.js the least recently used
+    request(cache, 'https://cdn.test/a.js', server)
+    request(cache, 'https://cdn.test/c.js', server)
+
+    assert list(cache.index) == ['https://cdn.test/a.js', 'https://cdn.test/c.js']
+    reopened = SubresourceCache(str(tmp_path), max_bytes=25)
+    assert list(reopened.index) == ['https://cdn.test/a.js', 'https://cdn.test/c.js']
+    assert reopened.get_stats()['size_bytes'] == 20
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    cache = SubresourceCache(str(tmp_path))
+    request(cache, SCRIPT, lambda headers: FakeFetched(200, {'cache-control': 'private, max-age=600'}, b'x'))
+    request(cache, 'https://api.test/data', lambda headers: FakeFetched(200, {}, b'{}'), resource_type='xhr')
+    assert cache.get_stats()['entries'] == 0
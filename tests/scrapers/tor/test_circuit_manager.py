@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+from tor_stubs import ControlStub, SocksStub
+from src.scrapers.tor.circuit_manager import TorCircuitManager, TorController
+from src.scrapers.tor.tor_config import TorConfig
+from src.scrapers.tor.tor_manager import TorManager
+from src.utils.event_loop import BackgroundLoop
+from src.utils.fetch_scheduler import FetchScheduler
+
+ONION = 'http://' + 'a' * 56 + '.onion'
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+async def get(circuit, path='/'):
+    async with circuit.get_session().get(ONION + path) as response:
+        return await response.text()
+
+
+def test_each_circuit_uses_its_own_socks_credentials():
+    async def main():
+        socks = await SocksStub().start()
+        manager = TorCircuitManager(socks_port=socks.port, circuit_count=3)
+        try:
+            for circuit in manager.circuits:
+                await get(circuit)
+            first = manager.circuits[0]
+            first.rotate_credentials()
+            await get(first)
+            await manager.maintain(first)
+            return socks, first
+        finally:
+            await manager.close()
+            await socks.stop()
+
+    socks, first = asyncio.run(main())
+    assert len(set(socks.credentials)) == 4
+    assert len({password for _, password in socks.credentials}) == 4
+    # The rotated circuit moved to new credentials and its old session was closed
+    assert socks.usernames[-1] == first.username != socks.usernames[0]
+    assert first.retired_sessions == []
+
+
+def test_newnym_is_authenticated_and_rate_limited():
+    async def main():
+        control = await ControlStub(password='secret').start()
+        controller = TorController(port=control.port, password='secret')
+        manager = TorCircuitManager(circuit_count=2, controller=controller, newnym_interval=0.2)
+        try:
+            sent = [await manager.renew_all(), await manager.renew_all()]
+            await asyncio.sleep(0.25)
+            sent.append(await manager.renew_all())
+            return control, sent
+        finally:
+            await manager.close()
+            await control.stop()
+
+    control, sent = asyncio.run(main())
+    assert sent == [True, False, True]
+    assert control.newnyms == 2
+    assert control.commands[:2] == ['PROTOCOLINFO 1', 'AUTHENTICATE "secret"']
+
+
+def test_rejected_control_password_is_reported_not_raised():
+    async def main():
+        control = await ControlStub(password='secret').start()
+        manager = TorCircuitManager(controller=TorController(port=control.port, password='wrong'))
+        try:
+            return await manager.renew_all(), control
+        finally:
+            await manager.close()
+            await control.stop()
+
+    sent, control = asyncio.run(main())
+    assert sent is False
+    assert control.newnyms == 0
+
+
+def fetch_through_stubs(respond, **config):
+    """Fetch one onion page through the stubs with a real TorManager"""
+    async def main():
+        socks = await SocksStub(respond).start()
+        control = await ControlStub().start()
+        tor = TorManager(TorConfig(socks_port=socks.port, control_port=control.port, control_password='secret',
+                                   circuit_count=2, verify_connection=False, use_cache=False, **config))
+        tor.scheduler = FetchScheduler(rate=0)
+        try:
+            await tor.fetch_response(ONION + '/')
+            circuit = next(c for c in tor.circuits.circuits if c.requests or c.generation > 1)
+            return socks, control, circuit
+        finally:
+            await tor.close()
+            await socks.stop()
+            await control.stop()
+
+    return asyncio.run(main())
+
+
+def test_large_page_on_a_fast_circuit_is_not_degraded():
+    async def slow_body(username, path, writer):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 5000\r\n\r\n')
+        for _ in range(5):
+            await writer.drain()
+            await asyncio.sleep(0.1)
+            writer.write(b'x' * 1000)
+
+    socks, control, circuit = fetch_through_stubs(slow_body, circuit_timeout=0.2)
+    assert circuit.generation == 1
+    assert circuit.latency < 0.2
+    assert circuit.bytes_received == 5000
+    assert control.newnyms == 0
+
+
+def test_slow_circuit_is_rotated_out_and_tor_asked_for_new_circuits():
+    async def slow_headers(username, path, writer):
+        await asyncio.sleep(0.3)
+        await writer.drain()
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 2\r\n\r\nok')
+
+    socks, control, circuit = fetch_through_stubs(slow_headers, circuit_timeout=0.2)
+    assert circuit.generation == 2
+    assert circuit.username != socks.usernames[0]
+    # With two circuits, one replacement is enough to count as most of them degrading
+    assert control.newnyms == 1
+
+
+def test_session_from_a_previous_loop_is_closed_on_that_loop():
+    loop = BackgroundLoop()
+    socks = loop.run(SocksStub().start())
+    manager = TorCircuitManager(socks_port=socks.port, circuit_count=1)
+    circuit = manager.circuits[0]
+    try:
+        loop.run(get(circuit))
+        old = circuit.session
+
+        async def on_new_loop():
+            circuit.get_session()
+            await circuit.close_retired()
+            await manager.close()
+
+        asyncio.run(on_new_loop())
+        assert wait_for(lambda: old.closed)
+    finally:
+        loop.run(socks.stop())
+        loop.stop()
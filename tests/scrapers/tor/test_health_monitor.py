@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from src.scrapers.tor.exceptions import TorConnectionError
+from src.scrapers.tor.health_monitor import TorHealthMonitor
+from src.utils.event_loop import BackgroundLoop
+
+
+class Tor:
+    def __init__(self):
+        self.up = True
+        self.checks = 0
+
+    async def check(self):
+        self.checks += 1
+        await asyncio.sleep(0)
+        if not self.up:
+            raise TorConnectionError("SOCKS port refused the connection")
+        return True
+
+
+def test_verdict_is_cached_between_fetches():
+    tor = Tor()
+    monitor = TorHealthMonitor(tor.check, interval=60, ttl=60)
+
+    async def main():
+        await monitor.ensure()
+        await monitor.ensure()
+        assert monitor.get_stats()['monitoring']
+        await monitor.close()
+
+    asyncio.run(main())
+    assert tor.checks == 1
+
+
+def test_monitor_rechecks_once_the_verdict_is_old():
+    tor = Tor()
+    monitor = TorHealthMonitor(tor.check, interval=0.05, ttl=600, recheck_interval=0.05)
+
+    async def main():
+        await monitor.ensure()
+        tor.up = False
+        await asyncio.sleep(0.08)
+        await monitor.close()
+        return monitor.get_stats()
+
+    stats = asyncio.run(main())
+    assert tor.checks >= 2
+    assert stats['status'] == 'unhealthy'
+    assert stats['checked_s_ago'] == 0
+
+
+def test_successful_fetches_postpone_the_periodic_check():
+    tor = Tor()
+    monitor = TorHealthMonitor(tor.check, interval=0.1)
+
+    async def main():
+        await monitor.ensure()
+        for _ in range(4):
+            await asyncio.sleep(0.05)
+            monitor.report_success()
+        await monitor.close()
+
+    asyncio.run(main())
+    assert tor.checks == 1
+
+
+def test_unhealthy_verdict_fails_fetches_until_tor_recovers():
+    tor = Tor()
+    tor.up = False
+    monitor = TorHealthMonitor(tor.check, recheck_interval=0)
+
+    async def main():
+        with pytest.raises(TorConnectionError, match='refused'):
+            await monitor.ensure()
+        tor.up = True
+        await monitor.ensure()
+
+    asyncio.run(main())
+    assert monitor.healthy
+
+
+def test_monitor_keeps_running_on_the_background_loop():
+    tor = Tor()
+    monitor = TorHealthMonitor(tor.check, interval=0.05)
+    loop = BackgroundLoop()
+    try:
+        loop.run(monitor.ensure())
+        # The stats are read from this thread without waiting on the loop
+        time.sleep(0.2)
+        assert tor.checks >= 3
+        assert monitor.get_stats()['monitoring']
+    finally:
+        loop.run(monitor.close())
+        loop.stop()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from tor_stubs import SocksStub
+from src.scrapers.exceptions import FetchError
+from src.scrapers.tor.tor_config import TorConfig
+from src.scrapers.tor.tor_manager import TorManager, response_charset
+from src.utils.fetch_scheduler import FetchScheduler
+
+ONION = 'http://' + 'b' * 56 + '.onion/'
+
+
+def streaming(length, chunks, delay=0.0, declared=None):
+    """Responder sending ``chunks`` pieces of ``length`` bytes, ``delay`` seconds apart"""
+    async def respond(username, path, writer):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                     b'Content-Length: %d\r\n\r\n' % (declared or length * chunks))
+        for _ in range(chunks):
+            await writer.drain()
+            if delay:
+                await asyncio.sleep(delay)
+            writer.write(b'x' * length)
+    return respond
+
+
+def fetch(respond, **config):
+    async def main():
+        socks = await SocksStub(respond).start()
+        tor = TorManager(TorConfig(socks_port=socks.port, circuit_count=1, auto_renew_circuit=False,
+                                   verify_connection=False, use_cache=False, **config))
+        tor.scheduler = FetchScheduler(rate=0)
+        try:
+            try:
+                return await tor.fetch_response(ONION), tor.circuits.circuits[0]
+            except FetchError as e:
+                return e, tor.circuits.circuits[0]
+        finally:
+            await tor.close()
+            await socks.stop()
+
+    return asyncio.run(main())
+
+
+def test_complete_page():
+    response, circuit = fetch(streaming(1000, 3))
+    assert response.truncated is None
+    assert len(response.text) == 3000
+    assert circuit.bytes_received == 3000
+
+
+def test_page_is_cut_off_at_the_size_limit():
+    response, circuit = fetch(streaming(1000, 10), max_page_bytes=4500)
+    assert response.truncated == 'size limit'
+    assert len(response.text) == 4500
+    # Stopping early is not the circuit's fault
+    assert circuit.failures == 0
+
+
+def test_page_is_cut_off_at_the_time_limit():
+    response, circuit = fetch(streaming(100, 20, delay=0.05), max_download_seconds=0.3)
+    assert response.truncated == 'time limit'
+    assert 0 < len(response.text) < 2000
+    assert circuit.failures == 0
+
+
+def test_dropped_connection_keeps_what_arrived():
+    response, circuit = fetch(streaming(1000, 2, declared=5000))
+    assert response.truncated == 'connection lost'
+    assert len(response.text) == 2000
+    assert circuit.failures == 1
+
+
+def test_circuit_failing_before_the_first_byte_is_a_retriable_error():
+    async def hang_up(username, path, writer):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n')
+
+    error, circuit = fetch(hang_up)
+    assert isinstance(error, FetchError)
+    assert error.retriable
+    assert circuit.consecutive_failures == 1
+
+
+@pytest.mark.parametrize('headers, head, expected', [
+    ({'Content-Type': 'text/html; charset=ISO-8859-1'}, b'', 'iso8859-1'),
+    ({}, b'<html><head><meta charset="windows-1251">', 'cp1251'),
+    ({}, b'<html>', 'utf-8'),
+    ({'Content-Type': 'text/html; charset=bogus'}, b'', 'utf-8'),
+])
+def test_response_charset(headers, head, expected):
+    assert response_charset(headers, head) == expected
@@ -0,0 +1,38 @@
+import asyncio
+import socket
+
+import pytest
+
+from src.scrapers.retry_policy import CircuitBreaker, RetryPolicy
+from src.scrapers.tor.exceptions import TorConnectionError
+from src.scrapers.tor.tor_config import TorConfig
+from src.scrapers.tor.tor_scraper import TorScraper
+
+ONION = 'http://' + 'c' * 56 + '.onion/'
+
+
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_tor_outage_does_not_open_the_onion_hosts_circuit():
+    scraper = TorScraper(TorConfig(socks_port=closed_port(), circuit_count=1, auto_renew_circuit=False,
+                                   health_check_interval=0, use_cache=False))
+    breaker = CircuitBreaker(failure_threshold=1)
+    scraper.retry_policy = RetryPolicy(max_retries=0, breaker=breaker)
+
+    async def main():
+        try:
+            with pytest.raises(TorConnectionError):
+                await scraper.fetch_content(ONION)
+            with pytest.raises(TorConnectionError):
+                async for _ in scraper.iter_content(ONION):
+                    pass
+        finally:
+            await scraper.close()
+
+    asyncio.run(main())
+    assert not breaker.is_open(ONION)
+    assert breaker.get_stats() == {}
@@ -0,0 +1,39 @@
+import json
+import os
+
+import pytest
+
+from src.utils.html_text import html_to_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'har')
+
+with open(os.path.join(FIXTURES_DIR, 'manifest.json'), 'r', encoding='utf-8') as f:
+    MANIFEST = json.load(f)
+
+
+def recorded_text(fixture):
+    """Everything the fixture's pages and API responses say, as the benchmark's pipeline sees it"""
+    with open(os.path.join(FIXTURES_DIR, fixture['har']), 'r', encoding='utf-8') as f:
+        entries = json.load(f)['log']['entries']
+    texts = []
+    for entry in entries:
+        content = entry['response']['content']
+        if 'html' in content.get('mimeType', ''):
+            texts.append(html_to_text(content['text']))
+        elif 'json' in content.get('mimeType', ''):
+            texts.append(json.dumps(json.loads(content['text']), ensure_ascii=False))
+    return '\n'.join(texts)
+
+
+@pytest.mark.parametrize('fixture', MANIFEST, ids=[fixture['name'] for fixture in MANIFEST])
+def test_expected_extraction_matches_the_recordings(fixture):
+    text = recorded_text(fixture)
+    for record in fixture['extracted']:
+        for value in record.values():
+            assert value in text, f"{fixture['name']}: {value!r} does not appear in {fixture['har']}"
+
+
+def test_books_expectation_lists_every_recorded_book():
+    books = next(fixture for fixture in MANIFEST if fixture['name'] == 'books')
+    text = recorded_text(books)
+    assert len(books['extracted']) == text.count(' / 5 stars')
@@ -0,0 +1,112 @@
+"""Local stand-ins for Tor's SOCKS and control ports, speaking just enough of each protocol"""
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+# Called with the SOCKS username and the request path; writes a complete HTTP response
+Responder = Callable[[str, str, asyncio.StreamWriter], Awaitable[None]]
+
+
+async def page(username: str, path: str, writer: asyncio.StreamWriter):
+    body = f'<html><body>{path} via {username}</body></html>'.encode()
+    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                 b'Content-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+
+
+class SocksStub:
+    """SOCKS5 with username/password authentication; every CONNECT is answered by ``respond``"""
+
+    def __init__(self, respond: Responder = page):
+        self.respond = respond
+        self.credentials: List[Tuple[str, str]] = []
+        self.requests: List[Tuple[str, str]] = []
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> 'SocksStub':
+        self._server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def usernames(self) -> List[str]:
+        return [username for username, _ in self.credentials]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            _, count = await reader.readexactly(2)
+            if 2 not in await reader.readexactly(count):
+                writer.write(b'\x05\xff')
+                return
+            writer.write(b'\x05\x02')
+            await reader.readexactly(1)
+            username = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+            password = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+            self.credentials.append((username, password))
+            writer.write(b'\x01\x00')
+
+            _, _, _, address_type = await reader.readexactly(4)
+            if address_type == 3:
+                await reader.readexactly((await reader.readexactly(1))[0])
+            else:
+                await reader.readexactly(4 if address_type == 1 else 16)
+            await reader.readexactly(2)
+            writer.write(b'\x05\x00\x00\x01' + bytes(6))
+
+            request = await reader.readuntil(b'\r\n\r\n')
+            path = request.split(b' ', 2)[1].decode()
+            self.requests.append((username, path))
+            await self.respond(username, path, writer)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class ControlStub:
+    """Tor control port accepting one password and recording every command"""
+
+    def __init__(self, password: str = 'secret'):
+        self.password = password
+        self.commands: List[str] = []
+        self.port: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> 'ControlStub':
+        self._server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def newnyms(self) -> int:
+        return self.commands.count('SIGNAL NEWNYM')
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        authenticated = False
+        try:
+            while line := await reader.readline():
+                command = line.decode().strip()
+                self.commands.append(command)
+                if command.startswith('PROTOCOLINFO'):
+                    writer.write(b'250-PROTOCOLINFO 1\r\n250-AUTH METHODS=HASHEDPASSWORD\r\n'
+                                 b'250-VERSION Tor="0.4.8.9"\r\n250 OK\r\n')
+                elif command.startswith('AUTHENTICATE'):
+                    authenticated = command == f'AUTHENTICATE "{self.password}"'
+                    writer.write(b'250 OK\r\n' if authenticated else b'515 Authentication failed\r\n')
+                elif not authenticated:
+                    writer.write(b'514 Authentication required.\r\n')
+                else:
+                    writer.write(b'250 OK\r\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,30 @@
+from src.utils.bloom_filter import BloomFilter
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(1000)
+    urls = [f'https://example.com/page/{i}' for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+    assert all(url in bloom for url in urls)
+
+
+def test_add_reports_duplicates():
+    bloom = BloomFilter(100)
+    assert bloom.add('https://example.com/')
+    assert not bloom.add('https://example.com/')
+    assert len(bloom) == 1
+
+
+def test_false_positive_rate_stays_near_the_target():
+    bloom = BloomFilter(10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f'https://example.com/seen/{i}')
+    false_positives = sum(f'https://example.com/unseen/{i}' in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.02
+
+
+def test_size_follows_capacity_and_error_rate():
+    bloom = BloomFilter(1_000_000, error_rate=0.001)
+    assert 1.7e6 < len(bloom.bits) < 1.9e6
+    assert bloom.num_hashes == 10
@@ -0,0 +1,135 @@
+import asyncio
+import time
+import zlib
+from email.utils import formatdate
+
+import pytest
+
+from src.utils.content_cache import ContentCache, freshness_lifetime
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ContentCache(str(tmp_path), default_ttl=900.0)
+
+
+def age(cache, url, seconds, options=None):
+    """Pretend the entry for ``url`` was stored ``seconds`` ago"""
+    cache.conn.execute('UPDATE entries SET stored_at = stored_at - ? WHERE key = ?',
+                       (seconds, cache.make_key(url, options)))
+    cache.conn.commit()
+
+
+class Revalidator:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.calls = []
+
+    async def __call__(self, url, conditional):
+        self.calls.append(conditional)
+        return self.status, self.headers
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({'Cache-Control': 'max-age=60'}, 60.0),
+    ({'Cache-Control': 'public, s-maxage=120'}, 120.0),
+    ({'Cache-Control': 'no-cache'}, 0.0),
+    ({'Cache-Control': 'no-store'}, None),
+    ({}, 900.0),
+    ({'Expires': 'not a date'}, 0.0),
+])
+def test_freshness_lifetime(headers, expected):
+    assert freshness_lifetime(headers, 900.0) == expected
+
+
+def test_freshness_lifetime_from_expires():
+    ttl = freshness_lifetime({'expires': formatdate(time.time() + 300, usegmt=True)}, None)
+    assert 295 <= ttl <= 300
+
+
+def test_fresh_entry_is_served_without_revalidation(cache):
+    cache.put('https://example.test/a', 'page', {'Cache-Control': 'max-age=60', 'ETag': '"v1"'})
+    revalidate = Revalidator(304)
+    entry = asyncio.run(cache.lookup('https://example.test/a', revalidate=revalidate))
+    assert entry.text == 'page'
+    assert revalidate.calls == []
+    assert cache.hits == 1
+
+
+def test_no_store_responses_are_not_kept(cache):
+    cache.put('https://example.test/a', 'page', {'Cache-Control': 'no-store'})
+    assert cache.get('https://example.test/a') is None
+
+
+def test_stale_entry_is_revalidated_with_its_validators(cache):
+    url = 'https://example.test/a'
+    cache.put(url, 'page', {'Cache-Control': 'max-age=60', 'ETag': '"v1"',
+                            'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+    age(cache, url, 120)
+    revalidate = Revalidator(304)
+    entry = asyncio.run(cache.lookup(url, revalidate=revalidate))
+    assert entry.text == 'page'
+    assert revalidate.calls == [{'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}]
+    assert cache.revalidations == 1
+
+
+def test_304_without_cache_headers_keeps_the_previous_lifetime(cache):
+    url = 'https://example.test/a'
+    # Expires has passed by the time the entry is revalidated
+    cache.put(url, 'page', {'Expires': formatdate(time.time() + 60, usegmt=True), 'ETag': '"v1"'})
+    age(cache, url, 120)
+    revalidate = Revalidator(304, {'ETag': '"v1"'})
+    asyncio.run(cache.lookup(url, revalidate=revalidate))
+
+    refreshed = cache.get(url)
+    assert 55 <= refreshed.ttl <= 60
+    assert refreshed.is_fresh()
+    asyncio.run(cache.lookup(url, revalidate=revalidate))
+    assert len(revalidate.calls) == 1
+
+
+def test_304_with_cache_headers_takes_the_new_lifetime(cache):
+    url = 'https://example.test/a'
+    cache.put(url, 'page', {'Cache-Control': 'max-age=60', 'ETag': '"v1"'})
+    age(cache, url, 120)
+    asyncio.run(cache.lookup(url, revalidate=Revalidator(304, {'Cache-Control': 'max-age=600', 'ETag': '"v2"'})))
+    refreshed = cache.get(url)
+    assert refreshed.ttl == 600.0
+    assert refreshed.headers['ETag'] == '"v2"'
+
+
+def test_changed_page_is_a_miss(cache):
+    url = 'https://example.test/a'
+    cache.put(url, 'page', {'Cache-Control': 'max-age=60', 'ETag': '"v1"'})
+    age(cache, url, 120)
+    assert asyncio.run(cache.lookup(url, revalidate=Revalidator(200))) is None
+    assert cache.misses == 1
+
+
+def test_stale_entry_without_validators_is_not_revalidated(cache):
+    url = 'https://example.test/a'
+    cache.put(url, 'page', {'Cache-Control': 'max-age=60'})
+    age(cache, url, 120)
+    revalidate = Revalidator(304)
+    assert asyncio.run(cache.lookup(url, revalidate=revalidate)) is None
+    assert revalidate.calls == []
+
+
+def test_options_and_url_normalization_select_the_entry(cache):
+    asyncio.run(cache.store('https://Example.test/a#top', 'rendered', {}, {'renderer': 'http'}))
+    assert cache.get('https://example.test/a', {'renderer': 'http'}).text == 'rendered'
+    assert cache.get('https://example.test/a', {'renderer': 'tor'}) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    # Room for two compressed pages, not three
+    cache = ContentCache(str(tmp_path), max_bytes=2 * len(zlib.compress(b'a' * 100, 6)) + 1)
+    cache.put('https://example.test/first', 'a' * 100)
+    cache.put('https://example.test/second', 'b' * 100)
+    cache.get('https://example.test/first')
+    cache.put('https://example.test/third', 'c' * 100)
+    assert cache.get('https://example.test/second') is None
+    assert cache.get('https://example.test/first') is not None
+    assert cache.get('https://example.test/third') is not None
+    assert cache.evictions == 1
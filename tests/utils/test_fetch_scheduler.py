@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.fetch_scheduler import FetchScheduler
+
+
+async def timed_fetches(scheduler, urls, hold=0.0):
+    """Start times of fetches that each hold their slot for ``hold`` seconds"""
+    started = time.monotonic()
+    times = {}
+
+    async def fetch(index, url):
+        async with scheduler.slot(url):
+            times[index] = time.monotonic() - started
+            await asyncio.sleep(hold)
+
+    await asyncio.gather(*(fetch(index, url) for index, url in enumerate(urls)))
+    return [times[index] for index in range(len(urls))]
+
+
+def test_burst_then_rate_limit_per_host():
+    scheduler = FetchScheduler(rate=20, burst=3, max_in_flight_per_host=10)
+    times = sorted(asyncio.run(timed_fetches(scheduler, ['https://a.test/'] * 5)))
+    assert max(times[:3]) < 0.03
+    # The bucket refills at 20 tokens a second, so the next two wait about 50ms each
+    assert times[3] == pytest.approx(0.05, abs=0.03)
+    assert times[4] == pytest.approx(0.10, abs=0.03)
+
+
+def test_hosts_do_not_wait_on_each_other():
+    scheduler = FetchScheduler(rate=1, burst=1, max_in_flight_per_host=10)
+    times = asyncio.run(timed_fetches(scheduler, ['https://a.test/', 'https://b.test/', 'https://c.test/']))
+    assert max(times) < 0.03
+
+
+def test_in_flight_caps():
+    per_host = FetchScheduler(rate=0, max_in_flight_per_host=2, max_in_flight=10)
+    times = asyncio.run(timed_fetches(per_host, ['https://a.test/'] * 4, hold=0.05))
+    assert sorted(times)[2] >= 0.045
+
+    overall = FetchScheduler(rate=0, max_in_flight_per_host=10, max_in_flight=1)
+    times = asyncio.run(timed_fetches(overall, ['https://a.test/', 'https://b.test/'], hold=0.05))
+    assert max(times) >= 0.045
+
+
+def test_throttled_host_pauses_for_retry_after():
+    scheduler = FetchScheduler(rate=0)
+    scheduler.report('https://a.test/x', 429, {'Retry-After': '1'})
+    assert scheduler.get_stats()['hosts']['a.test']['paused_for'] == pytest.approx(1, abs=0.1)
+    assert scheduler.get_stats()['hosts']['a.test']['throttled'] == 1
+    # A successful answer resets the backoff, not the pause already in force
+    scheduler.report('https://a.test/y', 200)
+    assert scheduler.hosts['a.test'].consecutive_throttles == 0
+    assert scheduler.get_stats()['hosts']['a.test']['paused_for'] > 0
+
+
+def test_backoff_without_retry_after_grows_and_is_capped():
+    scheduler = FetchScheduler(rate=0, base_backoff=1, max_backoff=3)
+    pauses = []
+    for _ in range(4):
+        scheduler.report('https://a.test/', 503)
+        pauses.append(scheduler.hosts['a.test'].blocked_until - time.monotonic())
+    assert pauses[0] <= 1
+    assert pauses[-1] <= 3
+    assert scheduler.hosts['a.test'].consecutive_throttles == 4
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('120', 120.0),
+    (None, None),
+    ('soon', None),
+])
+def test_parse_retry_after(value, expected):
+    assert FetchScheduler.parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert FetchScheduler.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
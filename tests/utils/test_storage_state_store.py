@@ -0,0 +1,51 @@
+import time
+
+from src.utils.storage_state_store import StorageStateStore, state_domain
+
+URL = 'https://www.shop.test/cart'
+
+
+def cookie(name, domain='.shop.test', expires=-1):
+    return {'name': name, 'value': 'v', 'domain': domain, 'path': '/', 'expires': expires}
+
+
+def state(*cookies, origins=()):
+    return {'cookies': list(cookies), 'origins': list(origins)}
+
+
+def test_state_is_keyed_by_domain_without_www(tmp_path):
+    store = StorageStateStore(str(tmp_path))
+    store.put(URL, state(cookie('session'), cookie('other', domain='tracker.test'),
+                         origins=[{'origin': 'https://shop.test', 'localStorage': [{'name': 'a', 'value': '1'}]},
+                                  {'origin': 'https://tracker.test', 'localStorage': [{'name': 'b', 'value': '2'}]}]))
+
+    loaded = store.get('https://shop.test/')
+    assert state_domain(URL) == 'shop.test'
+    assert [c['name'] for c in loaded['cookies']] == ['session']
+    assert [o['origin'] for o in loaded['origins']] == ['https://shop.test']
+    assert store.get('https://tracker.test/') is None
+
+
+def test_expired_states_and_cookies_are_not_loaded(tmp_path):
+    store = StorageStateStore(str(tmp_path), ttl=60)
+    store.put(URL, state(cookie('session'), cookie('stale', expires=time.time() - 10),
+                         cookie('fresh', expires=time.time() + 3600)))
+    assert sorted(c['name'] for c in store.get(URL)['cookies']) == ['fresh', 'session']
+
+    store.conn.execute('UPDATE states SET saved_at = ?', (time.time() - 61,))
+    assert store.get(URL) is None
+    assert store.get_stats()['domains'] == 0
+
+
+def test_sessions_that_saw_an_invalidation_do_not_save_it_back(tmp_path):
+    store = StorageStateStore(str(tmp_path))
+    started = time.time()
+    store.put(URL, state(cookie('session')))
+    store.invalidate(URL, reason='HTTP 403')
+    assert store.get(URL) is None
+
+    store.put(URL, state(cookie('session')), session_started=started)
+    assert store.get(URL) is None
+    # A session started after the rejection may save again
+    store.put(URL, state(cookie('new')), session_started=time.time() + 1)
+    assert [c['name'] for c in store.get(URL)['cookies']] == ['new']
@@ -0,0 +1,38 @@
+import pytest
+
+from src.utils.url_command import parse_url_command
+
+
+@pytest.mark.parametrize('message, depth', [
+    ('https://site.test/web-crawler-guide', None),
+    ('https://site.test/docs/-crawl-notes 1-5 page-crawl=', None),
+    ('https://site.test/ -crawl', 1),
+    ('https://site.test/ -CRAWL=3', 3),
+    ('https://site.test/ -crawl=deep', 1),
+    ('https://site.test/ 1-3 -crawl=2', 2),
+])
+def test_crawl_flag_is_a_whole_token_after_the_url(message, depth):
+    assert parse_url_command(message).crawl_depth() == depth
+
+
+def test_positional_arguments():
+    command = parse_url_command('https://site.test/list 1-5 /list?page={page} -captcha')
+    assert command.url == 'https://site.test/list'
+    assert command.pages == '1-5'
+    assert command.url_pattern == '/list?page={page}'
+    assert command.flags == ['-captcha']
+
+    command = parse_url_command('https://site.test/list -crawl')
+    assert command.pages is None and command.url_pattern is None
+
+
+@pytest.mark.parametrize('message, captcha, scroll', [
+    ('https://site.test/infinite-scroll-demo', False, False),
+    ('https://site.test/solve-captcha-guide 1-2 /p-scroll/{page}', False, False),
+    ('https://site.test/feed -scroll', False, True),
+    ('https://site.test/login -Captcha -scroll', True, True),
+])
+def test_captcha_and_scroll_flags_are_whole_tokens(message, captcha, scroll):
+    command = parse_url_command(message)
+    assert command.has_flag('-captcha') is captcha
+    assert command.has_flag('-scroll') is scroll
@@ -0,0 +1,24 @@
+import pytest
+
+from src.utils.url_utils import normalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Example.COM/Path', 'https://example.com/Path'),
+    ('https://example.com:443/a', 'https://example.com/a'),
+    ('http://example.com:8080/a', 'http://example.com:8080/a'),
+    ('https://example.com/a/', 'https://example.com/a'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com/a#section', 'https://example.com/a'),
+    ('https://example.com/a?b=2&a=1', 'https://example.com/a?a=1&b=2'),
+    ('https://example.com/a?utm_source=x&gclid=1&id=3', 'https://example.com/a?id=3'),
+    ('https://example.com/a?flag=', 'https://example.com/a?flag='),
+    ('  https://user:pw@example.com/a ', 'https://user:pw@example.com/a'),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_equivalent_spellings_share_a_key():
+    assert normalize_url('https://example.com/list/?b=2&a=1&utm_medium=mail') == \
+        normalize_url('https://EXAMPLE.com:443/list?a=1&b=2#top')